@@ -0,0 +1,56 @@
+'''
+Measures how long it takes to import each of the main trafpy modules in a fresh
+Python process, and checks that importing them does not pull in any heavy
+optional dependencies (tensorflow, torch, ray, cv2, pympler) or start a ray
+cluster. These should only be imported by the features which need them (e.g.
+DCN(gen_machine_readable_network=True), rendering, ray-parallel testbeds).
+
+Exits with a non-zero status if any heavy dependency is imported or any
+import takes longer than max_import_time seconds, so can be used to check that
+import time does not regress.
+'''
+import subprocess
+import sys
+import json
+
+
+modules = ['trafpy.generator',
+           'trafpy.manager',
+           'trafpy.manager.src.simulators.dcn',
+           'trafpy.manager.src.schedulers.schedulers']
+heavy_modules = ['tensorflow', 'torch', 'ray', 'cv2', 'pympler']
+max_import_time = 10 # seconds
+num_repeats = 3
+
+
+def time_import(module):
+    '''Imports module in a fresh python process and returns (import time, heavy modules imported).'''
+    code = 'import time, sys, json; start = time.time(); import {}; t = time.time() - start; print(json.dumps([t, [m for m in {} if m in sys.modules]]))'.format(module, heavy_modules)
+    result = subprocess.run([sys.executable, '-c', code], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise Exception('Could not import {}:\n{}'.format(module, result.stderr.decode('utf-8')))
+    import_time, imported_heavy_modules = json.loads(result.stdout.decode('utf-8').strip().split('\n')[-1])
+    return import_time, imported_heavy_modules
+
+
+if __name__ == '__main__':
+    failed = False
+    for module in modules:
+        import_times = []
+        for _ in range(num_repeats):
+            import_time, imported_heavy_modules = time_import(module)
+            import_times.append(import_time)
+        import_time = min(import_times)
+        print('{}: {} s | heavy modules imported: {}'.format(module, round(import_time, 3), imported_heavy_modules))
+
+        if len(imported_heavy_modules) > 0:
+            print('FAILED: importing {} imported heavy modules {}'.format(module, imported_heavy_modules))
+            failed = True
+        if import_time > max_import_time:
+            print('FAILED: importing {} took {} s > max_import_time {} s'.format(module, round(import_time, 3), max_import_time))
+            failed = True
+
+    if failed:
+        sys.exit(1)
+    else:
+        print('All import time checks passed.')
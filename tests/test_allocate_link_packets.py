@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+import scipy.sparse
+
+gym = pytest.importorskip('gym')
+
+from trafpy.manager.src.schedulers.schedulertoolbox import allocate_link_packets
+
+
+def allocate_link_packets_per_link(incidence, link_max_packets, flow_packets, flow_priority, resolution_strategy):
+    '''Reference per-link loop implementation of the allocation (as SchedulerToolbox_v2 did before it was batched).'''
+    incidence = incidence.tocsr()
+    allocated = {}
+    for link in range(incidence.shape[0]):
+        # flows in order they requested link (== order of flow index)
+        flow_idxs = np.sort(incidence.indices[incidence.indptr[link]:incidence.indptr[link+1]])
+        if len(flow_idxs) == 0:
+            continue
+        if resolution_strategy == 'cost':
+            costs = flow_priority[flow_idxs]
+            sorted_cost_index = np.argsort(costs)
+            flow_idxs = flow_idxs[sorted_cost_index]
+        max_packets = int(link_max_packets[link])
+        packets_left = {flow_idx: int(flow_packets[flow_idx]) for flow_idx in flow_idxs}
+        scheduled = 0
+        if resolution_strategy == 'cost':
+            for flow_idx in flow_idxs:
+                packets = min(packets_left[flow_idx], max_packets - scheduled)
+                allocated[(link, flow_idx)] = packets
+                scheduled += packets
+        elif resolution_strategy == 'fair_share':
+            for flow_idx in flow_idxs:
+                allocated[(link, flow_idx)] = 0
+            num_requests_left = sum(packets > 0 for packets in packets_left.values())
+            while num_requests_left > 0:
+                packets_per_request = min(min(packets for packets in packets_left.values() if packets > 0), (max_packets - scheduled) // num_requests_left)
+                for flow_idx in flow_idxs:
+                    if packets_left[flow_idx] > 0:
+                        allocated[(link, flow_idx)] += packets_per_request
+                        packets_left[flow_idx] -= packets_per_request
+                        scheduled += packets_per_request
+                num_requests_left = sum(packets > 0 for packets in packets_left.values())
+                if scheduled >= max_packets - len(flow_idxs):
+                    break
+    return allocated
+
+
+@pytest.mark.parametrize('resolution_strategy', ['cost', 'fair_share'])
+def test_allocate_link_packets_matches_per_link_loop(resolution_strategy):
+    np.random.seed(0)
+    for _ in range(20):
+        num_links, num_flows = np.random.randint(1, 20), np.random.randint(1, 50)
+        incidence = scipy.sparse.random(num_links, num_flows, density=0.3, format='csr', random_state=np.random.randint(1e6))
+        incidence.data[:] = 1
+        link_max_packets = np.random.randint(0, 200, size=num_links)
+        flow_packets = np.random.randint(1, 100, size=num_flows)
+        flow_priority = np.random.randint(0, 10, size=num_flows).astype(float)
+
+        link_idxs, flow_idxs, packets = allocate_link_packets(incidence, link_max_packets, flow_packets, flow_priority, resolution_strategy)
+        allocated = {(link, flow): packet for link, flow, packet in zip(link_idxs.tolist(), flow_idxs.tolist(), packets.tolist())}
+        assert allocated == allocate_link_packets_per_link(incidence, link_max_packets, flow_packets, flow_priority, resolution_strategy)
+        # never allocate more than a link can carry or than a flow has left
+        assert np.all(np.bincount(link_idxs, weights=packets, minlength=num_links) <= link_max_packets)
+        assert np.all(packets <= flow_packets[flow_idxs])
+
+
+@pytest.mark.parametrize('cost_dtype', [int, float])
+def test_allocate_link_packets_equal_costs(cost_dtype):
+    '''Equal cost flows on a link must be scheduled in the order np.argsort() of the link's costs gives (as before it was batched).'''
+    np.random.seed(1)
+    for num_costs in [1, 2, 5]:
+        # enough flows per link for np.argsort() to not be stable
+        num_links, num_flows = 4, 100
+        incidence = scipy.sparse.csr_matrix((np.random.random_sample((num_links, num_flows)) < 0.6).astype(float))
+        link_max_packets = np.random.randint(50, 500, size=num_links)
+        flow_packets = np.random.randint(1, 20, size=num_flows)
+        flow_priority = np.random.randint(0, num_costs, size=num_flows).astype(cost_dtype)
+
+        link_idxs, flow_idxs, packets = allocate_link_packets(incidence, link_max_packets, flow_packets, flow_priority, 'cost')
+        for link in range(num_links):
+            requesting_flow_idxs = np.sort(incidence.indices[incidence.indptr[link]:incidence.indptr[link+1]])
+            expected_order = requesting_flow_idxs[np.argsort(flow_priority[requesting_flow_idxs])]
+            assert flow_idxs[link_idxs == link].tolist() == expected_order.tolist()
+        allocated = {(link, flow): packet for link, flow, packet in zip(link_idxs.tolist(), flow_idxs.tolist(), packets.tolist())}
+        assert allocated == allocate_link_packets_per_link(incidence, link_max_packets, flow_packets, flow_priority, 'cost')
+
+
+def test_allocate_link_packets_unknown_strategy():
+    incidence = scipy.sparse.csr_matrix(np.ones((1, 1)))
+    with pytest.raises(Exception):
+        allocate_link_packets(incidence, np.array([10]), np.array([5]), np.array([0.]), 'not_a_strategy')
@@ -0,0 +1,89 @@
+import copy
+
+import numpy as np
+import pytest
+
+from trafpy.generator.src.flowcentric import ColumnarDemandData, duplicate_demands_in_demand_data_dict, get_first_last_flow_arrival_times
+
+
+def gen_demand_data(num_flows=100, flow_ids=None):
+    np.random.seed(0)
+    eps = ['server_{}'.format(i) for i in range(8)]
+    sns = np.random.choice(eps, size=num_flows)
+    dns = np.array([np.random.choice([ep for ep in eps if ep != sn]) for sn in sns])
+    if flow_ids is None:
+        flow_ids = ['flow_{}'.format(i) for i in range(num_flows)]
+    return {'flow_id': flow_ids,
+            'sn': list(sns),
+            'dn': list(dns),
+            'flow_size': list(np.random.uniform(1, 100, size=num_flows)),
+            'event_time': list(np.sort(np.random.uniform(0, 1000, size=num_flows))),
+            'establish': [1 for _ in range(num_flows)],
+            'index': list(range(num_flows))}
+
+
+def assert_demand_data_equal(demand_data, ref_demand_data):
+    for key in ref_demand_data.keys():
+        assert list(demand_data[key]) == list(ref_demand_data[key]), key
+
+
+@pytest.mark.parametrize('flow_ids', [None, ['f{}'.format(i) for i in range(100)], ['flow_{}'.format(i) for i in range(99, -1, -1)]])
+def test_from_demand_data_round_trip(flow_ids):
+    demand_data = gen_demand_data(flow_ids=flow_ids)
+    columnar = ColumnarDemandData.from_demand_data(demand_data)
+    assert len(columnar) == len(demand_data['flow_id'])
+    assert_demand_data_equal(columnar.to_demand_data(), demand_data)
+
+
+def test_integer_flow_ids_stored_directly():
+    demand_data = gen_demand_data(flow_ids=np.arange(100, 200))
+    columnar = ColumnarDemandData.from_demand_data(demand_data)
+    assert columnar.flow_id_names is None
+    assert np.array_equal(columnar.flow_ids, np.arange(100, 200))
+    assert list(columnar['flow_id']) == ['flow_{}'.format(i) for i in range(100, 200)]
+
+    # generated flow ids need no flow_id_names
+    columnar = ColumnarDemandData.from_demand_data(gen_demand_data())
+    assert columnar.flow_id_names is None
+    assert np.array_equal(columnar.flow_ids, np.arange(100))
+    assert ColumnarDemandData.from_demand_data(gen_demand_data(flow_ids=['flow_{}'.format(i) for i in range(1, 101)])).flow_id_names is not None
+
+
+def test_decoded_columns_cached():
+    columnar = ColumnarDemandData.from_demand_data(gen_demand_data())
+    for key in ['flow_id', 'sn', 'dn']:
+        assert columnar[key] is columnar[key]
+    # slices decode their own (sub)columns
+    assert list(columnar[10:20]['flow_id']) == list(columnar['flow_id'][10:20])
+
+
+@pytest.mark.parametrize('flow_ids', [None, ['f{}'.format(i) for i in range(100)]])
+def test_duplicate_matches_dict(flow_ids):
+    demand_data = gen_demand_data(flow_ids=flow_ids)
+    columnar = ColumnarDemandData.from_demand_data(demand_data)
+    for num_duplications in [1, 3]:
+        ref_demand_data = duplicate_demands_in_demand_data_dict(copy.deepcopy(demand_data), num_duplications=num_duplications)
+        assert_demand_data_equal(duplicate_demands_in_demand_data_dict(columnar, num_duplications=num_duplications).to_demand_data(), ref_demand_data)
+
+
+def test_get_time_window():
+    demand_data = gen_demand_data()
+    columnar = ColumnarDemandData.from_demand_data(demand_data)
+    window = columnar.get_time_window(200, 600)
+    idxs = [idx for idx, event_time in enumerate(demand_data['event_time']) if 200 <= event_time < 600]
+    assert_demand_data_equal(window.to_demand_data(), {key: [val[idx] for idx in idxs] for key, val in demand_data.items()})
+    assert np.shares_memory(window.event_times, columnar.event_times)
+
+
+def test_get_first_last_flow_arrival_times():
+    demand_data = gen_demand_data()
+    demand_data['flow_size'][0] = 0
+    demand_data['dn'][-1] = demand_data['sn'][-1]
+    expected = (demand_data['event_time'][1], demand_data['event_time'][-2])
+    assert get_first_last_flow_arrival_times(demand_data) == expected
+    assert get_first_last_flow_arrival_times(ColumnarDemandData.from_demand_data(demand_data)) == expected
+
+    # job-centric demand data has more flows than event times, only first len(event_time) flows considered
+    job_demand_data = {'job_id': ['job_{}'.format(i) for i in range(2)], 'event_time': [5., 10.],
+                       'flow_id': ['job_0_flow_0', 'job_1_flow_0', 'job_1_flow_1'], 'sn': ['a', 'b', 'a'], 'dn': ['b', 'a', 'c'], 'flow_size': [1, 1, 1]}
+    assert get_first_last_flow_arrival_times(job_demand_data) == (5., 10.)
@@ -0,0 +1,107 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from trafpy.generator.src.demand import Demand
+from trafpy.generator.src.flowcentric import ColumnarDemandData
+from trafpy.generator.src.tools import save_demand_data_as_npy, load_demand_data_from_npy
+
+
+def gen_flow_centric_demand_data(num_flows=200):
+    np.random.seed(0)
+    eps = ['server_{}'.format(i) for i in range(8)]
+    sns = np.random.choice(eps, size=num_flows)
+    dns = np.array([np.random.choice([ep for ep in eps if ep != sn]) for sn in sns])
+    return eps, {'flow_id': ['flow_{}'.format(i) for i in range(num_flows)],
+                 'sn': list(sns),
+                 'dn': list(dns),
+                 'flow_size': list(np.random.uniform(1, 100, size=num_flows)),
+                 'event_time': list(np.sort(np.random.uniform(0, 1000, size=num_flows))),
+                 'establish': [1 for _ in range(num_flows)],
+                 'index': list(range(num_flows))}
+
+
+def gen_job_centric_demand_data(num_jobs=4):
+    demand_data = {'job_id': [], 'job': [], 'event_time': [], 'establish': [], 'index': [], 'flow_id': [], 'sn': [], 'dn': [], 'flow_size': [], 'deps': []}
+    for job_idx in range(num_jobs):
+        job_id = 'job_{}'.format(job_idx)
+        job = nx.DiGraph(job_id=job_id)
+        # jobs with different numbers of ops and data deps, so per-job columns are non-rectangular
+        for op_idx in range(job_idx + 1):
+            flow_id = '{}_flow_{}'.format(job_id, op_idx)
+            job.add_edge('op_{}'.format(op_idx), 'op_{}'.format(op_idx+1), attr_dict={'flow_id': flow_id, 'dependency_type': 'data_dep'})
+            demand_data['flow_id'].append(flow_id)
+            demand_data['sn'].append('server_{}'.format(op_idx))
+            demand_data['dn'].append('server_{}'.format(op_idx+1))
+            demand_data['flow_size'].append(float(op_idx+1))
+        demand_data['job_id'].append(job_id)
+        demand_data['job'].append(job)
+        demand_data['event_time'].append(float(job_idx))
+        demand_data['establish'].append(1)
+        demand_data['index'].append(job_idx)
+        demand_data['deps'].append(list(range(job_idx)))
+    demand_data['job_id'] = np.array(demand_data['job_id'], dtype=object)
+    return demand_data
+
+
+def test_flow_centric_round_trip(tmp_path):
+    eps, demand_data = gen_flow_centric_demand_data()
+    save_demand_data_as_npy(str(tmp_path / 'demand'), demand_data, print_times=False)
+    for mmap in [True, False]:
+        loaded = load_demand_data_from_npy(str(tmp_path / 'demand.demand'), mmap=mmap, print_times=False)
+        assert isinstance(loaded, ColumnarDemandData)
+        # memory mapped columns are views of the mapped file
+        assert isinstance(loaded.event_times.base, np.memmap) == mmap
+        for key in demand_data.keys():
+            assert list(loaded[key]) == list(demand_data[key]), key
+
+
+def test_flow_centric_non_generated_flow_ids_round_trip(tmp_path):
+    eps, demand_data = gen_flow_centric_demand_data()
+    demand_data['flow_id'] = ['flow_{}'.format(i) for i in reversed(range(len(demand_data['flow_id'])))]
+    save_demand_data_as_npy(str(tmp_path / 'demand'), demand_data, print_times=False)
+    assert list(load_demand_data_from_npy(str(tmp_path / 'demand'), print_times=False)['flow_id']) == demand_data['flow_id']
+
+
+def test_flow_centric_time_range(tmp_path):
+    eps, demand_data = gen_flow_centric_demand_data()
+    save_demand_data_as_npy(str(tmp_path / 'demand'), demand_data, print_times=False)
+    idxs = [idx for idx, event_time in enumerate(demand_data['event_time']) if 100 <= event_time < 400]
+    expected = {key: [val[idx] for idx in idxs] for key, val in demand_data.items()}
+
+    loaded = load_demand_data_from_npy(str(tmp_path / 'demand.demand'), time_range=(100, 400), print_times=False)
+    demand = Demand(str(tmp_path / 'demand.demand'), eps, time_range=(100, 400))
+    dict_demand = Demand(demand_data, eps, time_range=(100, 400))
+    for _demand_data in [loaded, demand.demand_data, dict_demand.demand_data]:
+        for key in expected.keys():
+            assert list(_demand_data[key]) == expected[key], key
+    assert demand.num_demands == dict_demand.num_demands == len(idxs)
+
+
+def test_job_centric_round_trip(tmp_path):
+    demand_data = gen_job_centric_demand_data()
+    save_demand_data_as_npy(str(tmp_path / 'demand'), demand_data, print_times=False)
+    loaded = load_demand_data_from_npy(str(tmp_path / 'demand.demand'), print_times=False)
+    assert sorted(loaded.keys()) == sorted(demand_data.keys())
+    for key in demand_data.keys():
+        if key == 'job':
+            assert all(nx.utils.graphs_equal(job, _job) for job, _job in zip(loaded[key], demand_data[key]))
+        else:
+            assert list(loaded[key]) == list(demand_data[key]), key
+    with open(str(tmp_path / 'demand.demand' / 'header.json'), 'r') as f:
+        assert 'event_time' in f.read()
+    with pytest.raises(Exception):
+        load_demand_data_from_npy(str(tmp_path / 'demand.demand'), time_range=(0, 1), print_times=False)
+
+
+def test_testbed_single_demand_file(tmp_path):
+    pytest.importorskip('gym')
+    pytest.importorskip('psutil')
+    from trafpy.benchmarker.main_testbed_benchmark_data import TestBed
+    eps, demand_data = gen_flow_centric_demand_data()
+    path = str(tmp_path / 'benchmark_uniform_load_0.1_repeat_0.demand')
+    save_demand_data_as_npy(path, demand_data, print_times=False)
+    tb = TestBed(path + '/', time_range=(100, 400))
+    assert tb.separate_files
+    assert tb.benchmarks == [path]
+    assert tb.conv_str_path_to_kwarg_value(tb.benchmarks[0], 'load_') == '0.1'
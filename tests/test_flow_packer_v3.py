@@ -0,0 +1,63 @@
+import random
+
+import numpy as np
+import pytest
+
+from trafpy.generator.src import tools
+from trafpy.generator.src.dists.node_dists import gen_uniform_node_dist
+from trafpy.generator.src.packers.flow_packer_v3 import FlowPackerV3, pack_flows_into_pairs
+
+
+class Generator:
+    '''Minimal generator giving the flow arrival times and load rate the packer needs.'''
+    def _get_first_last_flow_arrival_times(self, flow_interarrival_times):
+        event_times = tools.gen_event_times(flow_interarrival_times)
+        return min(event_times), max(event_times)
+
+    def _calc_overall_load_rate(self, flow_sizes, flow_interarrival_times):
+        first_flow_arrival_time, last_flow_arrival_time = self._get_first_last_flow_arrival_times(flow_interarrival_times)
+        return np.sum(flow_sizes) / (last_flow_arrival_time - first_flow_arrival_time)
+
+
+def pack_flows(num_flows, seed=0, **kwargs):
+    eps = ['server_{}'.format(i) for i in range(8)]
+    np.random.seed(seed)
+    flow_sizes = np.random.lognormal(7, 1.5, size=num_flows).round()
+    flow_interarrival_times = np.random.exponential(1000, size=num_flows)
+    # scale arrival times for a network load of 0.3
+    flow_interarrival_times *= (np.sum(flow_sizes) / np.sum(flow_interarrival_times[1:])) / (0.3 * len(eps) * 1250)
+    network_load_config = {'network_rate_capacity': len(eps) * 1250, 'ep_link_capacity': 1250, 'target_load_fraction': 0.3}
+    packer = FlowPackerV3(Generator(), eps, gen_uniform_node_dist(eps), ['flow_{}'.format(i) for i in range(num_flows)], flow_sizes, flow_interarrival_times, network_load_config, **kwargs)
+    np.random.seed(seed)
+    random.seed(seed)
+    packer.reset()
+    packed_flows = packer.pack_the_flows()
+    return {flow_id: (flow['src'], flow['dst']) for flow_id, flow in packed_flows.items()}
+
+
+def test_seeded_packing_leaves_global_random_state():
+    np.random.seed(0)
+    flow_sizes = np.sort(np.random.uniform(1, 10, size=100))[::-1]
+    # equal keys so every choice is decided by tie values
+    kwargs = dict(flow_sizes=flow_sizes, pair_src_idxs=np.array([0, 0, 1, 1]), pair_dst_idxs=np.array([0, 1, 0, 1]), pair_keys=np.zeros(4), check_dont_exceed_one_ep_load=False)
+    state = np.random.get_state()
+    expected_next = np.random.random_sample()
+    np.random.set_state(state)
+    chosen_pair_idxs = pack_flows_into_pairs(src_remaining_capacity=np.full(2, 1e6), dst_remaining_capacity=np.full(2, 1e6), seed=1, **kwargs)
+    assert np.random.random_sample() == expected_next
+    # same seed gives same packing
+    assert np.array_equal(chosen_pair_idxs, pack_flows_into_pairs(src_remaining_capacity=np.full(2, 1e6), dst_remaining_capacity=np.full(2, 1e6), seed=1, **kwargs))
+
+
+def test_sharded_packing_same_in_serial_and_parallel():
+    serial = pack_flows(2000, num_shards=4, num_processes=1, min_shard_flows_per_pair=1)
+    parallel = pack_flows(2000, num_shards=4, num_processes=2, min_shard_flows_per_pair=1)
+    assert serial == parallel
+    # and is reproducible
+    assert serial == pack_flows(2000, num_shards=4, num_processes=1, min_shard_flows_per_pair=1)
+
+
+def test_too_few_flows_per_shard_packs_serially():
+    with pytest.warns(UserWarning):
+        sharded = pack_flows(2000, num_shards=4, num_processes=1)
+    assert sharded == pack_flows(2000, num_shards=1)
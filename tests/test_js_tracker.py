@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from trafpy.generator.src.tools import JensenShannonDistanceTracker, compute_jensen_shannon_distance
+from trafpy.generator.src.dists.val_dists import gen_rand_vars_from_discretised_dist
+
+
+def get_sampled_probs_from_scratch(samples, num_bins, weights=None):
+    '''Reference rebuild of the sampled dist from all samples so far (as before incremental tracking).'''
+    counts = np.zeros(num_bins)
+    for idx, sample in enumerate(samples):
+        counts[sample] += 1 if weights is None else weights[idx]
+    return counts / np.sum(counts)
+
+
+@pytest.mark.parametrize('weighted', [False, True])
+def test_tracker_matches_distance_from_scratch(weighted):
+    np.random.seed(0)
+    target_probs = np.random.random_sample(20)
+    # bins with zero target probability
+    target_probs[[3, 7]] = 0
+    target_probs /= np.sum(target_probs)
+    tracker = JensenShannonDistanceTracker(target_probs)
+
+    samples, weights = [], []
+    for _ in range(30):
+        new_samples = np.random.randint(0, len(target_probs), size=np.random.randint(1, 50))
+        new_weights = np.random.uniform(1, 100, size=len(new_samples)) if weighted else None
+        tracker.update(new_samples, weights=new_weights)
+        samples.extend(new_samples.tolist())
+        if weighted:
+            weights.extend(new_weights.tolist())
+        sampled_probs = get_sampled_probs_from_scratch(samples, len(target_probs), weights=weights if weighted else None)
+        assert tracker.get_sampled_probs() == pytest.approx(sampled_probs)
+        assert tracker.distance() == pytest.approx(compute_jensen_shannon_distance(target_probs, sampled_probs), abs=1e-7)
+
+
+def test_tracker_sees_external_count_updates():
+    target_probs = [0.25, 0.25, 0.5]
+    counts = np.zeros(3)
+    tracker = JensenShannonDistanceTracker(target_probs, counts=counts)
+    counts[:] = [1, 1, 2]
+    assert tracker.distance() == pytest.approx(0, abs=1e-7)
+    counts[:] = [4, 0, 0]
+    assert tracker.distance() == pytest.approx(compute_jensen_shannon_distance(target_probs, [1, 0, 0]))
+    with pytest.raises(Exception):
+        JensenShannonDistanceTracker(target_probs, counts=np.zeros(2))
+
+
+def test_discretised_rand_vars_meet_threshold():
+    np.random.seed(0)
+    unique_vars, probabilities = [1, 2, 5, 10], [0.1, 0.2, 0.3, 0.4]
+    rand_vars = gen_rand_vars_from_discretised_dist(unique_vars, probabilities, num_demands=10, jensen_shannon_distance_threshold=0.05)
+    sampled_probs = [np.mean(np.asarray(rand_vars) == var) for var in unique_vars]
+    assert compute_jensen_shannon_distance(probabilities, sampled_probs) <= 0.05
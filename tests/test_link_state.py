@@ -0,0 +1,47 @@
+import copy
+
+import networkx as nx
+import numpy as np
+import pytest
+
+gym = pytest.importorskip('gym')
+
+import trafpy.generator as tpg
+from trafpy.manager.src.simulators.dcn import LinkState
+
+
+def get_network_channel_capacities(network, link_state):
+    return np.array([[network[link[0]][link[1]]['{}_to_{}_port'.format(link[0], link[1])]['channels'][channel] for channel in link_state.channel_names] for link in link_state.index_to_link])
+
+
+def test_write_to_network_only_dirty_links_matches_full_write():
+    np.random.seed(0)
+    network = tpg.gen_fat_tree(k=4, L=2, n=4, num_channels=2)
+    channel_names = tpg.gen_channel_names(2)
+    link_state = LinkState(network, channel_names)
+    full_network = copy.deepcopy(network)
+    link_state.write_to_network(full_network, all_links=True)
+    link_state.write_to_network(network, all_links=True)
+
+    eps = network.graph['endpoints']
+    for step in range(20):
+        link_state.reset()
+        for _ in range(10):
+            src, dst = np.random.choice(eps, size=2, replace=False)
+            path = nx.shortest_path(network, src, dst)
+            channel = channel_names[np.random.randint(len(channel_names))]
+            link_state.update_path_capacity(path, channel, -np.random.rand())
+        if step % 5 == 0:
+            # reset some individual links
+            link_state.reset(np.random.choice(len(link_state.index_to_link), size=3, replace=False))
+        link_state.write_to_network(network)
+        assert not np.any(link_state.dirty)
+        # N.B. dirty flags are relative to last network written to, so write full copy second
+        link_state.write_to_network(full_network, all_links=True)
+        assert np.array_equal(get_network_channel_capacities(network, link_state), link_state.capacity)
+        assert np.array_equal(get_network_channel_capacities(network, link_state), get_network_channel_capacities(full_network, link_state))
+
+    # resetting all links writes back every link which had been used
+    link_state.reset()
+    link_state.write_to_network(network)
+    assert np.array_equal(get_network_channel_capacities(network, link_state), link_state.max_capacity)
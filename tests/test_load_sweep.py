@@ -0,0 +1,10 @@
+import pytest
+
+from trafpy.generator.src.builder import create_demand_data_load_sweep
+
+
+@pytest.mark.parametrize('kwarg', ['return_packing_time', 'return_packing_jensen_shannon_distance'])
+def test_load_sweep_rejects_tuple_returning_kwargs(kwarg):
+    network_load_config = {'network_rate_capacity': 10000, 'ep_link_capacity': 1250}
+    with pytest.raises(Exception, match=kwarg):
+        create_demand_data_load_sweep([0.1, 0.5], network_load_config, eps=['server_0', 'server_1'], **{kwarg: True})
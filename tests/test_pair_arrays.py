@@ -0,0 +1,80 @@
+import json
+
+import numpy as np
+import pytest
+
+from trafpy.generator.src.dists.node_dists import get_pair_idxs, get_pair_idx, get_pair_prob_array_of_node_dist_matrix, get_pair_prob_dict_of_node_dist_matrix, get_network_pair_mapper
+from trafpy.generator.src.packers.flow_packer_v3 import PairSegmentTree
+
+
+def get_pair_prob_dict_per_pair(node_dist, eps, all_combinations=False, bidirectional=False):
+    '''Reference per-pair loop implementation of get_pair_prob_dict_of_node_dist_matrix() (as before pair index arrays).'''
+    index_to_pair, pair_to_index = get_network_pair_mapper(eps)
+    pair_prob_dict = {pair: 0 for pair in pair_to_index.keys()}
+    for src_idx, src in enumerate(eps):
+        for dst_idx, dst in enumerate(eps):
+            if src_idx == dst_idx or (not all_combinations and src_idx > dst_idx):
+                continue
+            pair = json.dumps([src, dst])
+            pair_prob_dict[pair] = node_dist[src_idx, dst_idx]
+            if bidirectional:
+                pair_prob_dict[pair] += node_dist[dst_idx, src_idx]
+    return pair_prob_dict
+
+
+@pytest.mark.parametrize('all_combinations', [False, True])
+@pytest.mark.parametrize('bidirectional', [False, True])
+def test_pair_prob_arrays_match_per_pair_loop(all_combinations, bidirectional):
+    np.random.seed(0)
+    eps = ['server_{}'.format(i) for i in range(7)]
+    node_dist = np.random.random_sample((len(eps), len(eps)))
+    np.fill_diagonal(node_dist, 0)
+    node_dist /= np.sum(node_dist)
+
+    ref_pair_prob_dict = get_pair_prob_dict_per_pair(node_dist, eps, all_combinations=all_combinations, bidirectional=bidirectional)
+    pair_prob_dict = get_pair_prob_dict_of_node_dist_matrix(node_dist, eps, all_combinations=all_combinations, bidirectional=bidirectional)
+    # same pairs in same order
+    assert list(pair_prob_dict.keys()) == list(ref_pair_prob_dict.keys())
+    assert list(pair_prob_dict.values()) == pytest.approx(list(ref_pair_prob_dict.values()))
+
+    src_idxs, dst_idxs, probs = get_pair_prob_array_of_node_dist_matrix(node_dist, all_combinations=all_combinations, bidirectional=bidirectional)
+    assert [json.dumps([eps[src_idx], eps[dst_idx]]) for src_idx, dst_idx in zip(src_idxs, dst_idxs)] == list(ref_pair_prob_dict.keys())
+    assert list(probs) == pytest.approx(list(ref_pair_prob_dict.values()))
+
+
+def test_get_pair_idx_matches_pair_mapper():
+    eps = ['server_{}'.format(i) for i in range(9)]
+    index_to_pair, pair_to_index = get_network_pair_mapper(eps)
+    src_idxs, dst_idxs = get_pair_idxs(len(eps))
+    assert len(src_idxs) == len(pair_to_index)
+    for pair_idx, (src_idx, dst_idx) in enumerate(zip(src_idxs, dst_idxs)):
+        assert index_to_pair[pair_idx] == [eps[src_idx], eps[dst_idx]]
+        # src-dst == dst-src
+        assert get_pair_idx(src_idx, dst_idx, len(eps)) == pair_idx
+        assert get_pair_idx(dst_idx, src_idx, len(eps)) == pair_idx
+    assert np.array_equal(get_pair_idx(src_idxs, dst_idxs, len(eps)), np.arange(len(src_idxs)))
+
+
+@pytest.mark.parametrize('num_pairs', [1, 2, 7, 64, 100])
+def test_pair_segment_tree_matches_masked_argmax(num_pairs):
+    '''Tree query must give a pair with the highest key amongst pairs with enough capacity, as masking and scanning every pair does.'''
+    np.random.seed(num_pairs)
+    keys = np.random.randint(0, 5, size=num_pairs).astype(float)
+    capacities = np.random.uniform(0, 100, size=num_pairs)
+    tree = PairSegmentTree(keys, capacities)
+    # flows packed in descending order of size, pair capacities only decrease
+    for flow_size in np.sort(np.random.uniform(0, 50, size=200))[::-1]:
+        feasible = capacities >= flow_size
+        idx = tree.query(flow_size)
+        if not np.any(feasible):
+            assert idx is None
+            continue
+        assert feasible[idx]
+        assert tree.keys[idx] == np.max(tree.keys[feasible])
+        # pack flow into chosen pair and update its key
+        capacities[idx] -= flow_size
+        tree.set_key(idx, tree.keys[idx] - np.random.randint(0, 3))
+        if np.random.random_sample() < 0.3:
+            # capacity of other pair(s) may also decrease (e.g. shared end points)
+            other_idx = np.random.randint(num_pairs)
+            capacities[other_idx] = max(capacities[other_idx] - np.random.uniform(0, 20), 0)
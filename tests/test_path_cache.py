@@ -0,0 +1,71 @@
+import itertools
+
+import networkx as nx
+import pytest
+
+gym = pytest.importorskip('gym')
+
+import trafpy.generator as tpg
+from trafpy.manager.src.routers.path_cache import get_path_cache, get_topology_key, invalidate_topology_key
+from trafpy.manager.src.routers.rwa import RWA
+
+
+def get_nx_k_shortest_paths(network, src, dst, num_k, weight=None):
+    return [list(path) for path in itertools.islice(nx.shortest_simple_paths(network, src, dst, weight=weight), num_k)]
+
+
+def test_path_cache_matches_networkx():
+    network = tpg.gen_nsfnet_network(N=0, num_channels=1)
+    path_cache = get_path_cache(network, 3)
+    eps = network.graph['endpoints']
+    for src, dst in itertools.permutations(eps, 2):
+        paths = path_cache.k_shortest_paths(src, dst)
+        nx_paths = get_nx_k_shortest_paths(network, src, dst, 3)
+        # ties may be ordered differently, but path costs must match
+        assert [len(path) for path in paths] == [len(path) for path in nx_paths]
+        assert all(nx.is_simple_path(network, path) and path[0] == src and path[-1] == dst for path in paths)
+
+
+def test_path_cache_computes_non_endpoint_pairs_on_demand():
+    network = tpg.gen_fat_tree(k=4, L=2, n=4, num_channels=1)
+    path_cache = get_path_cache(network, 2)
+    src, dst = [node for node in network.nodes if node not in network.graph['endpoints']][:2]
+    with pytest.raises(Exception):
+        path_cache.k_shortest_paths(src, dst)
+    paths = path_cache.k_shortest_paths(src, dst, network=network)
+    assert paths == get_nx_k_shortest_paths(network, src, dst, 2)
+
+
+def test_topology_key_changes_with_topology():
+    network = tpg.gen_nsfnet_network(N=0, num_channels=1)
+    key = get_topology_key(network)
+    eps = network.graph['endpoints']
+    old_paths = get_path_cache(network, 1).k_shortest_paths(eps[0], eps[1])
+
+    # removing an edge of the shortest path must not return stale cached paths
+    network.remove_edge(old_paths[0][0], old_paths[0][1])
+    assert get_topology_key(network) != key
+    new_paths = get_path_cache(network, 1).k_shortest_paths(eps[0], eps[1])
+    assert new_paths == get_nx_k_shortest_paths(network, eps[0], eps[1], 1)
+
+    # re-wiring without changing number of edges needs explicit invalidation
+    key = get_topology_key(network)
+    network.add_edge(old_paths[0][0], old_paths[0][1])
+    network.remove_edge(*[edge for edge in network.edges if set(edge) != set(old_paths[0][:2])][0])
+    invalidate_topology_key(network)
+    assert get_topology_key(network) != key
+
+
+def test_rwa_honours_weight():
+    network = tpg.gen_nsfnet_network(N=0, num_channels=1)
+    for edge in network.edges:
+        network.edges[edge]['cost'] = 1
+    eps = network.graph['endpoints']
+    src, dst = eps[0], eps[1]
+    shortest_path = get_nx_k_shortest_paths(network, src, dst, 1)[0]
+    # make shortest (fewest hops) path expensive
+    network.edges[shortest_path[0], shortest_path[1]]['cost'] = 100
+    rwa = RWA(tpg.gen_channel_names(1), 2)
+    assert rwa.k_shortest_paths(network, src, dst)[0] == shortest_path
+    assert rwa.k_shortest_paths(network, src, dst, weight='cost') == get_nx_k_shortest_paths(network, src, dst, 2, weight='cost')
+    assert rwa.k_shortest_paths(network, src, dst, weight='cost')[0] != shortest_path
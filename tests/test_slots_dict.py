@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from trafpy.generator.src import tools
+from trafpy.generator.src.builder import construct_demand_slots_dict
+from trafpy.generator.src.flowcentric import ColumnarDemandData
+
+
+def gen_demand_data(event_times):
+    num_flows = len(event_times)
+    eps = ['server_{}'.format(i) for i in range(4)]
+    return {'flow_id': ['flow_{}'.format(i) for i in range(num_flows)],
+            'sn': [eps[i % 4] for i in range(num_flows)],
+            'dn': [eps[(i+1) % 4] for i in range(num_flows)],
+            'flow_size': [float(i+1) for i in range(num_flows)],
+            'event_time': list(event_times),
+            'establish': [1 for _ in range(num_flows)],
+            'index': list(range(num_flows))}
+
+
+def construct_demand_slots_dict_per_event(demand_data, slot_size, include_empty_slots):
+    '''Reference per-event loop implementation of the slots (as construct_demand_slots_dict() did before SlotsDict).'''
+    session_start_time, session_end_time = demand_data['event_time'][0], demand_data['event_time'][-1]
+    total_num_time_slots = int((session_end_time - session_start_time)/slot_size)
+    if total_num_time_slots != 0:
+        slot_times = np.arange(session_start_time, session_end_time, slot_size)
+        if slot_times[-1] < session_end_time:
+            total_num_time_slots += 1
+            slot_times = np.append(slot_times, slot_times[-1]+slot_size)
+    else:
+        slot_times = [0, slot_size]
+        total_num_time_slots = 1
+    num_decimals = str(slot_size)[::-1].find('.')
+    slot_times = [np.round(slot_time, num_decimals) for slot_time in slot_times]
+
+    slot_dict = {slot_iter: {'lb_time': slot_times[slot_iter], 'ub_time': slot_times[slot_iter]+slot_size, 'new_event_dicts': []} for slot_iter in range(len(slot_times))}
+    event_iter = 0
+    for slot_iter in range(total_num_time_slots):
+        while event_iter < len(demand_data['event_time']) and demand_data['event_time'][event_iter] < slot_times[slot_iter+1]:
+            slot_dict[slot_iter]['new_event_dicts'].append(tools.gen_event_dict(demand_data, event_iter))
+            event_iter += 1
+    if not include_empty_slots:
+        slot_dict = {slot: val for slot, val in slot_dict.items() if len(val['new_event_dicts']) > 0}
+    return slot_dict
+
+
+@pytest.mark.parametrize('include_empty_slots', [True, False])
+@pytest.mark.parametrize('columnar', [False, True])
+def test_slots_dict_matches_per_event_loop(include_empty_slots, columnar):
+    np.random.seed(0)
+    for event_times, slot_size in [(np.sort(np.random.uniform(0, 100, size=200)), 1.0),
+                                   (np.sort(np.random.exponential(5, size=50)).round(1), 0.5),
+                                   (np.zeros(5), 0.1)]:
+        demand_data = gen_demand_data(event_times)
+        ref_slots_dict = construct_demand_slots_dict_per_event(demand_data, slot_size, include_empty_slots)
+        if columnar:
+            demand_data = ColumnarDemandData.from_demand_data(demand_data)
+        slots_dict = construct_demand_slots_dict(demand_data, slot_size=slot_size, include_empty_slots=include_empty_slots)
+
+        assert list(slots_dict['slot_keys']) == list(ref_slots_dict.keys())
+        assert len(slots_dict) == len(ref_slots_dict)
+        for slot, ref_slot in ref_slots_dict.items():
+            assert slot in slots_dict
+            assert slots_dict[slot]['lb_time'] == pytest.approx(ref_slot['lb_time'])
+            assert slots_dict[slot]['ub_time'] == pytest.approx(ref_slot['ub_time'])
+            event_dicts = slots_dict[slot]['new_event_dicts']
+            assert [event_dict['flow_id'] for event_dict in event_dicts] == [event_dict['flow_id'] for event_dict in ref_slot['new_event_dicts']]
+            assert [event_dict['size'] for event_dict in event_dicts] == [event_dict['size'] for event_dict in ref_slot['new_event_dicts']]
+            assert [event_dict['src'] for event_dict in event_dicts] == [event_dict['src'] for event_dict in ref_slot['new_event_dicts']]
+        # every demand is in exactly one slot
+        assert sum(len(slots_dict[slot]['new_event_dicts']) for slot in slots_dict['slot_keys']) == len(event_times)
+        assert slots_dict['num_demands'] == len(event_times)
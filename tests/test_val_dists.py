@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from trafpy.generator.src.dists.val_dists import gen_truncated_rand_vars, gen_multimodal_val_dist, _gen_multimodal_val_dist_pmf
+
+
+@pytest.mark.parametrize('min_val, max_val', [(-1, 1), (8, 9), (2, None), (None, -3)])
+def test_truncated_rand_vars_in_range(min_val, max_val):
+    np.random.seed(0)
+    rand_vars = gen_truncated_rand_vars(lambda size: np.random.normal(size=size), 1000, min_val=min_val, max_val=max_val, dist=stats.norm())
+    assert len(rand_vars) == 1000
+    assert min_val is None or np.min(rand_vars) >= min_val
+    assert max_val is None or np.max(rand_vars) <= max_val
+
+
+@pytest.mark.parametrize('min_val, max_val', [(40, 41), (-41, -40), (2, 1)])
+def test_truncated_rand_vars_no_mass_raises(min_val, max_val):
+    with pytest.raises(ValueError):
+        gen_truncated_rand_vars(lambda size: np.random.normal(size=size), 100, min_val=min_val, max_val=max_val, dist=stats.norm())
+
+
+def test_multimodal_val_dist_cached():
+    kwargs = dict(min_val=1, max_val=100, locations=[10, 60], skews=[0, 2], scales=[5, 10], num_skew_samples=[1000, 2000], bg_factor=0.1)
+    _gen_multimodal_val_dist_pmf.cache_clear()
+    prob_dist = gen_multimodal_val_dist(**kwargs)
+    assert gen_multimodal_val_dist(**kwargs) == prob_dist
+    cache_info = _gen_multimodal_val_dist_pmf.cache_info()
+    assert cache_info.hits == 1 and cache_info.misses == 1 and cache_info.maxsize is not None
+    assert sum(prob_dist.values()) == pytest.approx(1)
+    assert min(prob_dist.keys()) >= 1 and max(prob_dist.keys()) <= 100
+
+
+def test_multimodal_val_dist_scale_too_high_raises():
+    with pytest.raises(ValueError):
+        gen_multimodal_val_dist(min_val=1, max_val=2, locations=[1e6], skews=[0], scales=[1], num_skew_samples=[100])
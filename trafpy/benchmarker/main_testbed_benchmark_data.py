@@ -1,4 +1,4 @@
-from trafpy.generator.src.tools import load_data_from_json, unpickle_data, pickle_data
+from trafpy.generator.src.tools import load_data_from_json, unpickle_data, pickle_data, load_demand_data_from_npy
 from trafpy.generator.src.demand import Demand
 from trafpy.manager.src.simulators.simulators import DCN
 from trafpy.manager.src.simulators.env_analyser import EnvAnalyser
@@ -11,24 +11,50 @@ import pickle
 import sys
 import os
 import shutil
-import tensorflow as tf
 import glob
-from pympler import classtracker
-tf.keras.backend.clear_session()
+import contextlib
 
-import ray
 import psutil
 num_cpus = psutil.cpu_count(logical=False)
-try:
-    ray.init(num_cpus=num_cpus)
-except RuntimeError:
-    # already initialised ray in script calling dcn sim, no need to init again
-    pass
+
+
+def init_ray():
+    '''Imports and initialises ray (if not already initialised) for running parallel tests.'''
+    import ray
+    if not ray.is_initialized():
+        ray.init(num_cpus=num_cpus)
+    return ray
+
+def cpu_device_scope():
+    '''Pins any TensorFlow ops to the CPU if TensorFlow is in use, otherwise does nothing.'''
+    if 'tensorflow' in sys.modules:
+        import tensorflow as tf
+        return tf.device('/cpu')
+    else:
+        return contextlib.nullcontext()
 
 
 class TestBed: 
-    def __init__(self, path_to_benchmark_data):
-        if os.path.isdir(path_to_benchmark_data):
+    def __init__(self, path_to_benchmark_data, time_range=None):
+        '''
+        path_to_benchmark_data can be a single file of benchmark data, a
+        directory of separate benchmark demand files (as saved by
+        gen_benchmark_demands(separate_files=True)), or a single .demand
+        directory holding one demand (named as by gen_benchmark_demands() i.e.
+        benchmark_<benchmark>_load_<load>_repeat_<repeat>.demand).
+
+        If time_range is not None, only flows arriving at
+        time_range[0] <= event_time < time_range[1] are simulated (see
+        trafpy.generator.src.demand.Demand).
+        '''
+        self.time_range = time_range
+        if path_to_benchmark_data.rstrip('/').endswith('.demand'):
+            print('Single .demand file. Loading...')
+            # simulate as a directory of separate files holding one demand
+            self.separate_files = True
+            self.demand_data_extension = '.demand'
+            self.benchmarks = [os.path.abspath(path_to_benchmark_data.rstrip('/'))]
+        elif os.path.isdir(path_to_benchmark_data):
             print('Data split into separate files in a directory. Loading...')
             self.separate_files = True
             if glob.glob(path_to_benchmark_data + '/*.json'):
@@ -37,6 +63,9 @@ class TestBed:
             elif glob.glob(path_to_benchmark_data + '/*.pickle'):
                 # saved demand data in pickle format
                 self.demand_data_extension = '.pickle'
+            elif glob.glob(path_to_benchmark_data + '/*.demand'):
+                # saved demand data in binary .demand format
+                self.demand_data_extension = '.demand'
             else:
                 raise Exception('Unrecognised or multiple extensions in {}'.format(path_to_benchmark_data))
             self.benchmarks = glob.glob(path_to_benchmark_data + '/*{}'.format(self.demand_data_extension))
@@ -60,6 +89,9 @@ class TestBed:
             return json.loads(load_data_from_json(demand_file_path))
         elif demand_file_path[-6:] == 'pickle':
             return unpickle_data(demand_file_path)
+        elif demand_file_path[-6:] == 'demand':
+            # memory mapped, so columns only read from disk when accessed
+            return load_demand_data_from_npy(demand_file_path, time_range=self.time_range)
         else:
             raise Exception('Unrecognised file type \'{}\'. Make sure path is correct.'.format(demand_file_path))
 
@@ -135,12 +167,13 @@ class TestBed:
                                 # if json.loads(load) == 0.4: # DEBUG
                                 # if scheduler.scheduler_name != 'random' and scheduler.scheduler_name != 'first_fit' and json.loads(load) == 0.4:
                                 demand_data = self.benchmark_data[benchmark][load][repeat]
-                                demand = Demand(demand_data, config['networks'][0].graph['endpoints'])
+                                demand = Demand(demand_data, config['networks'][0].graph['endpoints'], time_range=self.time_range)
                                 
                                 env = DCN(config['networks'][0], 
                                           demand, 
                                           scheduler,
                                           num_k_paths=config['num_k_paths'],
+                                          slot_size=config['slot_size'],
                                           sim_name='benchmark_{}_load_{}_repeat_{}_scheduler_{}'.format(benchmark, load, repeat, scheduler.scheduler_name),
                                           max_flows=config['max_flows'], 
                                           max_time=config['max_time'])
@@ -180,12 +213,16 @@ class TestBed:
 
                         # get slots_dict path to database
                         slots_dict = benchmark_path[:-(len(self.demand_data_extension))]+'_slotsize_{}_slots_dict.sqlite'.format(config['slot_size'])
+                        if not os.path.exists(slots_dict) or self.time_range is not None:
+                            # no pre-computed slots_dict database (or only simulating time_range), compute slots from demand when simulator reaches them
+                            slots_dict = Demand(benchmark_path, config['networks'][0].graph['endpoints'], time_range=self.time_range)
                         
                         # init env
                         env = DCN(config['networks'][0], 
                                   slots_dict, 
                                   scheduler,
                                   num_k_paths=config['num_k_paths'],
+                                  slot_size=config['slot_size'],
                                   env_database_path=env_database_path,
                                   sim_name=sim_name,
                                   max_flows=config['max_flows'], 
@@ -206,7 +243,9 @@ class TestBed:
 
         # for job in jobs:
             # job.join() # only execute below code when all jobs finished
-        self._envs = [self.run_test.remote(self, ray_remote_args[test]['scheduler'], ray_remote_args[test]['env'], ray_remote_args[test]['path_to_save'], ray_remote_args[test]['tmp_database_path']) for test in ray_remote_args.keys()]
+        ray = init_ray()
+        run_test = ray.remote(TestBed.run_test)
+        self._envs = [run_test.remote(self, ray_remote_args[test]['scheduler'], ray_remote_args[test]['env'], ray_remote_args[test]['path_to_save'], ray_remote_args[test]['tmp_database_path']) for test in ray_remote_args.keys()]
         # self._envs = [self.run_test.remote(self, *ray_remote_args[test]) for test in ray_remote_args.keys()]
         self.envs = ray.get(self._envs) # get envs
         end_time = time.time()
@@ -241,6 +280,8 @@ class TestBed:
             extension = '.json'
         elif path.endswith('.pickle'):
             extension = '.pickle'
+        elif path.endswith('.demand'):
+            extension = '.demand'
         else:
             raise Exception('Unrecognised extension for file {}'.format(path))
 
@@ -268,7 +309,6 @@ class TestBed:
             else:
                 pass
 
-    @ray.remote
     def run_test(self, scheduler, env, path_to_save, tmp_database_path=None):
         printed_percents = [0]
         observation = env.reset()
@@ -375,7 +415,8 @@ class TestBed:
 
         '''
         
-        env.slots_dict = new_path + '/slots_dict.sqlite'
+        if env.slots_dict_in_database:
+            env.slots_dict = new_path + '/slots_dict.sqlite'
 
         if env.job_centric:
             env.arrived_job_dicts = new_path + '/arrived_job_dicts.sqlite'
@@ -415,7 +456,7 @@ if __name__ == '__main__':
 
 
 
-    with tf.device('/cpu'):
+    with cpu_device_scope():
 
         # _________________________________________________________________________
         # BASIC CONFIGURATION
@@ -1,8 +1,9 @@
 from trafpy.benchmarker import config
-from trafpy.generator.src.builder import create_demand_data
-from trafpy.generator.src.tools import save_data_as_json, save_data_as_csv, pickle_data
+from trafpy.generator.src.builder import create_demand_data, rescale_demand_data_load
+from trafpy.generator.src.tools import save_data_as_json, save_data_as_csv, pickle_data, save_demand_data_as_npy
 from trafpy.benchmarker.versions.benchmark_importer import BenchmarkImporter
 from trafpy.generator.src.demand import Demand
+from trafpy.generator.src.flowcentric import get_demand_data_time_window
 
 import numpy as np
 import time
@@ -18,19 +19,51 @@ def gen_benchmark_demands(path_to_save=None,
                           save_format='json', 
                           separate_files=False,
                           load_prev_dists=True,
-                          overwrite=False):
+                          overwrite=False,
+                          load_sweep=False,
+                          time_range=None,
+                          save_slots_dict_database=False):
     '''
     If separate_files, will save each load, repeat and, and benchmark to separate
     files in a common folder. This can help with memory since not storing everything
     in one large file.
 
-    If slot size is not None, will also generate an sqlite database for the slots_dict
-    dictionary. This is useful if later during simulations want to have pre-computed
-    slots_dict rather than computing & storing them in memory.
+    save_format can be 'json', 'csv', 'pickle' or 'npy'. 'npy' saves each demand
+    as a binary .demand directory which can be loaded memory mapped (see
+    trafpy.generator.src.tools.save_demand_data_as_npy()), so requires
+    separate_files.
+
+    If time_range is not None, only flows arriving at
+    time_range[0] <= event_time < time_range[1] are kept in each demand (only
+    supported for flow-centric benchmarks).
+
+    If save_slots_dict_database and config.SLOT_SIZE is not None, will also
+    generate an sqlite database for the slots_dict dictionary of each demand
+    (requires separate_files). This builds every slot's event dicts up front, so
+    is only useful if later during simulations want to have pre-computed
+    slots_dict rather than computing them from the demand.
+    N.B. TestBed does not need these databases, since if no database is found
+    it computes the demands arriving in each slot from the demand file as the
+    simulation reaches each slot.
+
+    If load_sweep, flow sizes and interarrival times are sampled and packed
+    once per benchmark repeat (at the highest load in config.LOADS), and the
+    demands of every load are obtained by rescaling event times (see
+    trafpy.generator.src.builder.rescale_demand_data_load()), so a whole load
+    sweep costs about one generation. Not possible if
+    config.AUTO_NODE_DIST_CORRECTION, since then node dist correction depends
+    on load.
 
     '''
     if path_to_save[-1] == '/' or path_to_save[-1] == '\\':
         path_to_save = path_to_save[:-1]
+    if load_sweep and config.AUTO_NODE_DIST_CORRECTION:
+        print('WARNING: load_sweep not possible with config.AUTO_NODE_DIST_CORRECTION since node dist correction depends on load. Generating each load separately.')
+        load_sweep = False
+    if save_slots_dict_database and not separate_files:
+        raise Exception('save_slots_dict_database saves one database per demand file, so requires separate_files=True.')
+    if save_format == 'npy' and not separate_files:
+        raise Exception('save_format \'npy\' saves one .demand directory per demand, so requires separate_files=True.')
 
     if separate_files:
         # must separate files under common folder
@@ -91,6 +124,10 @@ def gen_benchmark_demands(path_to_save=None,
         start_benchmark = time.time()
         load_counter = 1
         benchmark_dists[benchmark] = importer.get_benchmark_dists(benchmark, eps, racks_dict=racks_dict)
+        if load_sweep:
+            # demands of each repeat generated once at highest load, then rescaled to each load
+            max_load = max(config.LOADS)
+            repeat_demand_data = {}
         for load in config.LOADS:
             start_load = time.time()
             network_load_config = {'network_rate_capacity': config.NETWORK_CAPACITIES[benchmark], 
@@ -105,20 +142,39 @@ def gen_benchmark_demands(path_to_save=None,
                 else:
                     # flow-centric
                     use_multiprocessing = False
-                demand_data = create_demand_data(min_num_demands=config.MIN_NUM_DEMANDS,
-                                                 max_num_demands=config.MAX_NUM_DEMANDS, 
-                                                 eps=eps,
-                                                 node_dist=benchmark_dists[benchmark]['node_dist'],
-                                                 flow_size_dist=benchmark_dists[benchmark]['flow_size_dist'],
-                                                 interarrival_time_dist=benchmark_dists[benchmark]['interarrival_time_dist'],
-                                                 num_ops_dist=benchmark_dists[benchmark]['num_ops_dist'],
-                                                 c=3, # 1.5
-                                                 jensen_shannon_distance_threshold=config.JENSEN_SHANNON_DISTANCE_THRESHOLD,
-                                                 network_load_config=network_load_config,
-                                                 min_last_demand_arrival_time=config.MIN_LAST_DEMAND_ARRIVAL_TIME,
-                                                 auto_node_dist_correction=config.AUTO_NODE_DIST_CORRECTION,
-                                                 use_multiprocessing=use_multiprocessing,
-                                                 print_data=False)
+                if load_sweep and repeat in repeat_demand_data:
+                    demand_data = rescale_demand_data_load(repeat_demand_data[repeat],
+                                                           load_fraction=max_load,
+                                                           target_load_fraction=load,
+                                                           min_last_demand_arrival_time=config.MIN_LAST_DEMAND_ARRIVAL_TIME,
+                                                           max_num_demands=config.MAX_NUM_DEMANDS)
+                else:
+                    if load_sweep:
+                        # generate unduplicated demands at highest load
+                        network_load_config['target_load_fraction'] = max_load
+                    demand_data = create_demand_data(min_num_demands=config.MIN_NUM_DEMANDS,
+                                                     max_num_demands=config.MAX_NUM_DEMANDS, 
+                                                     eps=eps,
+                                                     node_dist=benchmark_dists[benchmark]['node_dist'],
+                                                     flow_size_dist=benchmark_dists[benchmark]['flow_size_dist'],
+                                                     interarrival_time_dist=benchmark_dists[benchmark]['interarrival_time_dist'],
+                                                     num_ops_dist=benchmark_dists[benchmark]['num_ops_dist'],
+                                                     c=3, # 1.5
+                                                     jensen_shannon_distance_threshold=config.JENSEN_SHANNON_DISTANCE_THRESHOLD,
+                                                     network_load_config=network_load_config,
+                                                     min_last_demand_arrival_time=None if load_sweep else config.MIN_LAST_DEMAND_ARRIVAL_TIME,
+                                                     auto_node_dist_correction=config.AUTO_NODE_DIST_CORRECTION,
+                                                     use_multiprocessing=use_multiprocessing,
+                                                     print_data=False)
+                    if load_sweep:
+                        repeat_demand_data[repeat] = demand_data
+                        demand_data = rescale_demand_data_load(demand_data,
+                                                               load_fraction=max_load,
+                                                               target_load_fraction=load,
+                                                               min_last_demand_arrival_time=config.MIN_LAST_DEMAND_ARRIVAL_TIME,
+                                                               max_num_demands=config.MAX_NUM_DEMANDS)
+                if time_range is not None:
+                    demand_data = get_demand_data_time_window(demand_data, time_range, eps=eps)
                 if separate_files:
                     print('Saving demand data for benchmark {} load {} repeat {}...'.format(benchmark, load, repeat))
                     # save as benchmark, load, and repeat into separate files
@@ -129,6 +185,8 @@ def gen_benchmark_demands(path_to_save=None,
                         save_data_as_csv(path_to_save=file_path, data=demand_data, overwrite=overwrite)
                     elif save_format == 'pickle':
                         pickle_data(path_to_save=file_path, data=demand_data, overwrite=overwrite)
+                    elif save_format == 'npy':
+                        save_demand_data_as_npy(path_to_save=file_path, demand_data=demand_data, overwrite=overwrite)
                     else:
                         raise Exception('Unrecognised save format \'{}\''.format(save_format))
                     # reset benchmark demands dict to save memory
@@ -138,7 +196,7 @@ def gen_benchmark_demands(path_to_save=None,
                     # saving all benchmarks, loads and repeats into one file
                     benchmark_demands[benchmark][load][repeat] = demand_data
 
-                if config.SLOT_SIZE is not None:
+                if save_slots_dict_database and config.SLOT_SIZE is not None:
                     # generate slots dict and save as database
                     print('Creating slots_dict database with slot_size {}...'.format(config.SLOT_SIZE))
                     s = time.time()
@@ -8,6 +8,7 @@ import time
 import json
 import copy
 import sys
+import math
 
 
 def create_demand_data(eps,
@@ -31,6 +32,7 @@ def create_demand_data(eps,
                        path_to_save=None,
                        return_packing_time=False,
                        return_packing_jensen_shannon_distance=False,
+                       chunk_size=None,
                        **kwargs):
     """Create demand data dictionary using given distributions.
 
@@ -102,6 +104,13 @@ def create_demand_data(eps,
             generated data (such as time to generate).
         path_to_save (str): Path to directory (with file name included) in which
             to save generated distribution. E.g. path_to_save='data/dists/my_dist'.
+        chunk_size (int): If not None, will return a DemandDataChunks stream
+            which yields the demand data in arrival-ordered chunks of chunk_size
+            demands rather than a demand data dict. Use this for long traces
+            (e.g. large min_last_demand_arrival_time) which would not fit in
+            memory. The stream can be given to construct_demand_slots_dict().
+            N.B. Only the duplication needed to meet min_last_demand_arrival_time
+            is streamed; the base demand data is still generated in memory.
 
     Returns:
         dict: Generated demand data (either flow-centric or job-centric demand
@@ -134,6 +143,7 @@ def create_demand_data(eps,
         return generator.create_flow_centric_demand_data(
                 return_packing_time=return_packing_time, 
                 return_packing_jensen_shannon_distance=return_packing_jensen_shannon_distance,
+                chunk_size=chunk_size,
                 )
 
     else:
@@ -159,6 +169,7 @@ def create_demand_data(eps,
         return generator.create_job_centric_demand_data(
                 return_packing_time=return_packing_time, 
                 return_packing_jensen_shannon_distance=return_packing_jensen_shannon_distance,
+                chunk_size=chunk_size,
                 )
 
 
@@ -294,7 +305,7 @@ def create_demand_data(eps,
                 time_last_flow_arrived = max(demand_data['event_time'])
                 rate = total_info / time_last_flow_arrived
                 print('total info: {} | last flow: {} | rate: {}'.format(total_info, time_last_flow_arrived, rate))
-                demand_data = flowcentric.duplicate_demands_in_demand_data_dict(demand_data, method='all_eps', eps=eps)
+                demand_data = flowcentric.duplicate_demands_in_demand_data_dict(demand_data)
 
             
 
@@ -317,6 +328,151 @@ def create_demand_data(eps,
 
 
 
+def create_demand_data_load_sweep(target_load_fractions,
+                                  network_load_config,
+                                  min_last_demand_arrival_time=None,
+                                  max_num_demands=None,
+                                  auto_node_dist_correction=False,
+                                  chunk_size=None,
+                                  print_data=False,
+                                  **kwargs):
+    '''Create demand data for each of a sweep of target loads from one set of sampled demands.
+
+    Rather than sampling flow sizes and interarrival times and packing flows
+    into src-dst pairs for each target load separately, demand data is generated
+    once at the highest target load and the demand data of each lower target
+    load is obtained by scaling its event times (see rescale_demand_data_load()),
+    so a whole load sweep costs about one generation.
+
+    Packing is load-independent apart from end point capacity, and scaling event
+    times up only adds capacity, so the packing done at the highest load is valid
+    at every lower load. If auto_node_dist_correction is True, the node dist is
+    corrected according to the target load, so the packing cannot be reused and
+    each target load is generated separately.
+
+    Args:
+        target_load_fractions (list): Target load fractions to generate demand
+            data for.
+        network_load_config (dict): As in create_demand_data(); target_load_fraction
+            is ignored.
+        min_last_demand_arrival_time (int, float): As in create_demand_data(),
+            demands of each target load are duplicated until this is met.
+        max_num_demands (int): As in create_demand_data().
+        auto_node_dist_correction (bool): As in create_demand_data().
+        chunk_size (int): As in create_demand_data().
+        print_data (bool): As in create_demand_data().
+        kwargs: Other create_demand_data() args (eps, node_dist, flow_size_dist,
+            interarrival_time_dist etc.). return_packing_time and
+            return_packing_jensen_shannon_distance are not supported, since
+            they make create_demand_data() return a tuple.
+
+    Returns:
+        dict: Generated demand data of each target load fraction.
+
+    '''
+    for kwarg in ['return_packing_time', 'return_packing_jensen_shannon_distance']:
+        if kwargs.get(kwarg, False):
+            raise Exception('{} is not supported by create_demand_data_load_sweep(), since it makes create_demand_data() return a tuple rather than demand data.'.format(kwarg))
+    start = time.time()
+    target_load_fractions = list(target_load_fractions)
+    if auto_node_dist_correction:
+        print('WARNING: auto_node_dist_correction is True, so node dist correction depends on target load and each target load must be generated separately.')
+        load_demand_data = {}
+        for target_load_fraction in target_load_fractions:
+            _network_load_config = copy.deepcopy(network_load_config)
+            _network_load_config['target_load_fraction'] = target_load_fraction
+            load_demand_data[target_load_fraction] = create_demand_data(network_load_config=_network_load_config,
+                                                                        min_last_demand_arrival_time=min_last_demand_arrival_time,
+                                                                        max_num_demands=max_num_demands,
+                                                                        auto_node_dist_correction=auto_node_dist_correction,
+                                                                        chunk_size=chunk_size,
+                                                                        print_data=print_data,
+                                                                        **kwargs)
+        return load_demand_data
+
+    # generate (unduplicated) demand data at highest load
+    max_load_fraction = max(target_load_fractions)
+    _network_load_config = copy.deepcopy(network_load_config)
+    _network_load_config['target_load_fraction'] = max_load_fraction
+    demand_data = create_demand_data(network_load_config=_network_load_config,
+                                     min_last_demand_arrival_time=None,
+                                     max_num_demands=max_num_demands,
+                                     auto_node_dist_correction=auto_node_dist_correction,
+                                     print_data=print_data,
+                                     **kwargs)
+
+    load_demand_data = {target_load_fraction: rescale_demand_data_load(demand_data,
+                                                                       load_fraction=max_load_fraction,
+                                                                       target_load_fraction=target_load_fraction,
+                                                                       min_last_demand_arrival_time=min_last_demand_arrival_time,
+                                                                       max_num_demands=max_num_demands,
+                                                                       chunk_size=chunk_size)
+                        for target_load_fraction in target_load_fractions}
+    if print_data:
+        print('Generated demand data for {} target loads in {} s.'.format(len(target_load_fractions), time.time()-start))
+
+    return load_demand_data
+
+
+def rescale_demand_data_load(demand_data,
+                             load_fraction,
+                             target_load_fraction,
+                             min_last_demand_arrival_time=None,
+                             max_num_demands=None,
+                             chunk_size=None):
+    '''Rescales demand data from its load fraction to target_load_fraction.
+
+    Since the total information arriving is fixed, load is inversely proportional
+    to the demand session duration, so the load is rescaled in closed form by
+    multiplying all event times by load_fraction/target_load_fraction rather than
+    by re-sampling interarrival times. Demands are then duplicated until
+    min_last_demand_arrival_time is met, as in create_demand_data().
+
+    Args:
+        demand_data (dict): Flow-centric or job-centric demand data generated
+            without min_last_demand_arrival_time.
+        load_fraction (float): Load fraction of demand_data.
+        target_load_fraction (float): Load fraction to rescale demand_data to.
+            Must be <= load_fraction if end point loads must not exceed 1.0.
+        min_last_demand_arrival_time (int, float): Minimum last time of arrival
+            for final demand.
+        max_num_demands (int): If not None, will not duplicate beyond this
+            number of demands.
+        chunk_size (int): If not None, returns a DemandDataChunks stream.
+
+    Returns:
+        dict: Demand data at target_load_fraction.
+
+    '''
+    if 'job_id' in demand_data:
+        id_key = 'job_id'
+    else:
+        id_key = 'flow_id'
+
+    # shallow copy so demand data of each load shares demands with original
+    demand_data = dict(demand_data)
+    demand_data['event_time'] = np.asarray(demand_data['event_time']) * (load_fraction / target_load_fraction)
+
+    num_duplications = 0
+    if min_last_demand_arrival_time is not None:
+        # duplicate demands until get duration >= user-specified duration
+        adjustment_factor = min_last_demand_arrival_time / max(demand_data['event_time'])
+        num_duplications = max(math.ceil(math.log(adjustment_factor, 2)), 0)
+        if max_num_demands is not None:
+            if (2**num_duplications) * len(demand_data[id_key]) > max_num_demands:
+                print('WARING: max_num_demands is {} but have specified min_last_demand_arrival_time {}. Would need {} demands to reach this min_last_demand_arrival_time, therefore must increase max_num_demands (or set to None) if you want to meet this min_last_demand_arrival_time.'.format(max_num_demands, min_last_demand_arrival_time, (2**num_duplications)*len(demand_data[id_key])))
+                num_duplications = 0
+    if chunk_size is not None:
+        # duplicate lazily when streaming chunks
+        demand_data = flowcentric.DemandDataChunks(demand_data, num_duplications=num_duplications, chunk_size=chunk_size)
+    elif num_duplications > 0:
+        demand_data = flowcentric.duplicate_demands_in_demand_data_dict(demand_data,
+                                                                        num_duplications=num_duplications)
+
+    return demand_data
+
+
+
 def construct_demand_slots_dict(demand_data,
                                 slot_size=0.1,
                                 include_empty_slots=True,
@@ -331,18 +487,32 @@ def construct_demand_slots_dict(demand_data,
     Returned dict keys are time slot boundary times and values are any demands
     which arrive in the time slot.
 
+    Demands are assigned to time slots with a single np.searchsorted() of the
+    (time-ordered) demand event times, and only the offsets of each slot's
+    demands in demand_data are stored. The returned SlotsDict generates the
+    event dicts of a time slot when that slot is accessed.
+
+    If demand_data is a DemandDataChunks stream, returns a StreamingSlotsDict
+    which builds the time slots from the stream's chunks as they are accessed
+    rather than building every time slot in memory.
+
     Args:
-        demand_data (dict): Generated demand data (either flow-centric or job-centric).
+        demand_data (dict): Generated demand data (either flow-centric or job-centric),
+            ColumnarDemandData, or DemandDataChunks stream of demand data.
         slot_size (float): Time period of each time slot. MUST BE FLOAT!!
         include_empty_slots (bool): Whether or not to include empty (i.e. no flows arriving)
-            slots in slots_dict values. If True, will have keys for all slots of simulation,
-            but will have larger memory usage, making the slots_dict less scalable.
+            slots in slots_dict keys. If True, will have keys for all slots of simulation.
+            N.B. A StreamingSlotsDict always has keys for all slots, since empty
+            slots are only created when accessed.
 
     Returns:
-        dict: Dictionary containing the original demand data organised into time 
-        slots.
+        SlotsDict: Dict-like object containing the original demand data organised
+        into time slots.
 
     '''
+    if isinstance(demand_data, flowcentric.DemandDataChunks):
+        return StreamingSlotsDict(demand_data, slot_size=slot_size)
+
     start = time.time()
 
     slot_size = float(slot_size)
@@ -354,8 +524,9 @@ def construct_demand_slots_dict(demand_data,
     else:
         job_centric = False
 
-    session_start_time = demand_data['event_time'][0]
-    session_end_time = demand_data['event_time'][-1]
+    event_times = np.asarray(demand_data['event_time'])
+    session_start_time = event_times[0]
+    session_end_time = event_times[-1]
     total_session_time = session_end_time - session_start_time
 
     total_num_time_slots = int(total_session_time/slot_size)
@@ -367,7 +538,7 @@ def construct_demand_slots_dict(demand_data,
             slot_times = np.append(slot_times,slot_times[-1]+slot_size)
     else:
         # all flows arrived immediately
-        slot_times = [0, slot_size]
+        slot_times = np.array([0, slot_size])
         total_num_time_slots = 1
 
     # ensure slot times have specified number of decimal places
@@ -375,89 +546,51 @@ def construct_demand_slots_dict(demand_data,
     num_decimals = dummy_slot_size[::-1].find('.')
     if num_decimals == -1:
         raise Exception('Given slot_size {} has invalid num_decimals of {}. Make sure slot_size is given as a float e.g. use slot_size=1.0 rather than slot_size=1'.format(slot_size, num_decimals))
-    # for slot_iter in range(len(slot_times)):
-    for slot_iter in range(len(slot_times)):
-        slot_times[slot_iter] = np.round(slot_times[slot_iter], num_decimals)
-
-    # init slot dict
-    slot_dict = {slot_iter: {'lb_time': slot_times[slot_iter],
-                             'ub_time': slot_times[slot_iter]+slot_size,
-                             'new_event_dicts': []}
-                         for slot_iter in range(len(slot_times))}
-
-    event_iter = 0
-    slot_iter = 0
-    slot_time = slot_times[slot_iter+1]
-    while slot_iter <= total_num_time_slots-1:
-        try: 
-            while demand_data['event_time'][event_iter] < slot_time:
-                if job_centric:
-                    # must process job to unpack each event
-                    event_dict = jobcentric.gen_job_event_dict(demand_data,event_iter)
-                else:
-                    # flow is in itself an event w/ no need for job ids etc
-                    event_dict = tools.gen_event_dict(demand_data,event_iter)
-                slot_dict[slot_iter]['new_event_dicts'].append(event_dict)
-                event_iter += 1
-        except IndexError:
-            break
-        slot_iter += 1
-        try:
-            slot_time = slot_times[slot_iter+1]
-        except IndexError:
-            break
-
-    original_num_keys = len(slot_dict.keys())
-    # remove any slots which do not contain any new flows
-    new_slot_dict = {}
-    num_empty_slots = 0
-    num_demands = 0
-    for slot in slot_dict.keys():
-        num_demands_arrived = len(slot_dict[slot]['new_event_dicts'])
-        num_demands += num_demands_arrived
-        if num_demands_arrived == 0:
-            # no new demands arrived, do not add to new slot dict
-            num_empty_slots += 1
-        else:
-            # new demands arrived this slot, add to new slot dict
-            if not include_empty_slots:
-                new_slot_dict[slot] = slot_dict[slot]
-            else:
-                # just counting
-                pass
-    if not include_empty_slots:
-        slot_dict = copy.deepcopy(new_slot_dict)
+    slot_times = np.round(slot_times, num_decimals)
+
+    # demands of slot i are demand_data[slot_offsets[i]:slot_offsets[i+1]]
+    event_slots = np.clip(np.searchsorted(slot_times, event_times, side='right') - 1, 0, len(slot_times)-1)
+    slot_offsets = np.searchsorted(event_slots, np.arange(len(slot_times)+1), side='left')
+    num_demands_per_slot = np.diff(slot_offsets)
+    if include_empty_slots:
+        slot_keys = range(len(slot_times))
+    else:
+        slot_keys = np.flatnonzero(num_demands_per_slot).tolist()
+    num_empty_slots = int(np.sum(num_demands_per_slot == 0))
+    num_demands = len(event_times)
+
+    slot_dict = SlotsDict(demand_data=demand_data,
+                          slot_times=slot_times,
+                          slot_offsets=slot_offsets,
+                          slot_keys=slot_keys,
+                          slot_size=slot_size,
+                          job_centric=job_centric)
     end = time.time()
 
     if print_info:
-        num_slots = len(slot_dict.keys())
+        num_slots = len(slot_keys)
         num_redundant_slots = num_empty_slots
-        frac_redundant_slots = round(num_redundant_slots/num_slots, 3)
+        frac_redundant_slots = round(num_redundant_slots/len(slot_times), 3)
         avrg_num_demands_per_slot = round(num_demands / num_slots, 3)
         print('Generated slot dict in {} s with slot size {} and total session time {} for {} demands.'.format(round(end-start, 4), slot_size, total_session_time, num_demands))
-        # print('Approx memory size of slot dict: {} Bytes (N.B. This is very unreliable and depends on save format)'.format(sys.getsizeof(json.dumps(slot_dict))))
-        print('Number of slots making up total session time: {}'.format(num_slots))
+        print('Number of slots making up total session time: {}'.format(len(slot_times)))
         print('Number of these slots in which no new demands arrived: {}'.format(num_empty_slots))
-        print('Fraction of the {} total time slots from simulation start to finish in which no new demands arrive: {}'.format(num_slots, frac_redundant_slots))
+        print('Fraction of the {} total time slots from simulation start to finish in which no new demands arrive: {}'.format(len(slot_times), frac_redundant_slots))
         print('Average number of demands arriving per time slot: {}'.format(avrg_num_demands_per_slot))
         if not include_empty_slots:
             print('Number of keys in updated slot dict (after removing empty slots where no new demands arrived): {}'.format(num_slots))
         if avrg_num_demands_per_slot < 1:
             print('Notice: In simulation, the scheduler makes a decision at every time slot. Therefore the more time slots there are, the more processing overhead there is, and therefore the longer the simulation will take. If many of your slot sizes are redundant (i.e. no new flow information is arriving), it is advisable to increase the slot size -> decrease the number of slots -> decrease the number steps in the simulation -> decrease the simulation time. Conversely, if you have a high number of demands arriving per time slot, your scheduler will have a lower resolution to process the flows which can lead to poorer performance and more flows being perhaps unnecesserily dropped from your network. As a rule of thumb, having an average number of flows arriving per time slot of less than 1 is not needed.')
 
-
     # init general slot dict params which are useful for simulations
-    keys = list(slot_dict.keys())
-    slot_dict['slot_keys'] = keys
-    slot_dict['slot_size'] = slot_size
-    slot_dict['time_first_demand_arrived'] = session_start_time
-    slot_dict['time_last_demand_arrived'] = session_end_time
-    slot_dict['job_centric'] = job_centric
-    slot_dict['num_control_deps'], slot_dict['num_data_deps'], slot_dict['num_flows'] = get_num_deps(demand_data, job_centric)
+    slot_dict.metadata['time_first_demand_arrived'] = session_start_time
+    slot_dict.metadata['time_last_demand_arrived'] = session_end_time
+    slot_dict.metadata['job_centric'] = job_centric
+    slot_dict.metadata['num_control_deps'], slot_dict.metadata['num_data_deps'], slot_dict.metadata['num_flows'] = get_num_deps(demand_data, job_centric)
     if not job_centric:
-        slot_dict['num_demands'] = len(demand_data['flow_id'])
+        slot_dict.metadata['num_demands'] = len(demand_data['event_time'])
     else:
-        slot_dict['num_demands'] = len(demand_data['job_id'])
+        slot_dict.metadata['num_demands'] = len(demand_data['job_id'])
 
     
     return slot_dict
@@ -487,7 +620,7 @@ def get_num_deps(demand_data, job_centric):
 
     else:
         # 1 demand == 1 flow, therefore no dependencies & each demand == flow
-        num_flows = len(demand_data['flow_id'])
+        num_flows = len(demand_data['event_time'])
     
     return num_control_deps, num_data_deps, num_flows
 
@@ -498,3 +631,210 @@ def get_num_deps(demand_data, job_centric):
 
 
 
+
+
+
+class SlotsDict:
+    '''
+    Slots dict (see construct_demand_slots_dict()) which stores, for each time
+    slot, the offsets in demand_data of the (time-ordered) demands arriving in
+    the slot. The event dicts of a slot are generated from demand_data each time
+    the slot is accessed, so are never all held in memory at once.
+
+    Args:
+        demand_data (dict): Demand data (either flow-centric or job-centric), or
+            ColumnarDemandData.
+        slot_times (numpy array): Lower bound time of each time slot.
+        slot_offsets (numpy array): Demands of slot i are those at indices
+            slot_offsets[i] to slot_offsets[i+1] of demand_data.
+        slot_keys (list): Time slots to include as keys.
+        slot_size (float): Time period of each time slot.
+        job_centric (bool): Whether demand_data is job-centric.
+
+    '''
+    def __init__(self, demand_data, slot_times, slot_offsets, slot_keys, slot_size, job_centric):
+        self.demand_data = demand_data
+        self.slot_times = slot_times
+        self.slot_offsets = slot_offsets
+        self.slot_size = slot_size
+        self.job_centric = job_centric
+        self._slot_key_set = set(slot_keys) if not isinstance(slot_keys, range) else slot_keys
+
+        self.metadata = {'slot_keys': slot_keys,
+                         'slot_size': slot_size}
+
+    def get_slot_event_idxs(self, slot):
+        '''Returns range of demand_data indices of demands arriving in slot.'''
+        return range(self.slot_offsets[slot], self.slot_offsets[slot+1])
+
+    def get_slots_with_new_events(self):
+        '''Returns sorted list of slots in which new demands arrive.'''
+        return np.flatnonzero(np.diff(self.slot_offsets)).tolist()
+
+    def get_slot_event_dicts(self, slot):
+        '''Generates event dicts of demands arriving in slot.'''
+        start, end = self.slot_offsets[slot], self.slot_offsets[slot+1]
+        if start == end:
+            return []
+        if self.job_centric:
+            # must process job to unpack each event
+            return [jobcentric.gen_job_event_dict(self.demand_data, event_iter) for event_iter in range(start, end)]
+        if isinstance(self.demand_data, flowcentric.ColumnarDemandData):
+            # decode only this slot's rows of columns
+            slot_demand_data, start, end = self.demand_data[start:end].to_demand_data(), 0, end-start
+        else:
+            slot_demand_data = self.demand_data
+        # flow is in itself an event w/ no need for job ids etc
+        return [tools.gen_event_dict(slot_demand_data, event_iter) for event_iter in range(start, end)]
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.metadata[key]
+        if key not in self._slot_key_set:
+            raise KeyError(key)
+        return {'lb_time': self.slot_times[key],
+                'ub_time': self.slot_times[key]+self.slot_size,
+                'new_event_dicts': self.get_slot_event_dicts(key)}
+
+    def __contains__(self, key):
+        return key in self.metadata or key in self._slot_key_set
+
+    def __len__(self):
+        '''Returns number of time slots (metadata keys e.g. 'slot_size' are not counted).'''
+        return len(self.metadata['slot_keys'])
+
+    def keys(self):
+        return list(self.metadata['slot_keys']) + list(self.metadata.keys())
+
+    def items(self):
+        for key in self.metadata['slot_keys']:
+            yield key, self[key]
+        for key, val in self.metadata.items():
+            yield key, val
+
+
+class StreamingSlotsDict:
+    '''
+    Slots dict (see construct_demand_slots_dict()) which is built from a
+    DemandDataChunks stream as its time slots are accessed.
+
+    Time slots must be accessed in (roughly) increasing order, as is done by the
+    simulator. Accessing a slot reads chunks from the stream until the slot is
+    complete, and discards any slots before it, so only the slots of about one
+    chunk of demands are held in memory at a time. Accessing a slot before the
+    most recently accessed slot restarts the stream (e.g. when the simulator
+    is reset).
+
+    Args:
+        demand_data_chunks (DemandDataChunks): Stream of demand data chunks.
+        slot_size (float): Time period of each time slot. MUST BE FLOAT!!
+
+    '''
+    def __init__(self, demand_data_chunks, slot_size=0.1):
+        slot_size = float(slot_size)
+        if type(slot_size) is not float:
+            raise Exception('slot_size must be float (e.g. 1.0), but is {}'.format(slot_size))
+        self.num_decimals = str(slot_size)[::-1].find('.')
+        if self.num_decimals == -1:
+            raise Exception('Given slot_size {} has invalid num_decimals of {}. Make sure slot_size is given as a float e.g. use slot_size=1.0 rather than slot_size=1'.format(slot_size, self.num_decimals))
+        self.demand_data_chunks = demand_data_chunks
+        self.slot_size = slot_size
+        self.job_centric = demand_data_chunks.job_centric
+
+        # same time slots as construct_demand_slots_dict()
+        session_start_time = demand_data_chunks.time_first_demand_arrived
+        session_end_time = demand_data_chunks.time_last_demand_arrived
+        total_session_time = session_end_time - session_start_time
+        if int(total_session_time/slot_size) != 0:
+            self.slot_start_time = session_start_time
+            self.num_slots = math.ceil(total_session_time/slot_size) + 1
+        else:
+            # all flows arrived immediately
+            self.slot_start_time = 0
+            self.num_slots = 2
+
+        self.metadata = {'slot_keys': range(self.num_slots),
+                         'slot_size': slot_size,
+                         'time_first_demand_arrived': session_start_time,
+                         'time_last_demand_arrived': session_end_time,
+                         'job_centric': self.job_centric,
+                         'num_control_deps': demand_data_chunks.num_control_deps,
+                         'num_data_deps': demand_data_chunks.num_data_deps,
+                         'num_flows': demand_data_chunks.num_flows,
+                         'num_demands': demand_data_chunks.num_demands}
+
+        self.reset()
+
+    def reset(self):
+        '''Restarts the stream of demand data chunks from the first demand.'''
+        self._chunks = iter(self.demand_data_chunks)
+        self._slots = {}
+        self._min_slot = 0 # slots before this have been discarded
+        self._max_slot_read = -1 # slot of most recently read demand
+        self._exhausted = False
+
+    def get_slot_lb_times(self, slot_idxs):
+        '''Returns lower bound times of slot_idxs.'''
+        return np.round(self.slot_start_time + (np.asarray(slot_idxs) * self.slot_size), self.num_decimals)
+
+    def get_slot_idxs(self, event_times):
+        '''Returns slot indices of demands arriving at event_times.'''
+        event_times = np.asarray(event_times)
+        slot_idxs = np.clip(np.floor((event_times - self.slot_start_time) / self.slot_size).astype(int), 0, self.num_slots-1)
+        # correct for rounding of slot boundary times
+        slot_idxs -= (slot_idxs > 0) & (event_times < self.get_slot_lb_times(slot_idxs))
+        slot_idxs += (slot_idxs < self.num_slots-1) & (event_times >= self.get_slot_lb_times(slot_idxs+1))
+        return slot_idxs
+
+    def _read_until_slot_complete(self, slot):
+        while self._max_slot_read <= slot and not self._exhausted:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                self._exhausted = True
+                break
+            slot_idxs = self.get_slot_idxs(chunk['event_time'])
+            for event_iter, slot_idx in enumerate(slot_idxs):
+                if self.job_centric:
+                    # must process job to unpack each event
+                    event_dict = jobcentric.gen_job_event_dict(chunk, event_iter)
+                else:
+                    # flow is in itself an event w/ no need for job ids etc
+                    event_dict = tools.gen_event_dict(chunk, event_iter)
+                self._get_slot(slot_idx)['new_event_dicts'].append(event_dict)
+            self._max_slot_read = slot_idxs[-1]
+
+    def _get_slot(self, slot):
+        if slot not in self._slots:
+            lb_time = self.get_slot_lb_times(slot)
+            self._slots[slot] = {'lb_time': lb_time, 'ub_time': lb_time+self.slot_size, 'new_event_dicts': []}
+        return self._slots[slot]
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.metadata[key]
+        if key not in self.metadata['slot_keys']:
+            raise KeyError(key)
+        if key < self._min_slot:
+            self.reset()
+        self._read_until_slot_complete(key)
+        for slot in [slot for slot in self._slots.keys() if slot < key]:
+            del self._slots[slot]
+        self._min_slot = key
+        return self._get_slot(key)
+
+    def __contains__(self, key):
+        return key in self.metadata or key in self.metadata['slot_keys']
+
+    def __len__(self):
+        '''Returns number of time slots (metadata keys e.g. 'slot_size' are not counted).'''
+        return self.num_slots
+
+    def keys(self):
+        return list(self.metadata['slot_keys']) + list(self.metadata.keys())
+
+    def items(self):
+        for key in self.metadata['slot_keys']:
+            yield key, self[key]
+        for key, val in self.metadata.items():
+            yield key, val
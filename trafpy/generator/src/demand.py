@@ -4,7 +4,7 @@ from trafpy.generator.src.dists import val_dists
 from trafpy.generator.src.dists import plot_dists
 from trafpy.generator.src import flowcentric
 from trafpy.generator.src import tools
-from trafpy.generator.src.tools import load_data_from_json, unpickle_data
+from trafpy.generator.src.tools import load_data_from_json, unpickle_data, load_demand_data_from_npy
 
 import inspect
 import sys
@@ -23,25 +23,46 @@ class Demand:
     def __init__(self,
                  demand_data,
                  eps,
-                 name='demand'):
+                 name='demand',
+                 columnar=False,
+                 time_range=None):
         '''
         demand_data can be a dict, or it can be a str path to a demand_data
-        file, in which case Demand will automatically load this file.
+        file, in which case Demand will automatically load this file. Binary
+        .demand files (see tools.save_demand_data_as_npy()) are memory mapped.
+
+        If columnar, flow-centric demand_data will be stored as a
+        flowcentric.ColumnarDemandData (struct-of-arrays with integer node
+        IDs), which uses much less memory for large demands. Job-centric
+        demand_data is always kept as a dict.
+
+        If time_range is not None, only flows arriving at
+        time_range[0] <= event_time < time_range[1] are kept (only supported for
+        flow-centric demand_data). For .demand files, only these flows are read
+        from disk.
 
         '''
 
         self.eps = eps
         self.name = name
+        self.columnar = columnar
         if type(demand_data) is str:
             if demand_data.endswith('.json'):
                 demand_data = json.loads(load_data_from_json(demand_data, print_times=False))
             elif demand_data.endswith('.pickle'):
                 demand_data = unpickle_data(demand_data, print_times=False)
+            elif demand_data.endswith('.demand'):
+                demand_data = load_demand_data_from_npy(demand_data, time_range=time_range, print_times=False)
+                time_range = None
             else:
                 raise Exception('Unrecognised file format.')
+        if time_range is not None:
+            demand_data = flowcentric.get_demand_data_time_window(demand_data, time_range, eps=self.eps)
         self.reset(demand_data)
 
     def reset(self, demand_data):
+        if self.columnar and 'job_id' not in demand_data and not isinstance(demand_data, flowcentric.ColumnarDemandData):
+            demand_data = flowcentric.ColumnarDemandData.from_demand_data(demand_data, eps=self.eps)
         self.demand_data = demand_data
         self.num_demands = self.get_num_demands(self.demand_data)
 
@@ -184,10 +205,11 @@ class DemandAnalyser:
 
     def _compute_flow_summary(self):
         self.num_flows = self.demand.num_flows
-        self.total_flow_info_arrived = sum(self.demand.demand_data['flow_size'])
+        flow_sizes = np.asarray(self.demand.demand_data['flow_size'])
+        self.total_flow_info_arrived = np.sum(flow_sizes)
         self.load_rate = flowcentric.get_flow_centric_demand_data_overall_load_rate(self.demand.demand_data)
-        self.smallest_flow_size = min(self.demand.demand_data['flow_size'])
-        self.largest_flow_size = max(self.demand.demand_data['flow_size'])
+        self.smallest_flow_size = np.min(flow_sizes)
+        self.largest_flow_size = np.max(flow_sizes)
 
 
 
@@ -436,10 +458,8 @@ class DemandPlotter:
         # plot src & dst ep loads separately
         src_total_infos = {ep: 0 for ep in eps}
         dst_total_infos = {ep: 0 for ep in eps}
-        for idx in range(len(self.demand.demand_data['flow_id'])):
-            src = self.demand.demand_data['sn'][idx]
-            dst = self.demand.demand_data['dn'][idx]
-            size = self.demand.demand_data['flow_size'][idx]
+        sns, dns, sizes = self.demand.demand_data['sn'], self.demand.demand_data['dn'], self.demand.demand_data['flow_size']
+        for src, dst, size in zip(sns, dns, sizes):
             src_total_infos[src] += size
             dst_total_infos[dst] += size
         port_total_capacity = ep_link_bandwidth / 2
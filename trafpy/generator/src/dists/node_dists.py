@@ -40,24 +40,67 @@ def assign_probs_to_matrix(eps, probs, matrix=None):
         matrix_sum = np.round(np.sum(matrix),2)
 
     else:
-        iter = np.nditer(np.array(probs))
-        for src in eps:
-            for dst in eps:
-                if src == dst:
-                    continue
-                elif node_to_index[src] > node_to_index[dst]:
-                    # making symmetric so skip this side of diagonal
-                    continue
-                else:
-                    prob = next(iter)
-                    src_idx = node_to_index[src]
-                    dst_idx = node_to_index[dst]
-                    matrix[src_idx,dst_idx] = prob
-                    matrix[dst_idx,src_idx] = prob
+        # probs given in order of get_pair_idxs() pairs, assign to both sides of diagonal
+        src_idxs, dst_idxs = get_pair_idxs(num_nodes)
+        probs = np.asarray(probs).flatten()
+        matrix[src_idxs, dst_idxs] = probs
+        matrix[dst_idxs, src_idxs] = probs
 
 
     return matrix
 
+def get_pair_idxs(num_nodes, all_combinations=False):
+    '''Gets node dist matrix src and dst indices of each src-dst pair.
+
+    Pairs are in the order of get_network_pair_mapper() (i.e. the upper triangle 
+    of the node dist matrix in row-major order). If all_combinations, these are
+    followed by the dst-src pairs of the lower triangle in row-major order, 
+    which is the order of get_pair_prob_dict_of_node_dist_matrix(all_combinations=True).
+
+    Returns:
+        tuple: Tuple containing:
+            - **src_idxs** (*numpy array*): Src node index of each pair.
+            - **dst_idxs** (*numpy array*): Dst node index of each pair.
+
+    '''
+    src_idxs, dst_idxs = np.triu_indices(num_nodes, k=1)
+    if all_combinations:
+        lower_src_idxs, lower_dst_idxs = np.tril_indices(num_nodes, k=-1)
+        src_idxs = np.concatenate([src_idxs, lower_src_idxs])
+        dst_idxs = np.concatenate([dst_idxs, lower_dst_idxs])
+    return src_idxs, dst_idxs
+
+def get_pair_idx(src_idx, dst_idx, num_nodes):
+    '''Gets index of (src_idx, dst_idx) pair(s) in get_pair_idxs() (src-dst == dst-src).'''
+    src_idx, dst_idx = np.minimum(src_idx, dst_idx), np.maximum(src_idx, dst_idx)
+    return (src_idx * ((2 * num_nodes) - src_idx - 1)) // 2 + (dst_idx - src_idx - 1)
+
+def get_ep_rack_idxs(eps, rack_prob_config):
+    '''Gets index of rack (in rack_prob_config['racks_dict']) of each ep.'''
+    ep_to_rack_idx = {}
+    for rack_idx, rack_eps in enumerate(rack_prob_config['racks_dict'].values()):
+        for ep in rack_eps:
+            if ep not in ep_to_rack_idx:
+                ep_to_rack_idx[ep] = rack_idx
+    return np.array([ep_to_rack_idx[ep] for ep in eps])
+
+def get_pair_prob_array_of_node_dist_matrix(node_dist, all_combinations=False, bidirectional=False):
+    '''Array equivalent of get_pair_prob_dict_of_node_dist_matrix().
+
+    Returns:
+        tuple: Tuple containing:
+            - **src_idxs** (*numpy array*): Src node index of each pair.
+            - **dst_idxs** (*numpy array*): Dst node index of each pair.
+            - **probs** (*numpy array*): Probability of each pair being chosen.
+
+    '''
+    node_dist = np.asarray(node_dist)
+    src_idxs, dst_idxs = get_pair_idxs(len(node_dist), all_combinations=all_combinations)
+    probs = node_dist[src_idxs, dst_idxs]
+    if bidirectional:
+        probs = probs + node_dist[dst_idxs, src_idxs]
+    return src_idxs, dst_idxs, probs
+
 def assign_matrix_to_probs(eps, node_dist):
     '''Assigns probabilities in 2D matrix to a src-dst pair prob dist dict.'''
     num_nodes, num_pairs, node_to_index, index_to_node = tools.get_network_params(eps)
@@ -312,7 +355,6 @@ def gen_multimodal_node_dist(eps,
     ''' 
     # initialise graph params
     num_nodes, num_pairs, node_to_index, index_to_node = tools.get_network_params(eps)
-    index_to_pair, pair_to_index = get_network_pair_mapper(eps)
     node_dist = np.zeros((num_nodes, num_nodes))
     
     if num_skewed_nodes is None:
@@ -350,35 +392,18 @@ def gen_multimodal_node_dist(eps,
     probs_per_skewed_pair = {node: prob for node, prob in zip(skewed_nodes, [p/pairs_per_node for p in skewed_node_probs])}
 
     # update prob pair chosen for each pair with a skewed node
-    prob_pair_chosen = {pair: 0 for pair in pair_to_index.keys()}
-    unskewed_pairs = {pair: 0 for pair in pair_to_index.keys()} # maintain for efficient hashing
+    src_idxs, dst_idxs = get_pair_idxs(num_nodes)
+    prob_pair_chosen = np.zeros(len(src_idxs))
+    skewed_pairs = np.zeros(len(src_idxs), dtype=bool)
     for node in probs_per_skewed_pair.keys():
-        # for pair_idx in range(pairs_per_node):
-        for pair_idx in range(num_nodes):
-            if index_to_node[pair_idx] != node:
-                pair = json.dumps([node, index_to_node[pair_idx]])
-                try:
-                    prob_pair_chosen[pair] += probs_per_skewed_pair[node]/2
-                    try:
-                        del unskewed_pairs[pair]
-                    except KeyError:
-                        # already registered as no longer being unskewed
-                        pass
-                except KeyError:
-                    pair = json.loads(pair)
-                    pair = [pair[1],pair[0]]
-                    pair = json.dumps(pair)
-                    prob_pair_chosen[pair] += probs_per_skewed_pair[node]/2 # allocate 2x so divide by 2
-                    try:
-                        del unskewed_pairs[pair]
-                    except KeyError:
-                        # already registered as no longer being unskewed
-                        pass
-    total_skew_prob = np.sum(list(prob_pair_chosen.values()))
+        node_pairs = (src_idxs == node_to_index[node]) | (dst_idxs == node_to_index[node])
+        prob_pair_chosen[node_pairs] += probs_per_skewed_pair[node]/2 # allocate 2x so divide by 2
+        skewed_pairs |= node_pairs
+    total_skew_prob = np.sum(prob_pair_chosen)
                     
     # assign prob pair chosen to any pairs w/o skewed nodes
     if total_skew_prob < 0.5:
-        num_remaining_pairs = list(prob_pair_chosen.values()).count(0)
+        num_remaining_pairs = np.count_nonzero(~skewed_pairs)
         prob_dist = np.ones((num_remaining_pairs))/((num_remaining_pairs))
         num_experiments = num_remaining_pairs * 100
         counter_array = np.random.multinomial(num_experiments,
@@ -386,16 +411,14 @@ def gen_multimodal_node_dist(eps,
                                               size=1)[0]
         counter_array_prob_dist = (counter_array/(num_experiments*2))
         counter_array_prob_dist = ((0.5-total_skew_prob)/0.5) * counter_array_prob_dist
-        iterable = np.nditer(counter_array_prob_dist)
-        for pair in unskewed_pairs.keys():
-            prob_pair_chosen[pair] = next(iterable)
+        prob_pair_chosen[~skewed_pairs] = counter_array_prob_dist
 
     if print_data:
             print('Prob pair chosen:\n{}'.format(prob_pair_chosen))
 
     # assign probabilites to normalised demand matrix
     node_dist = assign_probs_to_matrix(eps=eps,
-                                       probs=list(prob_pair_chosen.values()),
+                                       probs=prob_pair_chosen,
                                        matrix=node_dist)
 
     if rack_prob_config is not None:
@@ -669,6 +692,26 @@ def get_inter_intra_rack_pair_prob_dicts(pair_prob_dict, ep_to_rack_dict):
     return inter_rack_pair_prob_dict, intra_rack_pair_prob_dict
 
 
+def _apply_diff_to_pair_probs(probs, diff_per_pair):
+    '''Adds diff_per_pair to each pair prob, taking from highest prob pair instead if would go negative.'''
+    updated_probs = probs + diff_per_pair
+    if np.all(updated_probs >= 0):
+        # wont have 0 probs, can apply update to all pairs at once
+        return updated_probs
+    probs = np.copy(probs)
+    for idx in range(len(probs)):
+        updated_prob = probs[idx] + diff_per_pair
+        if updated_prob < 0:
+            # cant have 0 probs, take away from max prob instead
+            highest_prob_idx = np.argmax(probs)
+            probs[highest_prob_idx] += diff_per_pair
+            if probs[highest_prob_idx] < 0:
+                probs[highest_prob_idx] = 0
+        else:
+            # wont have 0 probs, can apply update
+            probs[idx] = updated_prob
+    return probs
+
 def adjust_node_dist_for_rack_prob_config(rack_prob_config,
                                                eps,
                                                node_dist,
@@ -680,21 +723,14 @@ def adjust_node_dist_for_rack_prob_config(rack_prob_config,
     are met.
 
     '''
-    num_nodes, num_pairs, node_to_index, index_to_node = tools.get_network_params(eps)
-    index_to_pair, pair_to_index = get_network_pair_mapper(eps)
-
-    ep_to_rack_dict = {}
-    for key, val in rack_prob_config['racks_dict'].items():
-        for v in val:
-            if v not in ep_to_rack_dict.keys():
-                ep_to_rack_dict[v] = key
-
-    pair_prob_dict = get_pair_prob_dict_of_node_dist_matrix(node_dist, eps)
-    inter_rack_pair_prob_dict, intra_rack_pair_prob_dict = get_inter_intra_rack_pair_prob_dicts(pair_prob_dict, ep_to_rack_dict)
+    ep_rack_idxs = get_ep_rack_idxs(eps, rack_prob_config)
+    src_idxs, dst_idxs, pair_probs = get_pair_prob_array_of_node_dist_matrix(node_dist)
+    inter_rack_pairs = ep_rack_idxs[src_idxs] != ep_rack_idxs[dst_idxs]
+    inter_rack_pair_probs, intra_rack_pair_probs = pair_probs[inter_rack_pairs], pair_probs[~inter_rack_pairs]
 
     # get current inter intra rack probs
-    inter_rack_prob = sum(list(inter_rack_pair_prob_dict.values()))
-    intra_rack_prob = sum(list(intra_rack_pair_prob_dict.values()))
+    inter_rack_prob = np.sum(inter_rack_pair_probs)
+    intra_rack_prob = np.sum(intra_rack_pair_probs)
     if print_data:
         print('inter_rack_prob: {}'.format(inter_rack_prob))
         print('intra_rack_prob: {}'.format(intra_rack_prob))
@@ -702,8 +738,8 @@ def adjust_node_dist_for_rack_prob_config(rack_prob_config,
 
     target_inter_rack_prob = rack_prob_config['prob_inter_rack'] / 2 # allocate 2x so divide by 2
     diff_inter_rack_prob = target_inter_rack_prob - inter_rack_prob
-    diff_per_inter_rack_pair = diff_inter_rack_prob / len(list(inter_rack_pair_prob_dict.keys()))
-    diff_per_intra_rack_pair = -(diff_inter_rack_prob / len(list(intra_rack_pair_prob_dict.keys())))
+    diff_per_inter_rack_pair = diff_inter_rack_prob / len(inter_rack_pair_probs)
+    diff_per_intra_rack_pair = -(diff_inter_rack_prob / len(intra_rack_pair_probs))
     if print_data:
         print('target_inter_rack_prob: {}'.format(target_inter_rack_prob))
         print('diff_inter_rack_prob: {}'.format(diff_inter_rack_prob))
@@ -711,61 +747,30 @@ def adjust_node_dist_for_rack_prob_config(rack_prob_config,
         print('diff_per_intra_rack_pair: {}'.format(diff_per_intra_rack_pair))
 
     # adjust probs so have desired inter intra rack probs
-    # update inter rack probs
-    for inter_rack_pair in inter_rack_pair_prob_dict.keys():
-        updated_prob = inter_rack_pair_prob_dict[inter_rack_pair] + diff_per_inter_rack_pair
-        if updated_prob < 0:
-            # cant have 0 probs, take away from max prob instead
-            pairs = list(inter_rack_pair_prob_dict.keys())
-            probs = list(inter_rack_pair_prob_dict.values())
-            highest_prob_pair = pairs[probs.index(max(probs))]
-            inter_rack_pair_prob_dict[highest_prob_pair] += diff_per_inter_rack_pair
-            if inter_rack_pair_prob_dict[highest_prob_pair] < 0:
-                # raise Exception('Negative {} probability encountered.'.format(inter_rack_pair_prob_dict[highest_prob_pair]))
-                inter_rack_pair_prob_dict[highest_prob_pair] = 0
-        else:
-            # wont have 0 probs, can apply update
-            inter_rack_pair_prob_dict[inter_rack_pair] = updated_prob
-    # update intra rack probs
-    for intra_rack_pair in intra_rack_pair_prob_dict.keys():
-        updated_prob = intra_rack_pair_prob_dict[intra_rack_pair] + diff_per_intra_rack_pair
-        if updated_prob < 0:
-            # cant have 0 probs, take away from max prob instead
-            pairs = list(intra_rack_pair_prob_dict.keys())
-            probs = list(intra_rack_pair_prob_dict.values())
-            highest_prob_pair = pairs[probs.index(max(probs))]
-            intra_rack_pair_prob_dict[highest_prob_pair] += diff_per_intra_rack_pair
-            if intra_rack_pair_prob_dict[highest_prob_pair] < 0:
-                # raise Exception('Negative {} probability encountered.'.format(intra_rack_pair_prob_dict[highest_prob_pair]))
-                intra_rack_pair_prob_dict[highest_prob_pair] = 0
-        else:
-            # wont have 0 probs, can apply update
-            intra_rack_pair_prob_dict[intra_rack_pair] = updated_prob
+    inter_rack_pair_probs = _apply_diff_to_pair_probs(inter_rack_pair_probs, diff_per_inter_rack_pair)
+    intra_rack_pair_probs = _apply_diff_to_pair_probs(intra_rack_pair_probs, diff_per_intra_rack_pair)
 
-    inter_rack_prob = sum(list(inter_rack_pair_prob_dict.values()))
-    intra_rack_prob = sum(list(intra_rack_pair_prob_dict.values()))
+    inter_rack_prob = np.sum(inter_rack_pair_probs)
+    intra_rack_prob = np.sum(intra_rack_pair_probs)
     if print_data:
         print('inter_rack_prob: {}'.format(inter_rack_prob))
         print('intra_rack_prob: {}'.format(intra_rack_prob))
         print('sum: {}'.format(inter_rack_prob+intra_rack_prob))
 
-    # create new adjusted pair_prob_dict
-    adjusted_pair_prob_dict = {}
-    for pair, prob in inter_rack_pair_prob_dict.items():
-        adjusted_pair_prob_dict[pair] = prob
-    for pair, prob in intra_rack_pair_prob_dict.items():
-        adjusted_pair_prob_dict[pair] = prob
+    # create new adjusted pair probs (inter rack pairs followed by intra rack pairs)
+    adjusted_src_idxs = np.concatenate([src_idxs[inter_rack_pairs], src_idxs[~inter_rack_pairs]])
+    adjusted_dst_idxs = np.concatenate([dst_idxs[inter_rack_pairs], dst_idxs[~inter_rack_pairs]])
+    adjusted_pair_probs = np.concatenate([inter_rack_pair_probs, intra_rack_pair_probs])
 
     # correct any minor errors in python floating point arithmetic
-    adjusted_pair_prob_dict = adjust_probability_dict_sum(adjusted_pair_prob_dict, target_sum=0.5)
+    adjusted_pair_probs = adjusted_pair_probs - ((np.sum(adjusted_pair_probs) - 0.5) / len(adjusted_pair_probs))
 
     if print_data:
-        print('adjusted sum: {}'.format(sum(list(adjusted_pair_prob_dict.values()))))
+        print('adjusted sum: {}'.format(np.sum(adjusted_pair_probs)))
 
     # assign to create adjusted prob matrix
-    node_dist = assign_probs_to_matrix(eps=eps, 
-                                       probs=adjusted_pair_prob_dict, 
-                                       matrix=node_dist)
+    node_dist[adjusted_src_idxs, adjusted_dst_idxs] = adjusted_pair_probs
+    node_dist[adjusted_dst_idxs, adjusted_src_idxs] = adjusted_pair_probs
 
     return node_dist
 
@@ -1113,7 +1118,6 @@ def gen_multimodal_node_pair_dist(eps,
     '''
     # initialise graph params
     num_nodes, num_pairs, node_to_index, index_to_node = tools.get_network_params(eps)
-    index_to_pair, pair_to_index = get_network_pair_mapper(eps)
     node_dist = np.zeros((num_nodes, num_nodes))
     
     if num_skewed_pairs is None:
@@ -1184,44 +1188,23 @@ def gen_multimodal_node_pair_dist(eps,
         print('Skew probs:\n{}'.format(skewed_pair_probs))
 
 
-    # find prob of each skewed node pair being chosen
-    pairs_per_node = num_nodes - 1
-    prob_pair_chosen = {pair: 0 for pair in pair_to_index.keys()}
-    _skewed_pairs = []
-    for p in skewed_pairs:
-        # ensure same order
-        if json.dumps(p) not in prob_pair_chosen:
-            _skewed_pairs.append(json.dumps(p[::-1]))
-        else:
-            _skewed_pairs.append(json.dumps(p))
-    skewed_pairs = _skewed_pairs
-    probs_per_skewed_pair = {pair: prob for pair, prob in zip(skewed_pairs, [p for p in skewed_pair_probs])}
+    # find prob of each skewed node pair being chosen (indexed by pair idx so src-dst == dst-src)
+    skewed_pair_idxs = get_pair_idx(np.array([node_to_index[pair[0]] for pair in skewed_pairs], dtype=int),
+                                    np.array([node_to_index[pair[1]] for pair in skewed_pairs], dtype=int),
+                                    num_nodes)
+    probs_per_skewed_pair = {pair_idx: prob for pair_idx, prob in zip(skewed_pair_idxs, [p for p in skewed_pair_probs])}
 
     # update prob pair chosen for each pair with a skewed node
-    unskewed_pairs = {pair: 0 for pair in pair_to_index.keys()} # maintain for efficient hashing
-    for skewed_pair in probs_per_skewed_pair.keys():
-        try:
-            prob_pair_chosen[skewed_pair] += probs_per_skewed_pair[skewed_pair]/2
-            try:
-                del unskewed_pairs[skewed_pair]
-            except KeyError:
-                # already registered as no longer being unskewed
-                pass
-        except KeyError:
-            skewed_pair = json.loads(skewed_pair)
-            skewed_pair = [skewed_pair[1],skewed_pair[0]]
-            skewed_pair = json.dumps(skewed_pair)
-            prob_pair_chosen[skewed_pair] += probs_per_skewed_pair[skewed_pair]/2
-            try:
-                del unskewed_pairs[skewed_pair]
-            except KeyError:
-                # already registered as no longer being unskewed
-                pass
-    total_skew_prob = np.sum(list(prob_pair_chosen.values()))
+    prob_pair_chosen = np.zeros(num_pairs)
+    skewed = np.zeros(num_pairs, dtype=bool)
+    for skewed_pair_idx in probs_per_skewed_pair.keys():
+        prob_pair_chosen[skewed_pair_idx] += probs_per_skewed_pair[skewed_pair_idx]/2
+        skewed[skewed_pair_idx] = True
+    total_skew_prob = np.sum(prob_pair_chosen)
 
     # assign prob pair chosen to any pairs w/o skewed nodes
     if total_skew_prob < 0.5:
-        num_remaining_pairs = list(prob_pair_chosen.values()).count(0)
+        num_remaining_pairs = np.count_nonzero(~skewed)
         prob_dist = np.ones((num_remaining_pairs))/((num_remaining_pairs))
         num_experiments = num_remaining_pairs * 100
         counter_array = np.random.multinomial(num_experiments,
@@ -1229,9 +1212,7 @@ def gen_multimodal_node_pair_dist(eps,
                                               size=1)[0]
         counter_array_prob_dist = (counter_array/(num_experiments*2))
         counter_array_prob_dist = ((0.5-total_skew_prob)/0.5) * counter_array_prob_dist
-        iterable = np.nditer(counter_array_prob_dist)
-        for pair in unskewed_pairs.keys():
-            prob_pair_chosen[pair] = next(iterable)
+        prob_pair_chosen[~skewed] = counter_array_prob_dist
 
 
     if print_data:
@@ -1239,7 +1220,7 @@ def gen_multimodal_node_pair_dist(eps,
 
     # assign probabilites to normalised demand matrix
     node_dist = assign_probs_to_matrix(eps=eps,
-                                       probs=list(prob_pair_chosen.values()),
+                                       probs=prob_pair_chosen,
                                        matrix=node_dist)
 
     if rack_prob_config is not None:
@@ -1483,12 +1464,22 @@ def gen_node_demands(eps,
                      path_to_save=None):
     '''Uses node distribution to generate src-dst node pair demands.
 
+    All src-dst pairs are sampled at once from the flattened node distribution
+    matrix. Rather than resampling invalid pairs (src == dst, or not matching
+    the sampled inter-/intra-rack config of the demand) one at a time, invalid
+    pairs are masked out of the flattened distribution before sampling, which
+    gives the same distribution as rejecting and resampling them.
+
     Args:
         eps (list): List of network node endpoints that can act as sources
             & destinations.
         node_dist (numpy array): 2D matrix array of source-destination pair
             probabilities of being chosen.
         num_demands (int): Number of src-dst node pairs to generate.
+        rack_prob_config (dict): Dict with 'racks_dict' (mapping each rack to 
+            its list of endpoints) and 'prob_inter_rack' (probability that each
+            demand's src and dst are in different racks). If None, do not
+            constrain pairs by rack.
         duplicate (bool): Whether or not to duplicate src-dst node pairs. Use
             this is demands you're generating have a 'take down' event as well
             as an 'establish' event.
@@ -1504,7 +1495,41 @@ def gen_node_demands(eps,
     matrix_sum = np.round(np.sum(node_dist),2)
     assert matrix_sum == 1, \
         'demand dist matrix must sum to 1, but is {}'.format(matrix_sum)
-    
+
+    num_eps = len(eps)
+    pair_probs = np.asarray(node_dist, dtype=float).flatten()
+    src_idxs, dst_idxs = np.divmod(np.arange(num_eps**2), num_eps)
+    valid_pairs = src_idxs != dst_idxs
+
+    if rack_prob_config is not None:
+        # index of rack of each ep
+        ep_to_rack = {}
+        for rack, rack_eps in rack_prob_config['racks_dict'].items():
+            for ep in rack_eps:
+                if ep not in ep_to_rack:
+                    ep_to_rack[ep] = rack
+        rack_to_idx = {rack: idx for idx, rack in enumerate(rack_prob_config['racks_dict'].keys())}
+        ep_rack_idxs = np.array([rack_to_idx[ep_to_rack[ep]] for ep in eps])
+        inter_rack_pairs = ep_rack_idxs[src_idxs] != ep_rack_idxs[dst_idxs]
+
+        # sample if each connection should be inter or intra rack
+        inter_rack = np.random.random_sample(num_demands) < rack_prob_config['prob_inter_rack']
+        demand_groups = {'inter-rack': (inter_rack, valid_pairs & inter_rack_pairs),
+                         'intra-rack': (~inter_rack, valid_pairs & ~inter_rack_pairs)}
+    else:
+        demand_groups = {'all': (np.ones(num_demands, dtype=bool), valid_pairs)}
+
+    pair_idxs = np.zeros(num_demands, dtype=np.int64)
+    for group, (demands_in_group, group_pairs) in demand_groups.items():
+        num_group_demands = np.sum(demands_in_group)
+        if num_group_demands == 0:
+            continue
+        group_probs = np.where(group_pairs, pair_probs, 0)
+        if np.sum(group_probs) <= 0:
+            raise Exception('Cannot find any valid {} src-dst pairs with non-zero probability in node_dist. Consider changing node_dist, the number of racks, or rack_prob_config.'.format(group))
+        pair_sampler = val_dists.DiscreteSampler(np.arange(len(group_probs)), group_probs/np.sum(group_probs))
+        pair_idxs[demands_in_group] = pair_sampler.sample_idxs(num_group_demands)
+
     # init
     if duplicate:
         sn = np.array(np.zeros((2*num_demands)),dtype=object)
@@ -1513,77 +1538,11 @@ def gen_node_demands(eps,
         sn = np.array(np.zeros((num_demands)),dtype=object)
         dn = np.array(np.zeros((num_demands)), dtype=object)
 
-    # source nodes
-    sn[:num_demands] = gen_demand_nodes(eps=eps,
-                                        node_dist=node_dist,
-                                        size=num_demands, 
-                                        axis=0)
+    eps_array = np.array(eps, dtype=object)
+    sn[:num_demands] = eps_array[src_idxs[pair_idxs]]
+    dn[:num_demands] = eps_array[dst_idxs[pair_idxs]]
     if duplicate:
         sn[num_demands:] = sn[:num_demands]
-
-    # destination nodes
-    dn[:num_demands] = gen_demand_nodes(eps=eps,
-                                        node_dist=node_dist, 
-                                        size=num_demands, 
-                                        axis=1)
-    if duplicate:
-        dn[num_demands:] = dn[:num_demands]
-
-    # remove any src-dst conflicts
-    for request in np.arange(num_demands):
-        while sn[request] == dn[request]:
-            dn[request] = gen_demand_nodes(eps=eps,
-                                           node_dist=node_dist, 
-                                           size=1, 
-                                           axis=1,
-                                           check_sum_valid=False)[0]
-    if duplicate:
-        dn[num_demands:] = dn[:num_demands] # duplicate
-
-    if rack_prob_config is not None:
-        # adjust for rack config
-        # switch racks_dict keys and values to make hasing easier
-        racks_dict = {}
-        for key, val in rack_prob_config['racks_dict'].items():
-            for v in val:
-                if v not in racks_dict.keys():
-                    racks_dict[v] = key
-
-        for request in np.arange(num_demands):
-            # sample if connection should be intra or inter rack
-            inter_rack = np.random.choice(a=[True, False], 
-                                          p=[rack_prob_config['prob_inter_rack'], 
-                                             1-rack_prob_config['prob_inter_rack']])
-
-            # sample destination node given inter_rack config
-            dn[request] = get_suitable_destination_node_for_rack_config(sn[request], 
-                                                                        node_dist, 
-                                                                        eps, 
-                                                                        ep_to_rack=racks_dict, 
-                                                                        rack_to_ep=rack_prob_config['racks_dict'], 
-                                                                        inter_rack=inter_rack)
-
-            # start = time.time()
-            # if inter_rack:
-                # # src and dst must be in different racks
-                # while racks_dict[sn[request]] == racks_dict[dn[request]]:
-                    # dn[request] = gen_demand_nodes(eps=eps,
-                                                   # node_dist=node_dist, 
-                                                   # size=1, 
-                                                   # axis=1)[0]
-                    # if time.time()-start > 20:
-                        # raise Exception('Cannot find src and dst in different racks. Consider adding more racks, reducing number of endpoints per rack, or changing rack_prob_config.')
-            # else:
-                # # src and dst must be in same rack
-                # while racks_dict[sn[request]] != racks_dict[dn[request]]:
-                    # dn[request] = gen_demand_nodes(eps=eps,
-                                                   # node_dist=node_dist, 
-                                                   # size=1, 
-                                                   # axis=1)[0]
-                    # if time.time()-start > 20:
-                        # raise Exception('Cannot find src and dst in same rack. Consider removing racks, increasing number of endpoints per rack, or changing rack_prob_config.')
-
-    if duplicate:
         dn[num_demands:] = dn[:num_demands]
 
     if path_to_save is not None:
@@ -1685,50 +1644,12 @@ def get_pair_prob_dict_of_node_dist_matrix(node_dist, eps, all_combinations=Fals
 
     If bidirectional, will multiply probabilities by 2 as pair can be src-dst or dst-src.
     If bidirectional=True -> values sum to 1, if bidirectional=False -> values sum to 0.5.
-    '''
-    index_to_pair, pair_to_index = get_network_pair_mapper(eps)
-    num_nodes, num_pairs, node_to_index, index_to_node = tools.get_network_params(eps, all_combinations=all_combinations)
 
-    pair_prob_dict = {pair: 0 for pair in list(pair_to_index.keys())}
-    for src in eps:
-        for dst in eps:
-            src_idx = node_to_index[src]
-            dst_idx = node_to_index[dst]
-            if src_idx == dst_idx:
-                continue
-            if not all_combinations:
-                if src_idx > dst_idx:
-                    # making symmetric so skip this side of diagonal
-                    continue
-                else:
-                    pair = json.dumps([src, dst])
-                    try:
-                        pair_prob_dict[pair] = node_dist[src_idx, dst_idx]
-                        if bidirectional:
-                            pair_prob_dict[pair] += node_dist[dst_idx, src_idx]
-                    except KeyError:
-                        pair = json.loads(pair)
-                        pair = [pair[1],pair[0]]
-                        pair = json.dumps(pair)
-                        pair_prob_dict[pair] = node_dist[src_idx, dst_idx]
-                        if bidirectional:
-                            pair_prob_dict[pair] += node_dist[dst_idx, src_idx]
-            else:
-                # not making symmetric since src-dst != dst-src, do not skip any side of diagonal
-                pair = json.dumps([src, dst])
-                try:
-                    pair_prob_dict[pair] = node_dist[src_idx, dst_idx]
-                    if bidirectional:
-                        pair_prob_dict[pair] += node_dist[dst_idx, src_idx]
-                except KeyError:
-                    pair = json.loads(pair)
-                    pair = [pair[1],pair[0]]
-                    pair = json.dumps(pair)
-                    pair_prob_dict[pair] = node_dist[src_idx, dst_idx]
-                    if bidirectional:
-                        pair_prob_dict[pair] += node_dist[dst_idx, src_idx]
-
-    return pair_prob_dict
+    Keys are json.dumps([src, dst]) strings. Use get_pair_prob_array_of_node_dist_matrix() 
+    instead to avoid building a dict (with a key for every pair) for large networks.
+    '''
+    src_idxs, dst_idxs, probs = get_pair_prob_array_of_node_dist_matrix(node_dist, all_combinations=all_combinations, bidirectional=bidirectional)
+    return {json.dumps([eps[src_idx], eps[dst_idx]]): prob for src_idx, dst_idx, prob in zip(src_idxs, dst_idxs, probs)}
 
 
 
@@ -10,7 +10,7 @@ from scipy.stats import skewnorm
 from scipy import stats
 import math
 import matplotlib.pyplot as plt
-import sys
+import functools
 import random
 
 import ipywidgets as widgets
@@ -66,7 +66,11 @@ def convert_data_to_key_occurrences(data):
     
 
 def x_round(x, round_to_nearest=1, num_decimal_places=2, print_data=False, min_val=None):
-    '''Rounds variable to nearest specified value.'''
+    '''Rounds variable to nearest specified value.
+
+    If x is an array-like of values, all values are rounded at once and a numpy
+    array is returned.
+    '''
 
     if print_data:
         print('\nOriginal val: {}'.format(x))
@@ -80,14 +84,99 @@ def x_round(x, round_to_nearest=1, num_decimal_places=2, print_data=False, min_v
     if print_data:
         print(f'Factor: {factor}')
 
-    rounded = round(round(x*factor)/factor, num_decimal_places)
-    if min_val is not None:
-        rounded = max(rounded, min_val)
+    if np.ndim(x) > 0:
+        # vectorised rounding of array of vals
+        rounded = np.round(np.round(np.asarray(x, dtype=float)*factor)/factor, num_decimal_places)
+        if min_val is not None:
+            rounded = np.maximum(rounded, min_val)
+    else:
+        rounded = round(round(x*factor)/factor, num_decimal_places)
+        if min_val is not None:
+            rounded = max(rounded, min_val)
 
     if print_data:
         print('Rounded val: {}'.format(rounded))
 
     return rounded
+
+
+def gen_truncated_rand_vars(sampler, size, min_val=None, max_val=None, dist=None):
+    '''Samples random variable values which lie within [min_val, max_val].
+
+    If dist is given, values are sampled by inverse transform sampling of
+    the distribution truncated to [min_val, max_val] (i.e. uniform samples
+    between the CDF values of min_val and max_val are passed through the
+    inverse CDF). Otherwise (or if the inverse CDF is not numerically usable),
+    out of range values are redrawn in vectorised batches from sampler, with
+    each batch overshooting the number of values needed by the expected
+    rejection rate.
+
+    Args:
+        sampler (function): Function which takes a size argument and returns
+            an array of that many random variable values sampled from the
+            (untruncated) distribution.
+        size (int): Number of random variable values to sample.
+        min_val (int/float): Minimum random variable value.
+        max_val (int/float): Maximum random variable value.
+        dist (scipy.stats frozen distribution): Frozen distribution with cdf,
+            sf, ppf and isf methods matching sampler.
+
+    Returns:
+        numpy array: Random variable values.
+
+    Raises:
+        ValueError: If dist has no probability mass in [min_val, max_val], or
+            if sampler cannot generate enough values in [min_val, max_val].
+
+    '''
+    if min_val is None and max_val is None:
+        # don't need to worry about any min or max allowed values
+        return sampler(size)
+
+    if dist is not None:
+        lower = dist.cdf(min_val) if min_val is not None else 0
+        upper = dist.cdf(max_val) if max_val is not None else 1
+        # survival function is precise in upper tail, where cdf rounds to 1
+        sf_lower = dist.sf(min_val) if min_val is not None else 1
+        sf_upper = dist.sf(max_val) if max_val is not None else 0
+        if max(upper - lower, sf_lower - sf_upper) <= 0:
+            # rejection sampling would never (or only after very many draws) accept a value
+            raise ValueError('Distribution has no probability mass in required min-max range [{}, {}]. Increase min-max range or change distribution parameters.'.format(min_val, max_val))
+        if lower > 0.5:
+            # sample using survival function for precision in upper tail
+            rand_vars = dist.isf(np.random.uniform(sf_upper, sf_lower, size=size))
+        else:
+            rand_vars = dist.ppf(np.random.uniform(lower, upper, size=size))
+        if np.all(np.isfinite(rand_vars)):
+            # guard against floating point error at edges of range
+            return np.clip(rand_vars, min_val, max_val)
+
+    def _in_range(vals):
+        in_range = np.ones(len(vals), dtype=bool)
+        if min_val is not None:
+            in_range &= vals >= min_val
+        if max_val is not None:
+            in_range &= vals <= max_val
+        return in_range
+
+    rand_vars = np.asarray(sampler(size), dtype=float)
+    in_range = _in_range(rand_vars)
+    accept_rate = np.mean(in_range)
+    counter = 0
+    while not np.all(in_range):
+        idxs = np.flatnonzero(~in_range)
+        num_to_draw = min(int(1.1 * len(idxs) / max(accept_rate, 1e-4)) + 1, max(size, 1) * 100)
+        new_vals = np.asarray(sampler(num_to_draw), dtype=float)
+        new_in_range = _in_range(new_vals)
+        accept_rate = max(np.mean(new_in_range), 1/num_to_draw)
+        new_vals = new_vals[new_in_range][:len(idxs)]
+        rand_vars[idxs[:len(new_vals)]] = new_vals
+        in_range[idxs[:len(new_vals)]] = True
+        counter += 1
+        if counter > 10000:
+            raise ValueError('Dist too broad for required min-max range [{}, {}]. Increase min-max range or reduce dist broadness.'.format(min_val, max_val))
+
+    return rand_vars
     
 
 def gen_uniform_val_dist(min_val,
@@ -578,15 +667,18 @@ def gen_multimodal_val_dist(min_val,
             parameter).
         scales (list): Scale value(s) of skewed distribution(s) (standard deviation
             shape parameter).
-        num_skew_samples (list): Number(s) of random variables to sample from distribution(s)
-            to generate skew data and plot.
+        num_skew_samples (list): Number(s) of random variables each skewed distribution
+            contributes to the multimodal distribution (i.e. the relative weight
+            of each mode). Mode probabilities are computed analytically rather
+            than by sampling.
         bg_factor (int/float): Factor used to determine amount of noise to add
             amongst shaped modes being combined. Higher factor will add more
             noise to distribution and make modes more connected, lower will
             reduce noise but make nodes less connected.
         round_to_nearest (int/float): Value to round random variables to nearest.
             E.g. if round_to_nearest=0.2, will round each random variable to 
-            nearest 0.2.
+            nearest 0.2. If None, probabilities are computed for values 1 unit
+            apart.
         num_decimal_places (int): Number of decimal places to random variable
             values. Need to explicitly state otherwise Python's floating point 
             arithmetic will cause spurious unique random variable value errors
@@ -628,58 +720,40 @@ def gen_multimodal_val_dist(min_val,
             - **fig** (*matplotlib.figure.Figure, optional*): Probability density 
               and cumulative distribution function plot. To return, set show_fig=True 
               and/or plot_fig=True.
+
+    The most recently used distributions are cached, so generating a
+    distribution with the same parameters again in the same process does not
+    recompute it.
     
     '''
 
-    if round_to_nearest is None:
-        # assume separation between vals is 1 unit
-        separation = 1
-    else:
-        # separation between vals is same as round to nearest
-        separation = round_to_nearest
-
     if len(num_skew_samples) == 0:
         # fill in automatically
-        for _ in range(len(locations)):
-            num_skew_samples.append(10000)
-
-    num_bg_samples = int(sum(num_skew_samples)*bg_factor)
-    num_modes = len(locations)
-
-    poss_vals = np.arange(min_val,max_val+separation,separation)
-    baseline_probs = np.ones((len(poss_vals)))/len(poss_vals)
-    baseline_vals = list(np.random.choice(poss_vals,
-                                          size=num_bg_samples,
-                                          p=baseline_probs))
-
-    skew_data = []
-    skew_data.append(baseline_vals)
-    for mode_iter in range(num_modes):
-        data = gen_skewnorm_data(a=skews[mode_iter],
-                                 loc=locations[mode_iter],
-                                 scale=scales[mode_iter],
-                                 min_val=min_val,
-                                 max_val=max_val,
-                                 num_samples=num_skew_samples[mode_iter])
-        skew_data.append(list(data))
-
-    skew_data = [y for x in skew_data for y in x] # flatten
-
-    unique_vals, pmf = gen_discrete_prob_dist(rand_vars=skew_data, 
-                                              round_to_nearest=round_to_nearest,
-                                              num_decimal_places=num_decimal_places)
+        num_skew_samples = [10000 for _ in range(len(locations))]
+
+    unique_vals, pmf = _gen_multimodal_val_dist_pmf(min_val,
+                                                    max_val,
+                                                    tuple(locations),
+                                                    tuple(skews),
+                                                    tuple(scales),
+                                                    tuple(num_skew_samples),
+                                                    bg_factor,
+                                                    round_to_nearest,
+                                                    num_decimal_places)
     
     # ensure keys are floats so dont get error if try save with json
-    prob_dist = {float(unique_val): prob for unique_val, prob in zip(unique_vals, pmf)}
+    prob_dist = {float(unique_val): float(prob) for unique_val, prob in zip(unique_vals, pmf)}
 
     if print_data:
         print('Prob dist:\n{}'.format(prob_dist))
     if path_to_save is not None:
         tools.pickle_data(path_to_save, prob_dist)
+    if plot_fig or show_fig or return_data:
+        # number of occurrences each val would have had if sampled num samples of modes and background
+        total_num_samples = int(sum(num_skew_samples)*bg_factor) + sum(num_skew_samples)
+        num_occurrences = [int(round(prob*total_num_samples*occurrence_multiplier)) for prob in pmf]
+        rand_vars = convert_key_occurrences_to_data(list(prob_dist.keys()),num_occurrences)
     if plot_fig or show_fig:
-        min_prob = min(prob for prob in list(prob_dist.values()) if prob > 0)
-        num_occurrences = [int(val*(1/min_prob)*occurrence_multiplier) for val in list(prob_dist.values())]
-        rand_vars = convert_key_occurrences_to_data(unique_vals,num_occurrences)
         fig = plot_dists.plot_val_dist(rand_vars=rand_vars, 
                                        xlim=xlim,
                                        logscale=logscale,
@@ -700,6 +774,80 @@ def gen_multimodal_val_dist(min_val,
             return prob_dist
 
 
+@functools.lru_cache(maxsize=128)
+def _gen_multimodal_val_dist_pmf(min_val,
+                                 max_val,
+                                 locations,
+                                 skews,
+                                 scales,
+                                 num_skew_samples,
+                                 bg_factor,
+                                 round_to_nearest,
+                                 num_decimal_places):
+    '''Computes probability mass function of a multimodal distribution analytically.
+
+    Each mode is a skewnorm distribution truncated to [min_val, max_val]. The
+    probability of each (rounded) value is the probability mass of each mode
+    which would be rounded to the value (i.e. the difference in the mode's
+    CDF across the value's rounding interval), weighted by the number of skew
+    samples of the mode, plus a uniform background weighted by bg_factor. This
+    is the distribution which sampling num_skew_samples from each mode and
+    rounding converges to, but without any sampling.
+
+    Results are cached (keyed by the hashable args, so locations, skews, scales
+    and num_skew_samples must be tuples) and returned as read-only arrays.
+
+    Returns:
+        tuple: Tuple containing:
+            - **unique_vals** (*numpy array*): Sorted (rounded) random variable 
+              values with non-zero probability.
+            - **pmf** (*numpy array*): Corresponding probabilities.
+
+    '''
+    if round_to_nearest is None:
+        # assume separation between vals is 1 unit
+        separation = 1
+    else:
+        # separation between vals is same as round to nearest
+        separation = round_to_nearest
+
+    poss_vals = np.arange(min_val,max_val+separation,separation)
+    if round_to_nearest is not None:
+        # vals are rounded to nearest multiple of separation
+        centres = np.round(poss_vals/separation)*separation
+        vals = x_round(poss_vals, round_to_nearest, num_decimal_places, min_val=min_val)
+    else:
+        centres = poss_vals
+        vals = poss_vals.astype(float)
+
+    # edges of interval of values rounded to each val
+    edges = np.concatenate([[min_val], centres[:-1]+(separation/2), [max_val]])
+    edges = np.clip(edges, min_val, max_val)
+
+    num_bg_samples = int(sum(num_skew_samples)*bg_factor)
+    counts = np.ones(len(poss_vals)) * (num_bg_samples / len(poss_vals))
+    for mode_iter in range(len(locations)):
+        cdf = skewnorm.cdf(edges, skews[mode_iter], loc=locations[mode_iter], scale=scales[mode_iter])
+        total_mass = cdf[-1] - cdf[0]
+        if total_mass <= 0:
+            raise ValueError('scale too high for required max-min range')
+        counts += num_skew_samples[mode_iter] * np.maximum(np.diff(cdf), 0) / total_mass
+
+    # merge any vals rounded to same val (e.g. vals clipped to min_val)
+    unique_vals, inverse = np.unique(vals, return_inverse=True)
+    unique_counts = np.zeros(len(unique_vals))
+    np.add.at(unique_counts, inverse, counts)
+
+    pmf = unique_counts / np.sum(unique_counts)
+    non_zero = pmf > 0
+    unique_vals, pmf = unique_vals[non_zero], pmf[non_zero]
+    # shared by all callers via cache, so must not be modified
+    unique_vals.setflags(write=False)
+    pmf.setflags(write=False)
+
+    return unique_vals, pmf
+
+
 
 def gen_skewnorm_data(a, 
                       loc, 
@@ -739,19 +887,19 @@ def gen_skewnorm_data(a,
                     data[data_iter] = skewnorm(a, loc, scale).rvs(size=1)
                     counter += 1
                     if counter > 10000:
-                        sys.exit('scale too high for required max-min range')
+                        raise ValueError('scale too high for required max-min range')
             elif min_val is None and max_val is not None:
                 while data[data_iter] > max_val:
                     data[data_iter] = skewnorm(a, loc, scale).rvs(size=1)
                     counter += 1
                     if counter > 10000:
-                        sys.exit('scale too high for required max-min range')
+                        raise ValueError('scale too high for required max-min range')
             elif min_val is not None and max_val is None:
                 while data[data_iter] < min_val:
                     data[data_iter] = skewnorm(a, loc, scale).rvs(size=1)
                     counter += 1
                     if counter > 10000:
-                        sys.exit('scale too high for required max-min range')
+                        raise ValueError('scale too high for required max-min range')
             else:
                 raise Exception('Bug')
 
@@ -778,6 +926,43 @@ def gen_skewnorm_data(a,
     return rand_vars
 
 
+class DiscreteSampler:
+    '''Reusable sampler of a discretised distribution.
+
+    Validates the distribution and builds its cumulative distribution function
+    (CDF) once, then draws samples by inverse transform sampling (searchsorted
+    of uniform random numbers into the cached CDF). This gives the same samples
+    as np.random.choice(a=unique_vars, p=probabilities) for the same numpy random
+    state, but without re-validating the probabilities and rebuilding the CDF on
+    every call.
+
+    Args:
+        unique_vars (list): Possible random variable values.
+        probabilities (list): Corresponding probabilities of each random variable
+            value being chosen.
+
+    '''
+    def __init__(self, unique_vars, probabilities):
+        self.unique_vars = np.asarray(unique_vars)
+        self.probabilities = np.asarray(probabilities, dtype=float)
+        if len(self.unique_vars) != len(self.probabilities):
+            raise Exception('unique_vars and probabilities must be same length, but have lengths {} and {}'.format(len(self.unique_vars), len(self.probabilities)))
+        if np.any(self.probabilities < 0):
+            raise Exception('probabilities must be non-negative.')
+        if not np.isclose(np.sum(self.probabilities), 1, atol=np.sqrt(np.finfo(float).eps)):
+            raise Exception('probabilities must sum to 1, but sum to {}'.format(np.sum(self.probabilities)))
+        self.cdf = np.cumsum(self.probabilities)
+        self.cdf /= self.cdf[-1]
+
+    def sample_idxs(self, size):
+        '''Returns indices (into unique_vars) of size sampled random variables.'''
+        return self.cdf.searchsorted(np.random.random_sample(size), side='right')
+
+    def sample(self, size):
+        '''Returns size sampled random variable values.'''
+        return self.unique_vars[self.sample_idxs(size)]
+
+
 def gen_rand_vars_from_discretised_dist(unique_vars, 
                                         probabilities, 
                                         num_demands,
@@ -801,7 +986,9 @@ def gen_rand_vars_from_discretised_dist(unique_vars,
             Must be between 0 and 1. Distance of 0 -> distributions are exactly the same.
             Distance of 1 -> distributions are not at all similar.
             https://medium.com/datalab-log/measuring-the-statistical-similarity-between-two-samples-using-jensen-shannon-and-kullback-leibler-8d05af514b15
-            N.B. To meet threshold, this function will keep doubling num_demands
+            N.B. To meet threshold, this function will keep growing the sampled
+            random variables by 10% (updating the sampled histogram counts
+            incrementally) until the threshold is met
         show_fig (bool): Whether or not to generated sampled var dist plotted
             with the original distribution. 
         path_to_save (str): Path to directory (with file name included) in which
@@ -824,20 +1011,29 @@ def gen_rand_vars_from_discretised_dist(unique_vars,
         mean_list = []
         std_list = []
         counter = 0
+        sampler = DiscreteSampler(unique_vars, probabilities)
+        vals = sampler.unique_vars.astype(float)
+        sampled_idxs = []
+        tracker = tools.JensenShannonDistanceTracker(probabilities, counts=np.zeros(len(vals), dtype=np.int64))
+        counts = tracker.counts
+        num_sampled = 0
         while distance > jensen_shannon_distance_threshold:
             num_demands_list.append(num_demands)
-            sampled_vars = np.random.choice(a=unique_vars, 
-                                            size=num_demands,
-                                            p=probabilities)
+            # grow existing sample rather than re-sampling from scratch
+            new_idxs = sampler.sample_idxs(num_demands - num_sampled)
+            sampled_idxs.append(new_idxs)
+            tracker.update(new_idxs)
+            num_sampled = num_demands
             # check similarity
-            sampled_unique_vars, pmf = gen_discrete_prob_dist(sampled_vars, unique_vars=unique_vars)
-            p, q = list(probabilities), list(pmf)
-            distance = tools.compute_jensen_shannon_distance(p, q)
+            pmf = counts / num_sampled
+            distance = tracker.distance()
             distance_list.append(distance)
-            max_list.append(max(sampled_vars))
-            min_list.append(min(sampled_vars))
-            mean_list.append(np.mean(sampled_vars))
-            std_list.append(np.std(sampled_vars))
+            occurred = counts > 0
+            max_list.append(np.max(vals[occurred]))
+            min_list.append(np.min(vals[occurred]))
+            mean = np.sum(counts * vals) / num_sampled
+            mean_list.append(mean)
+            std_list.append(np.sqrt(np.sum(counts * (vals - mean)**2) / num_sampled))
             if num_demands < 10:
                 # increase to 10 or won't ever go beyond if increase by 10% each loop
                 num_demands = 10
@@ -846,13 +1042,14 @@ def gen_rand_vars_from_discretised_dist(unique_vars,
             counter += 1
             if counter == 1e4:
                 raise Exception('Looped 10,000 times and reached {} num_demands samples but distance {} still > threshold {}. Check no bugs, increase threshold and/or increase num_demands.'.format(num_demands, distance, jensen_shannon_distance_threshold))
+        sampled_vars = sampler.unique_vars[np.concatenate(sampled_idxs)]
+        sampled_unique_vars, pmf = list(unique_vars), list(pmf)
     else:
         # no similarity threshold defined
-        sampled_vars = np.random.choice(a=unique_vars, 
-                                        size=num_demands,
-                                        p=probabilities)
-        sampled_unique_vars, pmf = gen_discrete_prob_dist(sampled_vars, 
-                                                          unique_vars=unique_vars)
+        sampled_vars = DiscreteSampler(unique_vars, probabilities).sample(num_demands)
+        if show_fig:
+            sampled_unique_vars, pmf = gen_discrete_prob_dist(sampled_vars, 
+                                                              unique_vars=unique_vars)
 
     if show_fig:
         print('Num demands needed for distance {}: {}'.format(jensen_shannon_distance_threshold, num_demands_list[-1]))
@@ -1173,45 +1370,15 @@ def gen_exponential_dist(_beta,
         list: Random variable values generated by sampling from the distribution.
 
     '''
-    rand_vars = np.random.exponential(_beta,size=size)
-
-    # check min and max vals 
-    min_rand_var, max_rand_var = min(rand_vars), max(rand_vars)
-    counter = 0
-    if min_val is None and max_val is None:
-        # don't need to worry about any min or max allowed values
-        pass
-    elif min_val is not None and max_val is None:
-        # ensure greater than min_val
-        while min(rand_vars) < min_val:
-            min_idx = np.argmin(np.array(rand_vars))
-            rand_vars[min_idx] = np.random.exponential(_beta,size=1)
-            counter += 1
-            if counter > 10000:
-                sys.exit('Dist to broad for required min-max range. Increase min-max range or reduce dist broadness.')
-    elif min_val is None and max_val is not None:
-        # ensure less than max val
-        while max(rand_vars) > max_val:
-            max_idx = np.argmax(np.array(rand_vars))
-            rand_vars[max_idx] = np.random.exponential(_beta,size=1)
-            counter += 1
-            if counter > 10000:
-                sys.exit('Dist to broad for required min-max range. Increase min-max range or reduce dist broadness.')
-    elif min_val is not None and max_val is not None:
-        # ensure less than max val and greater than min val
-        while min(rand_vars) < min_val or max(rand_vars) > max_val:
-            if min(rand_vars) < min_val:
-                min_idx = np.argmin(np.array(rand_vars))
-                rand_vars[min_idx] = np.random.exponential(_beta,size=1)
-            if max(rand_vars) > max_val:
-                max_idx = np.argmax(np.array(rand_vars))
-                rand_vars[max_idx] = np.random.exponential(_beta,size=1)
-            counter += 1
-            if counter > 10000:
-                sys.exit('Dist to broad for required min-max range. Increase min-max range or reduce dist broadness.')
+    # sample from distribution truncated to min and max vals
+    rand_vars = gen_truncated_rand_vars(sampler=lambda _size: np.random.exponential(_beta, size=_size),
+                                        size=size,
+                                        min_val=min_val,
+                                        max_val=max_val,
+                                        dist=stats.expon(scale=_beta))
 
     if round_to_nearest is not None:
-        rand_vars = [x_round(val, round_to_nearest, num_decimal_places, min_val=min_val) for val in rand_vars]
+        rand_vars = x_round(rand_vars, round_to_nearest, num_decimal_places, min_val=min_val).tolist()
     else:
         # no need to discretise
         pass
@@ -1272,45 +1439,15 @@ def gen_lognormal_dist(_mu,
         list: Random variable values generated by sampling from the distribution.
 
     '''
-    rand_vars = stats.lognorm.rvs(s=_sigma, scale=math.exp(_mu), size=size)
-
-    # check min and max vals 
-    min_rand_var, max_rand_var = min(rand_vars), max(rand_vars)
-    counter = 0
-    if min_val is None and max_val is None:
-        # don't need to worry about any min or max allowed values
-        pass
-    elif min_val is not None and max_val is None:
-        # ensure greater than min_val
-        while min(rand_vars) < min_val:
-            min_idx = np.argmin(np.array(rand_vars))
-            rand_vars[min_idx] = stats.lognorm.rvs(s=_sigma,scale=math.exp(_mu),size=1)
-            counter += 1
-            if counter > 10000:
-                sys.exit('Dist to broad for required min-max range. Increase min-max range or reduce dist broadness.')
-    elif min_val is None and max_val is not None:
-        # ensure less than max val
-        while max(rand_vars) > max_val:
-            max_idx = np.argmax(np.array(rand_vars))
-            rand_vars[max_idx] = stats.lognorm.rvs(s=_sigma,scale=math.exp(_mu),size=1)
-            counter += 1
-            if counter > 10000:
-                sys.exit('Dist to broad for required min-max range. Increase min-max range or reduce dist broadness.')
-    elif min_val is not None and max_val is not None:
-        # ensure less than max val and greater than min val
-        while min(rand_vars) < min_val or max(rand_vars) > max_val:
-            if min(rand_vars) < min_val:
-                min_idx = np.argmin(np.array(rand_vars))
-                rand_vars[min_idx] = stats.lognorm.rvs(s=_sigma,scale=math.exp(_mu),size=1)
-            if max(rand_vars) > max_val:
-                max_idx = np.argmax(np.array(rand_vars))
-                rand_vars[max_idx] = stats.lognorm.rvs(s=_sigma,scale=math.exp(_mu),size=1)
-            counter += 1
-            if counter > 10000:
-                sys.exit('Dist to broad for required min-max range. Increase min-max range or reduce dist broadness.')
+    # sample from distribution truncated to min and max vals
+    rand_vars = gen_truncated_rand_vars(sampler=lambda _size: stats.lognorm.rvs(s=_sigma, scale=math.exp(_mu), size=_size),
+                                        size=size,
+                                        min_val=min_val,
+                                        max_val=max_val,
+                                        dist=stats.lognorm(s=_sigma, scale=math.exp(_mu)))
 
     if round_to_nearest is not None:
-        rand_vars = [x_round(val, round_to_nearest, num_decimal_places, min_val=min_val) for val in rand_vars]
+        rand_vars = x_round(rand_vars, round_to_nearest, num_decimal_places, min_val=min_val).tolist()
     else:
         # no need to discretise
         pass
@@ -1354,45 +1491,15 @@ def gen_normal_dist(loc,
         list: random variable values generated by sampling from the distribution.
 
     '''
-    rand_vars = np.random.normal(loc=loc, scale=scale, size=size)
-
-    # check min and max vals 
-    min_rand_var, max_rand_var = min(rand_vars), max(rand_vars)
-    counter = 0
-    if min_val is None and max_val is None:
-        # don't need to worry about any min or max allowed values
-        pass
-    elif min_val is not None and max_val is None:
-        # ensure greater than min_val
-        while min(rand_vars) < min_val:
-            min_idx = np.argmin(np.array(rand_vars))
-            rand_vars[min_idx] = np.random.normal(loc=loc, scale=scale, size=1)
-            counter += 1
-            if counter > 10000:
-                sys.exit('Dist to broad for required min-max range. Increase min-max range or reduce dist broadness.')
-    elif min_val is None and max_val is not None:
-        # ensure less than max val
-        while max(rand_vars) > max_val:
-            max_idx = np.argmax(np.array(rand_vars))
-            rand_vars[max_idx] = np.random.normal(loc=loc, scale=scale, size=1)
-            counter += 1
-            if counter > 10000:
-                sys.exit('Dist to broad for required min-max range. Increase min-max range or reduce dist broadness.')
-    elif min_val is not None and max_val is not None:
-        # ensure less than max val and greater than min val
-        while min(rand_vars) < min_val or max(rand_vars) > max_val:
-            if min(rand_vars) < min_val:
-                min_idx = np.argmin(np.array(rand_vars))
-                rand_vars[min_idx] = np.random.normal(loc=loc, scale=scale, size=1)
-            if max(rand_vars) > max_val:
-                max_idx = np.argmax(np.array(rand_vars))
-                rand_vars[max_idx] = np.random.normal(loc=loc, scale=scale, size=1)
-            counter += 1
-            if counter > 10000:
-                sys.exit('Dist to broad for required min-max range. Increase min-max range or reduce dist broadness.')
+    # sample from distribution truncated to min and max vals
+    rand_vars = gen_truncated_rand_vars(sampler=lambda _size: np.random.normal(loc=loc, scale=scale, size=_size),
+                                        size=size,
+                                        min_val=min_val,
+                                        max_val=max_val,
+                                        dist=stats.norm(loc=loc, scale=scale))
 
     if round_to_nearest is not None:
-        rand_vars = [x_round(val, round_to_nearest, num_decimal_places, min_val=min_val) for val in rand_vars]
+        rand_vars = x_round(rand_vars, round_to_nearest, num_decimal_places, min_val=min_val).tolist()
     else:
         # no need to discretise
         pass
@@ -1450,45 +1557,15 @@ def gen_pareto_dist(_alpha,
         list: random variable values generated by sampling from the distribution.
 
     '''
-    rand_vars = stats.pareto.rvs(b=_alpha, loc=0, scale=_mode, size=size)
-
-    # check min and max vals 
-    min_rand_var, max_rand_var = min(rand_vars), max(rand_vars)
-    counter = 0
-    if min_val is None and max_val is None:
-        # don't need to worry about any min or max allowed values
-        pass
-    elif min_val is not None and max_val is None:
-        # ensure greater than min_val
-        while min(rand_vars) < min_val:
-            min_idx = np.argmin(np.array(rand_vars))
-            rand_vars[min_idx] = stats.pareto.rvs(b=_alpha, loc=0, scale=_mode, size=1)
-            counter += 1
-            if counter > 10000:
-                sys.exit('Dist to broad for required min-max range. Increase min-max range or reduce dist broadness.')
-    elif min_val is None and max_val is not None:
-        # ensure less than max val
-        while max(rand_vars) > max_val:
-            max_idx = np.argmax(np.array(rand_vars))
-            rand_vars[max_idx] = stats.pareto.rvs(b=_alpha, loc=0, scale=_mode, size=1)
-            counter += 1
-            if counter > 10000:
-                sys.exit('Dist to broad for required min-max range. Increase min-max range or reduce dist broadness.')
-    elif min_val is not None and max_val is not None:
-        # ensure less than max val and greater than min val
-        while min(rand_vars) < min_val or max(rand_vars) > max_val:
-            if min(rand_vars) < min_val:
-                min_idx = np.argmin(np.array(rand_vars))
-                rand_vars[min_idx] = stats.pareto.rvs(b=_alpha, loc=0, scale=_mode, size=1)
-            if max(rand_vars) > max_val:
-                max_idx = np.argmax(np.array(rand_vars))
-                rand_vars[max_idx] = stats.pareto.rvs(b=_alpha, loc=0, scale=_mode, size=1)
-            counter += 1
-            if counter > 10000:
-                sys.exit('Dist to broad for required min-max range. Increase min-max range or reduce dist broadness.')
+    # sample from distribution truncated to min and max vals
+    rand_vars = gen_truncated_rand_vars(sampler=lambda _size: stats.pareto.rvs(b=_alpha, loc=0, scale=_mode, size=_size),
+                                        size=size,
+                                        min_val=min_val,
+                                        max_val=max_val,
+                                        dist=stats.pareto(b=_alpha, loc=0, scale=_mode))
 
     if round_to_nearest is not None:
-        rand_vars = [x_round(val, round_to_nearest, num_decimal_places, min_val=min_val) for val in rand_vars]
+        rand_vars = x_round(rand_vars, round_to_nearest, num_decimal_places, min_val=min_val).tolist()
     else:
         # no need to discretise
         pass
@@ -1560,45 +1637,15 @@ def gen_weibull_dist(_alpha,
         list: random variable values generated by sampling from the distribution.
 
     '''
-    rand_vars = (np.random.weibull(_alpha, size=size)) * _lambda
-
-    # check min and max vals 
-    min_rand_var, max_rand_var = min(rand_vars), max(rand_vars)
-    counter = 0
-    if min_val is None and max_val is None:
-        # don't need to worry about any min or max allowed values
-        pass
-    elif min_val is not None and max_val is None:
-        # ensure greater than min_val
-        while min(rand_vars) < min_val:
-            min_idx = np.argmin(np.array(rand_vars))
-            rand_vars[min_idx] = (np.random.weibull(_alpha, size=1)) * _lambda
-            counter += 1
-            if counter > 10000:
-                sys.exit('Dist to broad for required min-max range. Increase min-max range or reduce dist broadness.')
-    elif min_val is None and max_val is not None:
-        # ensure less than max val
-        while max(rand_vars) > max_val:
-            max_idx = np.argmax(np.array(rand_vars))
-            rand_vars[max_idx] = (np.random.weibull(_alpha, size=1)) * _lambda
-            counter += 1
-            if counter > 10000:
-                sys.exit('Dist to broad for required min-max range. Increase min-max range or reduce dist broadness.')
-    elif min_val is not None and max_val is not None:
-        # ensure less than max val and greater than min val
-        while min(rand_vars) < min_val or max(rand_vars) > max_val:
-            if min(rand_vars) < min_val:
-                min_idx = np.argmin(np.array(rand_vars))
-                rand_vars[min_idx] = (np.random.weibull(_alpha, size=1)) * _lambda
-            if max(rand_vars) > max_val:
-                max_idx = np.argmax(np.array(rand_vars))
-                rand_vars[max_idx] = (np.random.weibull(_alpha, size=1)) * _lambda
-            counter += 1
-            if counter > 10000:
-                sys.exit('Dist to broad for required min-max range. Increase min-max range or reduce dist broadness.')
+    # sample from distribution truncated to min and max vals
+    rand_vars = gen_truncated_rand_vars(sampler=lambda _size: np.random.weibull(_alpha, size=_size) * _lambda,
+                                        size=size,
+                                        min_val=min_val,
+                                        max_val=max_val,
+                                        dist=stats.weibull_min(c=_alpha, scale=_lambda))
 
     if round_to_nearest is not None:
-        rand_vars = [x_round(val, round_to_nearest, num_decimal_places, min_val=min_val) for val in rand_vars]
+        rand_vars = x_round(rand_vars, round_to_nearest, num_decimal_places, min_val=min_val).tolist()
     else:
         # no need to discretise
         pass
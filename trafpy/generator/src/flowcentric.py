@@ -6,13 +6,8 @@ import numpy as np
 import time
 from collections import defaultdict # use for initialising arbitrary length nested dict
 import json
-import copy
 import random
 import math
-import multiprocessing
-from tqdm import tqdm # progress bar
-from tqdm import trange
-from tqdm.contrib.concurrent import process_map
 import warnings
 import matplotlib
 import matplotlib.pyplot as plt
@@ -31,7 +26,7 @@ from typing import Union
 
 
 
-class FlowGenerator:
+class FlowGenerator(tools.EventTimesMixin):
     def __init__(self,
                  eps,
                  node_dist,
@@ -112,6 +107,7 @@ class FlowGenerator:
             self.flow_packer_kwargs = flow_packer_kwargs
 
         self.num_nodes, self.num_pairs, self.node_to_index, self.index_to_node = tools.get_network_params(self.eps)
+        self._event_times_cache = None # (interarrival_times, event_times) of most recent event times generated
 
         if self.network_load_config['target_load_fraction'] is not None:
             if self.network_load_config['target_load_fraction'] > 0.95:
@@ -120,7 +116,17 @@ class FlowGenerator:
         if not self.check_dont_exceed_one_ep_load:
             print('WARNING: check_dont_exceed_one_ep_load is set to False. This may result in end point loads going above 1.0, which for some users might be detrimental to the systems they want to test.')
 
-    def create_flow_centric_demand_data(self, return_packing_time=False, return_packing_jensen_shannon_distance=False,):
+    def create_flow_centric_demand_data(self, return_packing_time=False, return_packing_jensen_shannon_distance=False, chunk_size=None):
+        '''
+        If chunk_size is not None, rather than returning a demand data dict, will
+        return a DemandDataChunks stream which yields the demand data in
+        arrival-ordered chunks of chunk_size flows. Any duplication needed to meet
+        min_last_demand_arrival_time is then done lazily chunk by chunk, so
+        memory usage does not grow with the number of duplications. N.B. The
+        base (un-duplicated) demand data is still generated and packed in memory
+        in one go (packing needs all flows to meet the target node distribution),
+        so chunking does not reduce peak memory when no duplication is needed.
+        '''
         # flow sizes
         flow_sizes = val_dists.gen_rand_vars_from_discretised_dist(unique_vars=list(self.flow_size_dist.keys()),
                                                                    probabilities=list(self.flow_size_dist.values()),
@@ -167,7 +173,7 @@ class FlowGenerator:
 
 
         # corresponding flow event (arrival) times
-        event_times = tools.gen_event_times(interarrival_times)
+        event_times = self._gen_event_times(interarrival_times)
         index, event_times_sorted = np.argsort(event_times), np.sort(event_times)
 
         # flow ids
@@ -219,10 +225,15 @@ class FlowGenerator:
                     print('WARING: max_num_demands is {} but have specified min_last_demand_arrival_time {}. Would need {} demands to reach this min_last_demand_arrival_time, therefore must increase max_num_demands (or set to None) if you want to meet this min_last_demand_arrival_time.'.format(self.max_num_demands, self.min_last_demand_arrival_time, (2**num_duplications)*len(demand_data['flow_id'])))
                     return demand_data
             if num_duplications > 0:
-                # duplicate
-                demand_data = duplicate_demands_in_demand_data_dict(demand_data, 
-                                                                    num_duplications=num_duplications,
-                                                                    use_multiprocessing=False)
+                if chunk_size is not None:
+                    # duplicate lazily when streaming chunks
+                    demand_data = DemandDataChunks(demand_data, num_duplications=num_duplications, chunk_size=chunk_size)
+                else:
+                    # duplicate
+                    demand_data = duplicate_demands_in_demand_data_dict(demand_data, 
+                                                                        num_duplications=num_duplications)
+        if chunk_size is not None and not isinstance(demand_data, DemandDataChunks):
+            demand_data = DemandDataChunks(demand_data, num_duplications=0, chunk_size=chunk_size)
         if not return_packing_time and not return_packing_jensen_shannon_distance:
             returns = demand_data
         else:
@@ -243,10 +254,6 @@ class FlowGenerator:
     def _calc_total_info_arrived(self, flow_sizes):
         return np.sum(flow_sizes)
 
-    def _get_first_last_flow_arrival_times(self, interarrival_times):
-        event_times = tools.gen_event_times(interarrival_times)
-        return min(event_times), max(event_times)
-
     def _change_interarrival_times_by_factor(self, interarrival_times, factor):
         '''Updates self.interarrival_time_dist by a specified factor and returns new interarrival times.'''
         new_interarrival_time_dist = {}
@@ -466,291 +473,6 @@ def get_first_last_flow_arrival_times(demand_data):
 
 
 
-def duplicate_demands_in_demand_data_dict(demand_data, num_duplications=1, **kwargs):
-    '''Duplicates set of demands by the specified number of times.'''
-    demand_data = copy.deepcopy(demand_data)
-
-    if 'use_multiprocessing' not in kwargs:
-        kwargs['use_multiprocessing'] = False
-    if 'num_processes' not in kwargs:
-        # increase to decrease processing time, decrease to decrease risk of memory errors
-        kwargs['num_processes'] = 10 # num processes to run in parallel if multiprocessing
-    if 'maxtasksperchild' not in kwargs:
-        kwargs['maxtasksperchild'] = 1 # num tasks per process
-    
-    if 'job_id' in demand_data:
-        job_centric = True
-    else:
-        job_centric = False
-
-    # ensure values of dict are lists
-    for key, value in demand_data.items():
-        demand_data[key] = list(value)
-
-    init_num_demands = len(demand_data['event_time'])
-    demands_to_add = ((2**num_duplications)*init_num_demands) - init_num_demands
-
-    # progress bar
-    if not kwargs['use_multiprocessing']:
-        # TODO: Get progress bar working for multiprocessing
-        pbar = tqdm(total=demands_to_add, 
-                desc='Duplicating demands',
-                    miniters=1, 
-                    # mininterval=1,
-                    # maxinterval=1, # 2
-                    leave=False,
-                    smoothing=1e-5) # 1
-    # pbar = tqdm(total=demands_to_add, 
-            # desc='Duplicating demands',
-            # miniters=1)
-                # # mininterval=1,
-                # # maxinterval=1, # 2
-                # # leave=False,
-                # # smoothing=1e-5) # 1
-
-    start = time.time()
-    for dup in range(num_duplications):
-
-        # get curr num demands
-        num_demands = len(demand_data['event_time'])
-
-        # get curr duration
-        duration = max(demand_data['event_time']) - min(demand_data['event_time']) 
-
-        # duplicate demands
-        if kwargs['use_multiprocessing']:
-            # duplicate demands in parallel
-            print('Duplication {} of {}...'.format(dup+1, num_duplications))
-            s = time.time()
-
-            # init shared lists for appending duplicated demands to
-            jobs = multiprocessing.Manager().list()
-            job_ids = multiprocessing.Manager().list()
-            # unique_ids = multiprocessing.Manager().list()
-            flow_ids = multiprocessing.Manager().list()
-            sns = multiprocessing.Manager().list()
-            dns = multiprocessing.Manager().list()
-            flow_sizes = multiprocessing.Manager().list()
-            event_times = multiprocessing.Manager().list()
-            establishes = multiprocessing.Manager().list()
-            indexes = multiprocessing.Manager().list()
-
-            # for idx in trange(num_demands): 
-                # results = process_map(duplicate_demand,
-                                            # [demand_data['job'][idx], 
-                                            # demand_data['sn'][idx],
-                                            # demand_data['dn'][idx],
-                                            # demand_data['flow_size'][idx],
-                                            # demand_data['event_time'][idx],
-                                            # duration,
-                                            # demand_data['establish'][idx],
-                                            # demand_data['index'][idx],
-                                            # num_demands,
-                                            # idx, 
-                                            # jobs, 
-                                            # job_ids,
-                                            # unique_ids,
-                                            # flow_ids,
-                                            # sns,
-                                            # dns,
-                                            # flow_sizes,
-                                            # event_times,
-                                            # establishes,
-                                            # indexes,
-                                            # job_centric])
-            # duplicate demands in parallel
-            pool = multiprocessing.Pool(kwargs['num_processes'], maxtasksperchild=kwargs['maxtasksperchild'])
-            results = [pool.apply_async(duplicate_demand,
-                                        args=(
-                                        demand_data['job'][idx], 
-                                        demand_data['sn'][idx],
-                                        demand_data['dn'][idx],
-                                        demand_data['flow_size'][idx],
-                                        demand_data['event_time'][idx],
-                                        duration,
-                                        demand_data['establish'][idx],
-                                        demand_data['index'][idx],
-                                        num_demands,
-                                        idx, 
-                                        jobs, 
-                                        job_ids,
-                                        # unique_ids,
-                                        flow_ids,
-                                        sns,
-                                        dns,
-                                        flow_sizes,
-                                        event_times,
-                                        establishes,
-                                        indexes,
-                                        job_centric))
-                                       # callback=lambda _: pbar.update(1))
-                                        for idx in range(num_demands)]
-            pool.close()
-            pool.join()
-            del pool
-
-            # collect duplicated demands from multiprocessing and add to demand_data
-            if job_centric:
-                demand_data['job_id'].extend(list(job_ids))
-                demand_data['job'].extend(list(jobs))
-            demand_data['flow_id'].extend(list(flow_ids))
-            demand_data['sn'].extend(list(sns))
-            demand_data['dn'].extend(list(dns))
-            demand_data['flow_size'].extend(list(flow_sizes))
-            demand_data['event_time'].extend(list(event_times))
-            demand_data['establish'].extend(list(establishes))
-            demand_data['index'].extend(list(indexes))
-
-            e = time.time()
-            print('Duplication completed in {} s.'.format(e-s))
-
-        else:
-            # not multiprocessing -> duplicate demands sequentially
-            # no need to init separate lists since can append directly
-            if job_centric:
-                jobs = demand_data['job']
-                job_ids = demand_data['job_id']
-            else:
-                jobs = None
-                job_ids = None
-            # unique_ids = []
-            flow_ids = demand_data['flow_id']
-            sns = demand_data['sn']
-            dns = demand_data['dn']
-            flow_sizes = demand_data['flow_size']
-            event_times = demand_data['event_time']
-            establishes = demand_data['establish']
-            indexes = demand_data['index']
-            if job_centric:
-                demand = demand_data['job'][idx]
-            else:
-                demand = None # don't need
-            for idx in range(num_demands):
-                duplicate_demand(demand, 
-                                 demand_data['sn'][idx],
-                                 demand_data['dn'][idx],
-                                 demand_data['flow_size'][idx],
-                                 demand_data['event_time'][idx],
-                                 duration,
-                                 demand_data['establish'][idx],
-                                 demand_data['index'][idx],
-                                 num_demands,
-                                 idx, 
-                                 jobs, 
-                                 job_ids,
-                                 # unique_ids,
-                                 flow_ids,
-                                 sns,
-                                 dns,
-                                 flow_sizes,
-                                 event_times,
-                                 establishes,
-                                 indexes,
-                                 job_centric)
-
-                # # collect duplicated demands and add to demand_data
-                # if job_centric:
-                    # demand_data['job_id'].extend(list(job_ids))
-                    # demand_data['job'].extend(list(jobs))
-                # demand_data['flow_id'].extend(list(flow_ids))
-                # demand_data['sn'].extend(list(sns))
-                # demand_data['dn'].extend(list(dns))
-                # demand_data['flow_size'].extend(list(flow_sizes))
-                # demand_data['event_time'].extend(list(event_times))
-                # demand_data['establish'].extend(list(establishes))
-                # demand_data['index'].extend(list(indexes))
-
-                pbar.update(1)
-
-    # make sure demand data still ordered in order of event time
-    index = np.argsort(demand_data['event_time'])
-    for key in demand_data.keys():
-        if len(demand_data[key]) == len(index):
-            # only index keys which are events (i.e. for job-centric, these are job keys, not flow keys)
-            demand_data[key] = [demand_data[key][i] for i in index]
-
-    if not kwargs['use_multiprocessing']:
-        pbar.close()
-    end = time.time()
-    print('Duplicated from {} to {} total demands ({} duplication(s)) in {} s.'.format(init_num_demands, len(demand_data['event_time']), num_duplications, end-start))
-
-    return demand_data 
-
-
-
-
-def duplicate_demand(job, 
-                     sn,
-                     dn,
-                     flow_size,
-                     event_time,
-                     duration,
-                     establish,
-                     index,
-                     num_demands, 
-                     idx, 
-                     jobs,
-                     job_ids,
-                     # unique_ids,
-                     flow_ids,
-                     sns,
-                     dns,
-                     flow_sizes,
-                     event_times,
-                     establishes,
-                     indexes,
-                     job_centric=True):
-
-    if job_centric:
-        # job id
-        job_id = int(idx + num_demands)
-        job.graph['job_id'] = 'job_{}'.format(job_id)
-
-        # attrs inside job
-        # job = copy.deepcopy(demand_data['job'])[idx]
-        flow_stats = {flow: job.get_edge_data(flow[0], flow[1]) for flow in job.edges} 
-        for flow in flow_stats:
-            # grab attr_dict for flow
-            attr_dict = flow_stats[flow]['attr_dict']
-
-            # update ids
-            attr_dict['job_id'] = 'job_{}'.format(idx+num_demands)
-            attr_dict['unique_id'] = attr_dict['job_id'] + '_' + attr_dict['flow_id']
-
-            # flow src, dst, and size
-            # if data dependency, is a flow
-            if attr_dict['dependency_type'] == 'data_dep':
-                flow_ids.append(attr_dict['unique_id'])
-                sns.append(attr_dict['sn'])
-                dns.append(attr_dict['dn'])
-                flow_sizes.append(attr_dict['flow_size'])
-
-            # confirm updates
-            edge = attr_dict['edge']
-            job.add_edge(edge[0], edge[1], attr_dict=attr_dict)
-
-        jobs.append(job)
-        job_ids.append('job_{}'.format(job_id))
-
-
-    else:
-        flow_ids.append('flow_{}'.format(int(idx+num_demands)))
-        flow_sizes.append(flow_size)
-        sns.append(sn)
-        dns.append(dn)
-
-    event_times.append(duration + event_time)
-    establishes.append(establish)
-    indexes.append(index + num_demands)
-
-    # time.sleep(0.1)
-
-
-
-
-
-
-
 def gen_network_skewness_heat_maps(network, 
                                    num_skewed_nodes=[], 
                                    loads=[], 
@@ -976,7 +698,9 @@ def get_flow_centric_demand_data_overall_load_rate(demand_data):
 def group_demand_data_into_ep_info(demand_data, eps):
     nested_dict = lambda: defaultdict(nested_dict)
     ep_info = nested_dict()
-    added_flow = {flow_id: False for flow_id in demand_data['flow_id']}
+    # read each column once (columns of ColumnarDemandData are decoded on access)
+    flow_ids, sns, dns, flow_sizes = demand_data['flow_id'], demand_data['sn'], demand_data['dn'], demand_data['flow_size']
+    added_flow = {flow_id: False for flow_id in flow_ids}
     for ep in eps:
         ep_info[ep]['flow_size'] = []
         # ep_info[ep]['event_time'] = []
@@ -987,25 +711,25 @@ def group_demand_data_into_ep_info(demand_data, eps):
         ep_info[ep]['sn'] = []
         ep_info[ep]['dn'] = []
     # group demand data by ep
-    for idx in range(len(demand_data['flow_id'])):
-        if not added_flow[demand_data['flow_id'][idx]]: 
+    for idx in range(len(flow_ids)):
+        if not added_flow[flow_ids[idx]]: 
             # not yet added this flow
-            ep_info[demand_data['sn'][idx]]['flow_size'].append(demand_data['flow_size'][idx])
-            ep_info[demand_data['dn'][idx]]['flow_size'].append(demand_data['flow_size'][idx])
-            # ep_info[demand_data['sn'][idx]]['event_time'].append(demand_data['event_time'][idx])
-            # ep_info[demand_data['dn'][idx]]['event_time'].append(demand_data['event_time'][idx])
-            ep_info[demand_data['sn'][idx]]['demand_data_idx'].append(idx)
-            ep_info[demand_data['dn'][idx]]['demand_data_idx'].append(idx)
-            ep_info[demand_data['sn'][idx]]['flow_id'].append(demand_data['flow_id'][idx])
-            ep_info[demand_data['dn'][idx]]['flow_id'].append(demand_data['flow_id'][idx])
-            # ep_info[demand_data['sn'][idx]]['establish'].append(demand_data['establish'][idx])
-            # ep_info[demand_data['dn'][idx]]['establish'].append(demand_data['establish'][idx])
-            # ep_info[demand_data['sn'][idx]]['index'].append(demand_data['index'][idx])
-            # ep_info[demand_data['dn'][idx]]['index'].append(demand_data['index'][idx])
-            ep_info[demand_data['sn'][idx]]['sn'].append(demand_data['sn'][idx])
-            ep_info[demand_data['sn'][idx]]['dn'].append(demand_data['dn'][idx])
-            ep_info[demand_data['dn'][idx]]['sn'].append(demand_data['sn'][idx])
-            ep_info[demand_data['dn'][idx]]['dn'].append(demand_data['dn'][idx])
+            ep_info[sns[idx]]['flow_size'].append(flow_sizes[idx])
+            ep_info[dns[idx]]['flow_size'].append(flow_sizes[idx])
+            # ep_info[sns[idx]]['event_time'].append(demand_data['event_time'][idx])
+            # ep_info[dns[idx]]['event_time'].append(demand_data['event_time'][idx])
+            ep_info[sns[idx]]['demand_data_idx'].append(idx)
+            ep_info[dns[idx]]['demand_data_idx'].append(idx)
+            ep_info[sns[idx]]['flow_id'].append(flow_ids[idx])
+            ep_info[dns[idx]]['flow_id'].append(flow_ids[idx])
+            # ep_info[sns[idx]]['establish'].append(demand_data['establish'][idx])
+            # ep_info[dns[idx]]['establish'].append(demand_data['establish'][idx])
+            # ep_info[sns[idx]]['index'].append(demand_data['index'][idx])
+            # ep_info[dns[idx]]['index'].append(demand_data['index'][idx])
+            ep_info[sns[idx]]['sn'].append(sns[idx])
+            ep_info[sns[idx]]['dn'].append(dns[idx])
+            ep_info[dns[idx]]['sn'].append(sns[idx])
+            ep_info[dns[idx]]['dn'].append(dns[idx])
         else:
             # already added this flow
             pass
@@ -1014,319 +738,422 @@ def group_demand_data_into_ep_info(demand_data, eps):
 
 
 def get_flow_centric_demand_data_total_info_arrived(demand_data): 
-    info_arrived = 0
-    # print('flow size {} {}'.format(type(demand_data['flow_size']), type(demand_data['flow_size'][0])))
-    # if 'job_id' in demand_data:
-        # # jobcentric
-        # flow_data = demand_data['flow_data']
-    # else:
-        # # flowcentric
-        # flow_data = demand_data
-
-    for flow_size in demand_data['flow_size']:
-        if flow_size > 0:
-            info_arrived += flow_size
-        else:
-            pass
+    flow_sizes = np.asarray(demand_data['flow_size'])
+    info_arrived = np.sum(flow_sizes[flow_sizes > 0])
     
     return info_arrived
             
 def get_first_last_flow_arrival_times(demand_data):
-    arrival_times = []
-    for idx in range(len(demand_data['event_time'])):
-        if demand_data['flow_size'][idx] > 0 and demand_data['sn'][idx] != demand_data['dn'][idx]:
-            arrival_times.append(demand_data['event_time'][idx])
-        else:
-            pass
+    event_times = np.asarray(demand_data['event_time'])
+    # N.B. job-centric demand data has more flows than event times, only first len(event_times) flows considered
+    num_events = len(event_times)
+    flow_sizes, sns, dns = np.asarray(demand_data['flow_size'])[:num_events], np.asarray(demand_data['sn'])[:num_events], np.asarray(demand_data['dn'])[:num_events]
+    arrival_times = event_times[(flow_sizes > 0) & (sns != dns)]
     if len(arrival_times) == 0:
         raise Exception('Could not find first event establish request with size > 0.. This occurs because either demand_data given does not contain any events, or because all events have had to be dropped to try get below your specified target load. Try increasing the target load or increasing the granularity of load per demand (by e.g. decreasing demand sizes, increasing total number of demands, etc.) when you generate your demand data so that this function can more easily hit your desired load target.')
 
-    time_first_flow_arrived = min(arrival_times)
-    time_last_flow_arrived = max(arrival_times)
+    time_first_flow_arrived = np.min(arrival_times)
+    time_last_flow_arrived = np.max(arrival_times)
     
     return time_first_flow_arrived, time_last_flow_arrived
 
 
+def get_demand_data_time_window(demand_data, time_range, eps=None):
+    '''Returns flow-centric demand data of flows arriving at time_range[0] <= event_time < time_range[1].
+
+    ColumnarDemandData (e.g. loaded memory mapped from a .demand file) is returned
+    as a zero-copy ColumnarDemandData view, and a demand data dict is returned as
+    a demand data dict (with numpy array values).
+    '''
+    if 'job_id' in demand_data:
+        raise Exception('time_range only supported for flow-centric demand data.')
+    if isinstance(demand_data, ColumnarDemandData):
+        return demand_data.get_time_window(*time_range)
+    else:
+        return ColumnarDemandData.from_demand_data(demand_data, eps=eps).get_time_window(*time_range).to_demand_data()
+
+
 
 def duplicate_demands_in_demand_data_dict(demand_data, num_duplications=1, **kwargs):
-    '''Duplicates set of demands by the specified number of times.'''
-    demand_data = copy.deepcopy(demand_data)
-
-    if 'use_multiprocessing' not in kwargs:
-        kwargs['use_multiprocessing'] = False
-    if 'num_processes' not in kwargs:
-        # increase to decrease processing time, decrease to decrease risk of memory errors
-        kwargs['num_processes'] = 10 # num processes to run in parallel if multiprocessing
-    if 'maxtasksperchild' not in kwargs:
-        kwargs['maxtasksperchild'] = 1 # num tasks per process
-    
+    '''Duplicates set of demands by the specified number of times.
+
+    Each duplication doubles the demands by appending a copy of the current
+    demands shifted in time by their duration, so the demands are copied
+    2**num_duplications times in total with copy k shifted by k * duration and
+    given new ids (and index) offset by k * number of original demands. All
+    copies are made at once with numpy rather than one demand at a time. For
+    job-centric demand data, duplicated jobs reuse the original job graphs by
+    reference (see jobcentric.gen_job_event_dict()) rather than copying them.
+
+    N.B. kwargs (e.g. use_multiprocessing, num_processes, maxtasksperchild) are
+    accepted for backwards compatibility but are ignored (a warning is raised
+    if any are given).
+
+    Returns demand data with numpy array values (a list for 'job').
+    '''
+    if len(kwargs) > 0:
+        warnings.warn('duplicate_demands_in_demand_data_dict() no longer uses kwargs {}, ignoring them.'.format(list(kwargs.keys())))
+    start = time.time()
+
+    if isinstance(demand_data, ColumnarDemandData):
+        duplicated_demand_data = demand_data.duplicate(num_duplications)
+        print('Duplicated from {} to {} total demands ({} duplication(s)) in {} s.'.format(len(demand_data), len(duplicated_demand_data), num_duplications, time.time()-start))
+        return duplicated_demand_data
+
     if 'job_id' in demand_data:
         job_centric = True
+        id_key = 'job_id'
     else:
         job_centric = False
-
-    # ensure values of dict are lists
-    for key, value in demand_data.items():
-        demand_data[key] = list(value)
+        id_key = 'flow_id'
 
     init_num_demands = len(demand_data['event_time'])
-    demands_to_add = ((2**num_duplications)*init_num_demands) - init_num_demands
-
-    # progress bar
-    if not kwargs['use_multiprocessing']:
-        # TODO: Get progress bar working for multiprocessing
-        pbar = tqdm(total=demands_to_add, 
-                desc='Duplicating demands',
-                    miniters=1, 
-                    # mininterval=1,
-                    # maxinterval=1, # 2
-                    leave=False,
-                    smoothing=1e-5) # 1
-    # pbar = tqdm(total=demands_to_add, 
-            # desc='Duplicating demands',
-            # miniters=1)
-                # # mininterval=1,
-                # # maxinterval=1, # 2
-                # # leave=False,
-                # # smoothing=1e-5) # 1
+    num_copies = 2**num_duplications
+    copy_idxs = np.repeat(np.arange(num_copies), init_num_demands)
 
-    start = time.time()
-    for dup in range(num_duplications):
-
-        # get curr num demands
-        num_demands = len(demand_data['event_time'])
-
-        # get curr duration
-        duration = max(demand_data['event_time']) - min(demand_data['event_time']) 
-
-        # duplicate demands
-        if kwargs['use_multiprocessing']:
-            # duplicate demands in parallel
-            print('Duplication {} of {}...'.format(dup+1, num_duplications))
-            s = time.time()
-
-            # init shared lists for appending duplicated demands to
-            jobs = multiprocessing.Manager().list()
-            job_ids = multiprocessing.Manager().list()
-            # unique_ids = multiprocessing.Manager().list()
-            flow_ids = multiprocessing.Manager().list()
-            sns = multiprocessing.Manager().list()
-            dns = multiprocessing.Manager().list()
-            flow_sizes = multiprocessing.Manager().list()
-            event_times = multiprocessing.Manager().list()
-            establishes = multiprocessing.Manager().list()
-            indexes = multiprocessing.Manager().list()
-
-            # for idx in trange(num_demands): 
-                # results = process_map(duplicate_demand,
-                                            # [demand_data['job'][idx], 
-                                            # demand_data['sn'][idx],
-                                            # demand_data['dn'][idx],
-                                            # demand_data['flow_size'][idx],
-                                            # demand_data['event_time'][idx],
-                                            # duration,
-                                            # demand_data['establish'][idx],
-                                            # demand_data['index'][idx],
-                                            # num_demands,
-                                            # idx, 
-                                            # jobs, 
-                                            # job_ids,
-                                            # unique_ids,
-                                            # flow_ids,
-                                            # sns,
-                                            # dns,
-                                            # flow_sizes,
-                                            # event_times,
-                                            # establishes,
-                                            # indexes,
-                                            # job_centric])
-            # duplicate demands in parallel
-            pool = multiprocessing.Pool(kwargs['num_processes'], maxtasksperchild=kwargs['maxtasksperchild'])
-            results = [pool.apply_async(duplicate_demand,
-                                        args=(
-                                        demand_data['job'][idx], 
-                                        demand_data['sn'][idx],
-                                        demand_data['dn'][idx],
-                                        demand_data['flow_size'][idx],
-                                        demand_data['event_time'][idx],
-                                        duration,
-                                        demand_data['establish'][idx],
-                                        demand_data['index'][idx],
-                                        num_demands,
-                                        idx, 
-                                        jobs, 
-                                        job_ids,
-                                        # unique_ids,
-                                        flow_ids,
-                                        sns,
-                                        dns,
-                                        flow_sizes,
-                                        event_times,
-                                        establishes,
-                                        indexes,
-                                        job_centric))
-                                       # callback=lambda _: pbar.update(1))
-                                        for idx in range(num_demands)]
-            pool.close()
-            pool.join()
-            del pool
-
-            # collect duplicated demands from multiprocessing and add to demand_data
-            if job_centric:
-                demand_data['job_id'].extend(list(job_ids))
-                demand_data['job'].extend(list(jobs))
-            demand_data['flow_id'].extend(list(flow_ids))
-            demand_data['sn'].extend(list(sns))
-            demand_data['dn'].extend(list(dns))
-            demand_data['flow_size'].extend(list(flow_sizes))
-            demand_data['event_time'].extend(list(event_times))
-            demand_data['establish'].extend(list(establishes))
-            demand_data['index'].extend(list(indexes))
-
-            e = time.time()
-            print('Duplication completed in {} s.'.format(e-s))
+    # keys indexed by demand (job-centric flow keys are instead generated from the jobs' data deps)
+    if job_centric:
+        event_keys = [key for key in demand_data.keys() if len(demand_data[key]) == init_num_demands and key not in ['flow_id', 'sn', 'dn', 'flow_size']]
+    else:
+        event_keys = [key for key in demand_data.keys() if len(demand_data[key]) == init_num_demands]
 
+    duplicated_demand_data = {}
+    for key in demand_data.keys():
+        if key == 'job':
+            # reuse job graphs by reference
+            duplicated_demand_data[key] = list(demand_data[key]) * num_copies
+        elif key in event_keys:
+            duplicated_demand_data[key] = np.tile(np.asarray(demand_data[key]), num_copies)
         else:
-            # not multiprocessing -> duplicate demands sequentially
-            # no need to init separate lists since can append directly
-            if job_centric:
-                jobs = demand_data['job']
-                job_ids = demand_data['job_id']
-            else:
-                jobs = None
-                job_ids = None
-            # unique_ids = []
-            flow_ids = demand_data['flow_id']
-            sns = demand_data['sn']
-            dns = demand_data['dn']
-            flow_sizes = demand_data['flow_size']
-            event_times = demand_data['event_time']
-            establishes = demand_data['establish']
-            indexes = demand_data['index']
-            if job_centric:
-                demand = demand_data['job'][idx]
-            else:
-                demand = None # don't need
-            for idx in range(num_demands):
-                duplicate_demand(demand, 
-                                 demand_data['sn'][idx],
-                                 demand_data['dn'][idx],
-                                 demand_data['flow_size'][idx],
-                                 demand_data['event_time'][idx],
-                                 duration,
-                                 demand_data['establish'][idx],
-                                 demand_data['index'][idx],
-                                 num_demands,
-                                 idx, 
-                                 jobs, 
-                                 job_ids,
-                                 # unique_ids,
-                                 flow_ids,
-                                 sns,
-                                 dns,
-                                 flow_sizes,
-                                 event_times,
-                                 establishes,
-                                 indexes,
-                                 job_centric)
-
-                # # collect duplicated demands and add to demand_data
-                # if job_centric:
-                    # demand_data['job_id'].extend(list(job_ids))
-                    # demand_data['job'].extend(list(jobs))
-                # demand_data['flow_id'].extend(list(flow_ids))
-                # demand_data['sn'].extend(list(sns))
-                # demand_data['dn'].extend(list(dns))
-                # demand_data['flow_size'].extend(list(flow_sizes))
-                # demand_data['event_time'].extend(list(event_times))
-                # demand_data['establish'].extend(list(establishes))
-                # demand_data['index'].extend(list(indexes))
-
-                pbar.update(1)
+            duplicated_demand_data[key] = np.asarray(demand_data[key])
+
+    # shift copies in time and offset their ids and index
+    event_times = np.asarray(demand_data['event_time'])
+    duration = np.max(event_times) - np.min(event_times)
+    duplicated_demand_data['event_time'] = duplicated_demand_data['event_time'] + (copy_idxs * duration)
+    if 'index' in duplicated_demand_data:
+        duplicated_demand_data['index'] = duplicated_demand_data['index'] + (copy_idxs * init_num_demands)
+    ids = duplicated_demand_data[id_key].astype(object)
+    ids[init_num_demands:] = ['{}_{}'.format(id_key[:-3], i) for i in range(init_num_demands, num_copies*init_num_demands)]
+    duplicated_demand_data[id_key] = ids
+
+    if job_centric:
+        # add data dep flows of each duplicated job
+        job_flow_idxs, flow_ids, sns, dns, flow_sizes = [], [], [], [], []
+        for job_idx, job in enumerate(demand_data['job']):
+            for flow in job.edges:
+                attr_dict = job.get_edge_data(flow[0], flow[1])['attr_dict']
+                if attr_dict['dependency_type'] == 'data_dep':
+                    job_flow_idxs.append(job_idx)
+                    flow_ids.append('_' + attr_dict['flow_id'])
+                    sns.append(attr_dict['sn'])
+                    dns.append(attr_dict['dn'])
+                    flow_sizes.append(attr_dict['flow_size'])
+        job_flow_idxs = np.asarray(job_flow_idxs, dtype=int)
+        num_flows = len(job_flow_idxs)
+        flow_job_idxs = np.tile(job_flow_idxs, num_copies-1) + np.repeat(np.arange(1, num_copies), num_flows) * init_num_demands
+        duplicated_flow_ids = [job_id + flow_id for job_id, flow_id in zip(ids[flow_job_idxs], flow_ids * (num_copies-1))]
+        for key, values in zip(['flow_id', 'sn', 'dn', 'flow_size'], [duplicated_flow_ids, sns * (num_copies-1), dns * (num_copies-1), flow_sizes * (num_copies-1)]):
+            if key in demand_data:
+                duplicated_demand_data[key] = np.concatenate([np.asarray(demand_data[key], dtype=object), np.asarray(values, dtype=object)])
 
     # make sure demand data still ordered in order of event time
-    index = np.argsort(demand_data['event_time'])
-    for key in demand_data.keys():
-        if len(demand_data[key]) == len(index):
-            # only index keys which are events (i.e. for job-centric, these are job keys, not flow keys)
-            demand_data[key] = [demand_data[key][i] for i in index]
+    index = np.argsort(duplicated_demand_data['event_time'], kind='stable')
+    for key in event_keys:
+        if key == 'job':
+            duplicated_demand_data[key] = [duplicated_demand_data[key][i] for i in index]
+        else:
+            duplicated_demand_data[key] = duplicated_demand_data[key][index]
 
-    if not kwargs['use_multiprocessing']:
-        pbar.close()
     end = time.time()
-    print('Duplicated from {} to {} total demands ({} duplication(s)) in {} s.'.format(init_num_demands, len(demand_data['event_time']), num_duplications, end-start))
-
-    return demand_data 
-
-
-
-
-def duplicate_demand(job, 
-                     sn,
-                     dn,
-                     flow_size,
-                     event_time,
-                     duration,
-                     establish,
-                     index,
-                     num_demands, 
-                     idx, 
-                     jobs,
-                     job_ids,
-                     # unique_ids,
-                     flow_ids,
-                     sns,
-                     dns,
-                     flow_sizes,
-                     event_times,
-                     establishes,
-                     indexes,
-                     job_centric=True):
+    print('Duplicated from {} to {} total demands ({} duplication(s)) in {} s.'.format(init_num_demands, len(duplicated_demand_data['event_time']), num_duplications, end-start))
 
-    if job_centric:
-        # job id
-        job_id = int(idx + num_demands)
-        job.graph['job_id'] = 'job_{}'.format(job_id)
+    return duplicated_demand_data
+
+
+
+
+class ColumnarDemandData:
+    '''
+    Flow-centric demand data stored as contiguous numpy columns.
+
+    Rather than lists of 'flow_<id>' string ids and src/dst end point names,
+    flows are stored as int64 flow ids, int32 src/dst indices into node_names,
+    and float64 flow sizes and event times, which uses ~10x less memory per flow.
+    Any other flow ids (i.e. not integers or the flow_0...flow_<n-1> ids of
+    generated demand data) are stored exactly as int64 indices into flow_id_names.
+
+    Indexing with a column key (e.g. demand_data['sn']) returns that column in
+    the original demand data dict form (e.g. end point names), so
+    ColumnarDemandData can be used anywhere a flow-centric demand data dict is
+    read. Decoded 'flow_id', 'sn' and 'dn' columns are cached after their first
+    access. Use to_demand_data() to convert all columns at once, and
+    get_time_window() (or slicing e.g. demand_data[100:200]) to get zero-copy
+    views of subsets of the (time-ordered) flows.
+
+    Args:
+        flow_ids (numpy array): Integer flow ids (flow 'flow_<id>'), or indices
+            into flow_id_names if flow_id_names is given.
+        sns (numpy array): Source end point index (into node_names) of each flow.
+        dns (numpy array): Destination end point index (into node_names) of each flow.
+        flow_sizes (numpy array): Size of each flow.
+        event_times (numpy array): Arrival time of each flow.
+        node_names (list): End point names.
+        establish (numpy array): Whether each flow is an establish (1) or take down
+            (0) request. If None, all flows are establish requests.
+        index (numpy array): Original index of each flow. If None, uses flow
+            position.
+        flow_id_names (list): Flow id of each index in flow_ids. If None,
+            flow_ids are the integer flow ids themselves.
+
+    '''
+    columns = ['flow_id', 'sn', 'dn', 'flow_size', 'event_time', 'establish', 'index']
+
+    def __init__(self, flow_ids, sns, dns, flow_sizes, event_times, node_names, establish=None, index=None, flow_id_names=None):
+        self.flow_ids = np.asarray(flow_ids, dtype=np.int64)
+        if flow_id_names is not None:
+            flow_id_names = np.asarray(flow_id_names, dtype=object)
+        self.flow_id_names = flow_id_names
+        self.sns = np.asarray(sns, dtype=np.int32)
+        self.dns = np.asarray(dns, dtype=np.int32)
+        self.flow_sizes = np.asarray(flow_sizes, dtype=np.float64)
+        self.event_times = np.asarray(event_times, dtype=np.float64)
+        self.node_names = np.asarray(node_names, dtype=object)
+        if establish is None:
+            establish = np.ones(len(self.flow_ids), dtype=np.int8)
+        self.establish = np.asarray(establish, dtype=np.int8)
+        if index is None:
+            index = np.arange(len(self.flow_ids))
+        self.index = np.asarray(index, dtype=np.int64)
+        self._decoded_columns = {}
+
+    @classmethod
+    def from_demand_data(cls, demand_data, eps=None):
+        '''
+        Converts flow-centric demand data dict into ColumnarDemandData. If eps is
+        None, node_names will be the sorted unique src and dst names in demand_data.
+        '''
+        if 'job_id' in demand_data:
+            raise Exception('ColumnarDemandData only supports flow-centric demand data.')
+        if isinstance(demand_data, ColumnarDemandData):
+            return demand_data
+        flow_ids = np.asarray(demand_data['flow_id'])
+        if flow_ids.dtype.kind in 'iu':
+            # already integer ids
+            flow_id_names = None
+        elif flow_ids.tolist() == ['flow_{}'.format(i) for i in range(len(flow_ids))]:
+            # ids of generated (and duplicated) demand data are flow_0...flow_<n-1>
+            flow_ids, flow_id_names = np.arange(len(flow_ids)), None
+        else:
+            # store (exact) ids as indices into their unique names
+            flow_id_names, flow_ids = np.unique(flow_ids.astype(str), return_inverse=True)
+        if eps is None:
+            node_names, idxs = np.unique(np.concatenate([np.asarray(demand_data['sn'], dtype=object), np.asarray(demand_data['dn'], dtype=object)]).astype(str), return_inverse=True)
+            sns, dns = idxs[:len(flow_ids)], idxs[len(flow_ids):]
+        else:
+            node_names = eps
+            node_to_index = {node: idx for idx, node in enumerate(eps)}
+            sns = [node_to_index[sn] for sn in demand_data['sn']]
+            dns = [node_to_index[dn] for dn in demand_data['dn']]
+        return cls(flow_ids=flow_ids,
+                   sns=sns,
+                   dns=dns,
+                   flow_sizes=demand_data['flow_size'],
+                   event_times=demand_data['event_time'],
+                   node_names=node_names,
+                   establish=demand_data['establish'] if 'establish' in demand_data else None,
+                   index=demand_data['index'] if 'index' in demand_data else None,
+                   flow_id_names=flow_id_names)
+
+    def to_demand_data(self):
+        '''Returns flow-centric demand data dict (with numpy array values) of flows.'''
+        return {key: self[key] for key in self.columns}
+
+    def get_time_window(self, start_time, end_time):
+        '''Returns view of flows arriving at start_time <= event_time < end_time (flows must be ordered by event time).'''
+        start, end = np.searchsorted(self.event_times, [start_time, end_time], side='left')
+        return self[start:end]
+
+    def duplicate(self, num_duplications=1):
+        '''Returns flows duplicated as in duplicate_demands_in_demand_data_dict(), with copy k given flow ids and index offset by k * number of flows.'''
+        num_flows, num_copies = len(self), 2**num_duplications
+        copy_idxs = np.repeat(np.arange(num_copies), num_flows)
+        duration = np.max(self.event_times) - np.min(self.event_times)
+        if self.flow_id_names is None:
+            flow_ids, flow_id_names = np.concatenate([self.flow_ids, np.arange(num_flows, num_copies*num_flows, dtype=np.int64)]), None
+        else:
+            # copies get new 'flow_<id>' names appended to existing names
+            flow_ids = np.concatenate([self.flow_ids, np.arange(len(self.flow_id_names), len(self.flow_id_names)+((num_copies-1)*num_flows), dtype=np.int64)])
+            flow_id_names = np.concatenate([self.flow_id_names, np.array(['flow_{}'.format(i) for i in range(num_flows, num_copies*num_flows)], dtype=object)])
+        return ColumnarDemandData(flow_ids=flow_ids,
+                                  sns=np.tile(self.sns, num_copies),
+                                  dns=np.tile(self.dns, num_copies),
+                                  flow_sizes=np.tile(self.flow_sizes, num_copies),
+                                  event_times=np.tile(self.event_times, num_copies) + (copy_idxs * duration),
+                                  node_names=self.node_names,
+                                  establish=np.tile(self.establish, num_copies),
+                                  index=np.tile(self.index, num_copies) + (copy_idxs * num_flows),
+                                  flow_id_names=flow_id_names)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in [self.flow_ids, self.sns, self.dns, self.flow_sizes, self.event_times, self.establish, self.index])
+
+    def __len__(self):
+        return len(self.flow_ids)
+
+    def __contains__(self, key):
+        return key in self.columns
+
+    def keys(self):
+        return list(self.columns)
+
+    def items(self):
+        for key in self.columns:
+            yield key, self[key]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.step not in [None, 1]:
+                raise Exception('ColumnarDemandData only supports contiguous slices, but got step {}'.format(key.step))
+            # basic slicing of numpy arrays returns views rather than copies
+            return ColumnarDemandData(flow_ids=self.flow_ids[key],
+                                      sns=self.sns[key],
+                                      dns=self.dns[key],
+                                      flow_sizes=self.flow_sizes[key],
+                                      event_times=self.event_times[key],
+                                      node_names=self.node_names,
+                                      establish=self.establish[key],
+                                      index=self.index[key],
+                                      flow_id_names=self.flow_id_names)
+        elif key in ['flow_id', 'sn', 'dn']:
+            if key not in self._decoded_columns:
+                if key == 'flow_id':
+                    if self.flow_id_names is None:
+                        self._decoded_columns[key] = np.array(['flow_{}'.format(flow_id) for flow_id in self.flow_ids.tolist()], dtype=object)
+                    else:
+                        self._decoded_columns[key] = self.flow_id_names[self.flow_ids]
+                elif key == 'sn':
+                    self._decoded_columns[key] = self.node_names[self.sns]
+                else:
+                    self._decoded_columns[key] = self.node_names[self.dns]
+            return self._decoded_columns[key]
+        elif key == 'flow_size':
+            return self.flow_sizes
+        elif key == 'event_time':
+            return self.event_times
+        elif key == 'establish':
+            return self.establish
+        elif key == 'index':
+            return self.index
+        else:
+            raise KeyError(key)
 
-        # attrs inside job
-        # job = copy.deepcopy(demand_data['job'])[idx]
-        flow_stats = {flow: job.get_edge_data(flow[0], flow[1]) for flow in job.edges} 
-        for flow in flow_stats:
-            # grab attr_dict for flow
-            attr_dict = flow_stats[flow]['attr_dict']
 
-            # update ids
-            attr_dict['job_id'] = 'job_{}'.format(idx+num_demands)
-            attr_dict['unique_id'] = attr_dict['job_id'] + '_' + attr_dict['flow_id']
 
-            # flow src, dst, & size
-            # if data dependency, is a flow
-            if attr_dict['dependency_type'] == 'data_dep':
-                flow_ids.append(attr_dict['unique_id'])
-                sns.append(attr_dict['sn'])
-                dns.append(attr_dict['dn'])
-                flow_sizes.append(attr_dict['flow_size'])
 
-            # confirm updates
-            edge = attr_dict['edge']
-            job.add_edge(edge[0], edge[1], attr_dict=attr_dict)
+class DemandDataChunks:
+    '''
+    Stream of (duplicated) demand data in arrival-ordered chunks.
 
-        jobs.append(job)
-        job_ids.append('job_{}'.format(job_id))
+    Equivalent to duplicate_demands_in_demand_data_dict(demand_data, num_duplications),
+    but rather than building the whole duplicated demand data in memory, yields
+    it in chunks of chunk_size demands (the last chunk may be smaller), each chunk
+    being a demand data dict with the same keys as demand_data. Only the original
+    demand_data is held in memory, so memory usage does not grow with
+    num_duplications. Iterating over the object again restarts the stream from
+    the first demand.
 
+    N.B. Only the duplicated copies are streamed. demand_data itself must be
+    fully in memory, so peak memory is not reduced for demand data which is
+    large before duplication (e.g. a single long pass with num_duplications=0).
 
-    else:
-        flow_ids.append('flow_{}'.format(int(idx+num_demands)))
-        flow_sizes.append(flow_size)
-        sns.append(sn)
-        dns.append(dn)
+    Pass to construct_demand_slots_dict() to get a slots dict which can be given
+    to the simulator without building all of the time slots in memory.
 
-    event_times.append(duration + event_time)
-    establishes.append(establish)
-    indexes.append(index + num_demands)
+    Args:
+        demand_data (dict): Flow-centric or job-centric demand data (ordered
+            by event time).
+        num_duplications (int): Number of times to double demand_data (copies
+            are shifted in time by the duration of demand_data).
+        chunk_size (int): Number of demands (flows or jobs) per chunk.
 
-    # time.sleep(0.1)
+    '''
+    def __init__(self, demand_data, num_duplications=0, chunk_size=100000):
+        if chunk_size < 1:
+            raise Exception('chunk_size must be >= 1, but is {}'.format(chunk_size))
+        self.demand_data = demand_data
+        self.num_duplications = num_duplications
+        self.chunk_size = int(chunk_size)
+        if 'job_id' in demand_data:
+            self.job_centric = True
+        else:
+            self.job_centric = False
+
+        event_times = np.asarray(demand_data['event_time'])
+        self.num_init_demands = len(event_times)
+        self.num_copies = 2**num_duplications
+        self.num_demands = self.num_init_demands * self.num_copies
+        self.duration = np.max(event_times) - np.min(event_times)
+        self.time_first_demand_arrived = event_times[0]
+        self.time_last_demand_arrived = event_times[-1] + ((self.num_copies - 1) * self.duration)
+
+        # event keys are indexed by demand (job-centric flow keys are instead generated from each chunk's jobs)
+        self.event_keys = [key for key in demand_data.keys() if len(demand_data[key]) == self.num_init_demands and key not in ['flow_id', 'sn', 'dn', 'flow_size']]
+        if not self.job_centric:
+            self.event_keys += ['flow_id', 'sn', 'dn', 'flow_size']
+        self._event_data = {key: np.asarray(demand_data[key]) if key != 'job' else demand_data[key] for key in self.event_keys}
+
+        if self.job_centric:
+            self.num_control_deps = sum(job.graph['num_control_deps'] for job in demand_data['job']) * self.num_copies
+            self.num_data_deps = sum(job.graph['num_data_deps'] for job in demand_data['job']) * self.num_copies
+            self.num_flows = self.num_data_deps
+        else:
+            self.num_control_deps, self.num_data_deps, self.num_flows = 0, 0, self.num_demands
+
+    def __len__(self):
+        return math.ceil(self.num_demands / self.chunk_size)
+
+    def __iter__(self):
+        for start in range(0, self.num_demands, self.chunk_size):
+            yield self.get_chunk(start, min(start+self.chunk_size, self.num_demands))
+
+    def get_chunk(self, start, end):
+        '''Returns demand data dict of demands start (inclusive) to end (exclusive) of the stream.'''
+        demand_idxs = np.arange(start, end)
+        copy_idxs, idxs = demand_idxs // self.num_init_demands, demand_idxs % self.num_init_demands
+        chunk = {}
+        for key in self.event_keys:
+            if key == 'job':
+                continue
+            chunk[key] = self._event_data[key][idxs]
+        chunk['event_time'] = chunk['event_time'] + (copy_idxs * self.duration)
+        if 'index' in chunk:
+            chunk['index'] = chunk['index'] + (copy_idxs * self.num_init_demands)
+
+        # duplicated demands get new ids (see duplicate_demands_in_demand_data_dict())
+        duplicated = np.flatnonzero(copy_idxs > 0)
+        if self.job_centric:
+            chunk['job_id'] = chunk['job_id'].astype(object)
+            for i in duplicated:
+                chunk['job_id'][i] = 'job_{}'.format(demand_idxs[i])
+            # duplicated jobs reuse original job graphs by reference (see jobcentric.gen_job_event_dict())
+            chunk['job'] = [self._event_data['job'][idx] for idx in idxs]
+            chunk['flow_id'], chunk['sn'], chunk['dn'], chunk['flow_size'] = [], [], [], []
+            for job_id, job in zip(chunk['job_id'], chunk['job']):
+                for flow in job.edges:
+                    attr_dict = job.get_edge_data(flow[0], flow[1])['attr_dict']
+                    if attr_dict['dependency_type'] == 'data_dep':
+                        chunk['flow_id'].append(job_id + '_' + attr_dict['flow_id'])
+                        chunk['sn'].append(attr_dict['sn'])
+                        chunk['dn'].append(attr_dict['dn'])
+                        chunk['flow_size'].append(attr_dict['flow_size'])
+        else:
+            chunk['flow_id'] = chunk['flow_id'].astype(object)
+            for i in duplicated:
+                chunk['flow_id'][i] = 'flow_{}'.format(demand_idxs[i])
 
+        return chunk
 
 
 
@@ -1,6 +1,6 @@
 from trafpy.generator.src.dists import val_dists, node_dists
 from trafpy.generator.src import tools
-from trafpy.generator.src.flowcentric import duplicate_demands_in_demand_data_dict
+from trafpy.generator.src.flowcentric import duplicate_demands_in_demand_data_dict, DemandDataChunks
 from trafpy.utils import get_class_from_path
 
 import numpy as np
@@ -16,7 +16,7 @@ from tqdm import tqdm # progress bar
 
 
 
-class JobGenerator:
+class JobGenerator(tools.EventTimesMixin):
     def __init__(self,
                  eps,
                  node_dist,
@@ -111,6 +111,7 @@ class JobGenerator:
         self.print_data = print_data
 
         self.num_nodes, self.num_pairs, self.node_to_index, self.index_to_node = tools.get_network_params(self.eps)
+        self._event_times_cache = None # (interarrival_times, event_times) of most recent event times generated
 
         if self.network_load_config['target_load_fraction'] is not None:
             if self.network_load_config['target_load_fraction'] > 0.95:
@@ -119,13 +120,18 @@ class JobGenerator:
         if not self.check_dont_exceed_one_ep_load:
             print('WARNING: check_dont_exceed_one_ep_load is set to False. This may result in end point loads going above 1.0, which for some users might be detrimental to the systems they want to test.')
 
-    def create_job_centric_demand_data(self, return_packing_time=False, return_packing_jensen_shannon_distance=False):
+    def create_job_centric_demand_data(self, return_packing_time=False, return_packing_jensen_shannon_distance=False, chunk_size=None):
         '''
         N.B. Currently only applying jensen_shannon_distance_threshold requirement
         to num_ops, not to flow size or interarrival time etc. Do this because
         otherwise may require far too many demands (jobs) -> very memory intensive.
         In future, should try to fix this and apply threshold requirement to all
         distributions.
+
+        If chunk_size is not None, rather than returning a demand data dict, will
+        return a DemandDataChunks stream which yields the demand data in
+        arrival-ordered chunks of chunk_size jobs (see
+        FlowGenerator.create_flow_centric_demand_data()).
         '''
         # multiprocessing params
         num_processes = 10
@@ -175,7 +181,7 @@ class JobGenerator:
                                                           interarrival_times)
 
         # corresponding job event (arrival) times
-        event_times = tools.gen_event_times(interarrival_times)
+        event_times = self._gen_event_times(interarrival_times)
         index, event_times_sorted = np.argsort(event_times), np.sort(event_times)
 
         # job ids
@@ -302,11 +308,14 @@ class JobGenerator:
                     print('WARING: max_num_demands is {} but have specified min_last_demand_arrival_time {}. Would need {} demands to reach this min_last_demand_arrival_time, therefore must increase max_num_demands (or set to None) if you want to meet this min_last_demand_arrival_time.'.format(self.max_num_demands, self.min_last_demand_arrival_time, (2**num_duplications)*len(demand_data['job_id'])))
                     return demand_data
             if num_duplications > 0:
-                demand_data = duplicate_demands_in_demand_data_dict(demand_data, 
-                                                                    num_duplications=num_duplications,
-                                                                    use_multiprocessing=True,
-                                                                    num_processes=10,
-                                                                    maxtasksperchild=1)
+                if chunk_size is not None:
+                    # duplicate lazily when streaming chunks
+                    demand_data = DemandDataChunks(demand_data, num_duplications=num_duplications, chunk_size=chunk_size)
+                else:
+                    demand_data = duplicate_demands_in_demand_data_dict(demand_data, 
+                                                                        num_duplications=num_duplications)
+        if chunk_size is not None and not isinstance(demand_data, DemandDataChunks):
+            demand_data = DemandDataChunks(demand_data, num_duplications=0, chunk_size=chunk_size)
 
         if not return_packing_time and not return_packing_jensen_shannon_distance:
             returns = demand_data
@@ -479,10 +488,6 @@ class JobGenerator:
     def _calc_total_info_arrived(self, flow_sizes):
         return np.sum(flow_sizes)
 
-    def _get_first_last_flow_arrival_times(self, interarrival_times):
-        event_times = tools.gen_event_times(interarrival_times)
-        return min(event_times), max(event_times)
-
     def _change_interarrival_times_by_factor(self, interarrival_times, factor):
         '''Updates self.interarrival_time_dist by a specified factor and returns new interarrival times.'''
         new_interarrival_time_dist = {}
@@ -495,6 +500,8 @@ class JobGenerator:
 
         # gen new interarrival times
         interarrival_times *= factor
+        # scaled in place, so any cached event times of interarrival_times are now stale
+        self._event_times_cache = None
 
         return interarrival_times
 
@@ -683,6 +690,7 @@ class JobGenerator:
 
 def gen_job_event_dict(demand_data, event_iter):
     job = demand_data['job'][event_iter]
+    job_id = demand_data['job_id'][event_iter]
     establish = demand_data['establish'][event_iter]
     time_arrived = demand_data['event_time'][event_iter]
     
@@ -691,8 +699,12 @@ def gen_job_event_dict(demand_data, event_iter):
         flow_stats[flow]['attr_dict']['establish'] = establish
     
     flow_dicts = [tools.gen_event_dict(flow_stats[flow]['attr_dict']) for flow in flow_stats]
+    for flow_dict in flow_dicts:
+        # duplicated jobs share job graphs with the original job, so take ids from demand data
+        flow_dict['job_id'] = job_id
+        flow_dict['unique_id'] = job_id + '_' + flow_dict['flow_id']
 
-    event_dict = {'job_id': demand_data['job_id'][event_iter],
+    event_dict = {'job_id': job_id,
                   'establish': establish,
                   'time_arrived': time_arrived,
                   'time_completed': None,
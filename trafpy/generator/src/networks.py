@@ -5,6 +5,7 @@ import copy
 import networkx as nx
 import matplotlib.pyplot as plt
 import json
+import itertools
 
 
 def gen_arbitrary_network(num_eps,
@@ -622,7 +623,133 @@ def add_edges_capacity_attrs(network,
                      } for edge in edges}
 
     nx.set_edge_attributes(network, attrs)
-  
+
+
+class FlowQueue:
+    '''Virtual queue of items indexed by flow identifier.
+
+    Behaves like a list of items (e.g. flow dicts) held in the order in which
+    they were appended, supporting iteration, len() and positional indexing, but
+    also keeps an index from each flow's identifier ('unique_id' if present in
+    the flow dict, otherwise 'flow_id') to its item. This allows flows to be
+    looked up and removed in O(1) time rather than by scanning the whole queue.
+
+    Items which are not flow dicts (e.g. a queue's completion times) can be
+    stored by explicitly passing the key of the flow they belong to.
+
+    Args:
+        items (list): Items with which to initialise the queue.
+        keys (list): Flow identifiers of items. If None, items are assumed to be
+            flow dicts and their identifiers are used.
+
+    '''
+    def __init__(self, items=None, keys=None):
+        self._items = {}
+        if items is not None:
+            if keys is None:
+                keys = [self.get_key(item) for item in items]
+            for key, item in zip(keys, items):
+                self.append(item, key=key)
+
+    @staticmethod
+    def get_key(flow):
+        '''Returns identifier used to index flow dict in queue.'''
+        if 'unique_id' in flow:
+            return flow['unique_id']
+        else:
+            return flow['flow_id']
+
+    def append(self, item, key=None):
+        if key is None:
+            key = self.get_key(item)
+        if key in self._items:
+            raise Exception('Flow {} is already present in queue.'.format(key))
+        self._items[key] = item
+
+    def remove(self, key):
+        '''Removes and returns item of flow with identifier key.'''
+        return self._items.pop(key)
+
+    def get(self, key, default=None):
+        return self._items.get(key, default)
+
+    def keys(self):
+        return self._items.keys()
+
+    def items(self):
+        return self._items.items()
+
+    def copy(self, copy_items=False):
+        '''Returns copy of queue. If copy_items, will also (shallow) copy each item.'''
+        if copy_items:
+            return FlowQueue(items=[dict(item) for item in self._items.values()], keys=list(self._items.keys()))
+        else:
+            return FlowQueue(items=list(self._items.values()), keys=list(self._items.keys()))
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items.values())
+
+    def __getitem__(self, idx):
+        # N.B. positional indexing is O(idx), use get() where possible
+        if idx < 0:
+            idx += len(self._items)
+        if idx < 0 or idx >= len(self._items):
+            raise IndexError('FlowQueue index out of range')
+        return next(itertools.islice(self._items.values(), idx, None))
+
+    def __repr__(self):
+        return 'FlowQueue({})'.format(list(self._items.values()))
+
+
+def snapshot_network_state(network):
+    '''Takes a cheap copy-on-write snapshot of a network's link and queue state.
+
+    Unlike copy.deepcopy(network), only the parts of the network which
+    schedulers are allowed to modify are copied: the graph, node and edge
+    attribute dicts, the port & channel capacity dicts of each edge, the
+    endpoint virtual queues, and the (shallow) queued flow dicts. Anything
+    nested deeper inside a flow dict (e.g. k_shortest_paths, parent_deps) is
+    shared with the original network and must therefore be treated as read-only.
+    Flow attrs should be updated by re-assigning them (e.g. flow['path'] = path)
+    rather than by mutating them in place.
+
+    Args:
+        network (networkx graph): Network to snapshot.
+
+    Returns:
+        networkx graph: Snapshot of network which can be modified without
+        affecting the original network.
+
+    '''
+    snapshot = network.copy()
+
+    # copy link state
+    for _, _, edge_attrs in snapshot.edges(data=True):
+        for key, val in edge_attrs.items():
+            if type(val) is dict:
+                # port dict (or channels dict if not bidirectional links)
+                edge_attrs[key] = {k: (dict(v) if type(v) is dict else v) for k, v in val.items()}
+
+    # copy virtual queue state
+    for ep in snapshot.graph.get('endpoints', []):
+        node_attrs = snapshot.nodes[ep]
+        for dst, ep_queue in node_attrs.items():
+            if type(ep_queue) is dict and 'queued_flows' in ep_queue:
+                if type(ep_queue['queued_flows']) is FlowQueue:
+                    node_attrs[dst] = {'queued_flows': ep_queue['queued_flows'].copy(copy_items=True),
+                                       'completion_times': ep_queue['completion_times'].copy()}
+                else:
+                    node_attrs[dst] = {'queued_flows': [dict(flow) for flow in ep_queue['queued_flows']],
+                                       'completion_times': list(ep_queue['completion_times'])}
+
+    return snapshot
+
 
 def get_node_type_dict(network, node_types=[]):
     '''Gets dict where keys are node types, values are list of nodes for each node type in graph.'''
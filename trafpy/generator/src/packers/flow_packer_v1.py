@@ -73,8 +73,8 @@ class FlowPackerV1(FlowPacker):
         self.pair_target_load_rate_dict = {pair: frac*self.load_rate for pair, frac in self.pair_prob_dict.items()}
 
         # calc target total info to pack into each src-dst pair
-        flow_event_times = tools.gen_event_times(self.flow_interarrival_times)
-        self.duration = max(flow_event_times) - min(flow_event_times)
+        first_flow_arrival_time, last_flow_arrival_time = self.generator._get_first_last_flow_arrival_times(self.flow_interarrival_times)
+        self.duration = last_flow_arrival_time - first_flow_arrival_time
         if self.duration == 0:
             # set to some number to prevent infinities
             self.duration = 1e6
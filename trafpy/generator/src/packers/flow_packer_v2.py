@@ -1,7 +1,6 @@
 from trafpy.generator.src.packers.flow_packer import FlowPacker
 from trafpy.generator.src import tools
 from trafpy.generator.src.dists import val_dists, node_dists, plot_dists
-from trafpy.utils import get_least_used_gpu
 
 import numpy as np
 import time
@@ -19,10 +18,8 @@ import matplotlib
 import matplotlib.pyplot as plt
 
 import os
-import torch
-if torch.cuda.is_available():
-    if 'CUDA_VISIBLE_DEVICES' in os.environ:
-        os.environ['CUDA_VISIBLE_DEVICES'] = str(get_least_used_gpu())
+# N.B. torch is not imported here since the (commented out) torch version of the
+# packer is not used, and importing torch adds seconds to every import of trafpy
 
 from typing import Union
 
@@ -69,10 +66,10 @@ class FlowPackerV2(FlowPacker):
                                                      'src': None,
                                                      'dst': None}
 
-        # get each possible src-dst pair and calc their corresponding target load rate
-        self.pair_prob_dict = node_dists.get_pair_prob_dict_of_node_dist_matrix(self.node_dist, self.eps, all_combinations=True) # N.B. These values sum to 0.5 -> need to allocate twice (src-dst and dst-src)
-        self.pairs = np.asarray(list(self.pair_prob_dict.keys()))
-        self.pair_probs = np.asarray(list(self.pair_prob_dict.values()))
+        # get each possible src-dst pair (as its src and dst node indices) and calc their corresponding target load rate
+        self.pair_src_idxs, self.pair_dst_idxs, self.pair_probs = node_dists.get_pair_prob_array_of_node_dist_matrix(self.node_dist, all_combinations=True) # N.B. These values sum to 0.5 -> need to allocate twice (src-dst and dst-src)
+        self.pair_probs = np.array(self.pair_probs, dtype=float)
+        self.pairs = np.arange(len(self.pair_probs)) # pairs are referred to by their index
         # if np.sum(self.pair_probs) == 1:
         if np.sum(self.pair_probs) + self.machine_eps >= 1:
             # need load fracs to sum to 0.5 since allocate twice (src-dst and dst-src)
@@ -80,16 +77,18 @@ class FlowPackerV2(FlowPacker):
         self.pair_target_load_rate = self.pair_probs * self.load_rate
 
         # calc target total info to pack into each src-dst pair throughout simulation
-        flow_event_times = tools.gen_event_times(self.flow_interarrival_times)
-        self.duration = max(flow_event_times) - min(flow_event_times)
+        first_flow_arrival_time, last_flow_arrival_time = self.generator._get_first_last_flow_arrival_times(self.flow_interarrival_times)
+        self.duration = last_flow_arrival_time - first_flow_arrival_time
         if self.duration == 0:
             # set to some number to prevent infinities
             self.duration = 1e6
         self.pair_target_total_info = self.pair_target_load_rate * self.duration
 
         # init current total info packed into each src-dst pair and current distance from target info
-        self.pair_current_total_info = np.zeros(len(self.pair_prob_dict))
+        self.pair_current_total_info = np.zeros(len(self.pairs))
         self.pair_current_distance_from_target_info = self.pair_target_total_info - self.pair_current_total_info
+        # track achieved pair dist from the packed info counts (tracker normalises pair_probs to sum to 1.0 and shares pair_current_total_info rather than copying it)
+        self.pair_jensen_shannon_tracker = tools.JensenShannonDistanceTracker(self.pair_probs, counts=self.pair_current_total_info)
 
         # calc max total info during simulation per end point and initialise end point total info tracker
         self.max_total_ep_info = self.network_load_config['ep_link_capacity'] * self.duration
@@ -99,25 +98,17 @@ class FlowPackerV2(FlowPacker):
         # calc max info can put on src and dst ports
         self.src_total_infos = {ep: 0 for ep in self.eps}
         self.dst_total_infos = {ep: 0 for ep in self.eps}
-
-        # init mapping of src and dst node ports to each possible pair
-        self.src_port_to_pairs = defaultdict(set)
-        self.dst_port_to_pairs = defaultdict(set)
-        # init mapping of each pair to its string equivalent once at start so do not have to keep making computationally expensive json.loads() for each flow for each pair for each pass
-        self.pair_to_json_loads = {}
-        # init mapping of each pair to its remaining info capacity (the min remaining info capacity of its src-dst)
-        self.pair_to_remaining_capacity = []
-        # init mapping of each pair to its idx for accessing numpy arrays
-        self.pair_to_idx = {}
-        for pair_idx, pair in enumerate(self.pairs):
-            json_loads_pair = json.loads(pair)
-            src, dst = json_loads_pair[0], json_loads_pair[1]
-            self.src_port_to_pairs[src].add(pair)
-            self.dst_port_to_pairs[dst].add(pair)
-            self.pair_to_json_loads[pair] = json_loads_pair
-            self.pair_to_remaining_capacity.append(self.max_total_port_info)
-            self.pair_to_idx[pair] = pair_idx
-        self.pair_to_remaining_capacity = np.array(self.pair_to_remaining_capacity)
+        # also track src and dst port total infos by node index for vectorised pair capacity updates
+        self.src_idx_total_infos = np.zeros(self.num_nodes)
+        self.dst_idx_total_infos = np.zeros(self.num_nodes)
+
+        # init mapping of src and dst node port indices to the indices of each of their pairs
+        pair_idxs_by_src = np.argsort(self.pair_src_idxs, kind='stable')
+        pair_idxs_by_dst = np.argsort(self.pair_dst_idxs, kind='stable')
+        self.src_port_to_pairs = np.split(pair_idxs_by_src, np.cumsum(np.bincount(self.pair_src_idxs, minlength=self.num_nodes))[:-1])
+        self.dst_port_to_pairs = np.split(pair_idxs_by_dst, np.cumsum(np.bincount(self.pair_dst_idxs, minlength=self.num_nodes))[:-1])
+        # init each pair's remaining info capacity (the min remaining info capacity of its src-dst)
+        self.pair_to_remaining_capacity = np.full(len(self.pairs), self.max_total_port_info, dtype=float)
 
         if self.print_data:
             print('Duration: {}'.format(self.duration))
@@ -133,8 +124,7 @@ class FlowPackerV2(FlowPacker):
 
     def _check_if_flow_pair_within_max_load(self, flow, pair):
         within_load = False
-        json_loads_pair = self.pair_to_json_loads[pair]
-        src, dst = json_loads_pair[0], json_loads_pair[1]
+        src, dst = self.index_to_node[self.pair_src_idxs[pair]], self.index_to_node[self.pair_dst_idxs[pair]]
         if self.check_dont_exceed_one_ep_load:
             # ensure wont exceed 1.0 end point load by allocating this flow to pair
             if self.src_total_infos[src] + self.packed_flows[flow]['size'] > self.max_total_port_info or self.dst_total_infos[dst] + self.packed_flows[flow]['size'] > self.max_total_port_info:
@@ -148,30 +138,28 @@ class FlowPackerV2(FlowPacker):
         return within_load
         
     def _pack_flow_into_chosen_pair(self, flow, chosen_pair):
-        # pack flow into this pair
-        self.pair_current_total_info[self.pair_to_idx[chosen_pair]] = self.pair_current_total_info[self.pair_to_idx[chosen_pair]] + (self.packed_flows[flow]['size'])
-        self.pair_current_distance_from_target_info[self.pair_to_idx[chosen_pair]] = self.pair_current_distance_from_target_info[self.pair_to_idx[chosen_pair]] - (self.packed_flows[flow]['size'])
+        # update pair total info and distance from target info
+        self.pair_current_total_info[chosen_pair] = self.pair_current_total_info[chosen_pair] + (self.packed_flows[flow]['size'])
+        self.pair_current_distance_from_target_info[chosen_pair] = self.pair_current_distance_from_target_info[chosen_pair] - (self.packed_flows[flow]['size'])
 
         # updated packed flows dict
-        json_loads_pair = self.pair_to_json_loads[chosen_pair]
-        chosen_src, chosen_dst = json_loads_pair[0], json_loads_pair[1]
+        chosen_src_idx, chosen_dst_idx = self.pair_src_idxs[chosen_pair], self.pair_dst_idxs[chosen_pair]
+        chosen_src, chosen_dst = self.index_to_node[chosen_src_idx], self.index_to_node[chosen_dst_idx]
         self.packed_flows[flow]['src'], self.packed_flows[flow]['dst'] = chosen_src, chosen_dst 
 
-        # update end point and src-dst port info of chosen pair
+        # update ep total infos
         self.ep_total_infos[chosen_src] += self.packed_flows[flow]['size']
         self.ep_total_infos[chosen_dst] += self.packed_flows[flow]['size']
         self.src_total_infos[chosen_src] += self.packed_flows[flow]['size']
         self.dst_total_infos[chosen_dst] += self.packed_flows[flow]['size']
+        self.src_idx_total_infos[chosen_src_idx] += self.packed_flows[flow]['size']
+        self.dst_idx_total_infos[chosen_dst_idx] += self.packed_flows[flow]['size']
 
-        # update src-dst info of any other pairs associated with this chosen pair's src and dst
-        for pair in self.src_port_to_pairs[chosen_src]:
-            json_loads_pair = self.pair_to_json_loads[pair]
-            dst = json_loads_pair[1]
-            self.pair_to_remaining_capacity[self.pair_to_idx[pair]] = min(self.max_total_port_info - self.src_total_infos[chosen_src], self.max_total_port_info - self.dst_total_infos[dst])
-        for pair in self.dst_port_to_pairs[chosen_dst]:
-            json_loads_pair = self.pair_to_json_loads[pair]
-            src = json_loads_pair[0]
-            self.pair_to_remaining_capacity[self.pair_to_idx[pair]] = min(self.max_total_port_info - self.src_total_infos[src], self.max_total_port_info - self.dst_total_infos[chosen_dst])
+        # update remaining capacity of any other pairs associated with this chosen pair's src and dst
+        src_pairs = self.src_port_to_pairs[chosen_src_idx]
+        self.pair_to_remaining_capacity[src_pairs] = np.minimum(self.max_total_port_info - self.src_idx_total_infos[chosen_src_idx], self.max_total_port_info - self.dst_idx_total_infos[self.pair_dst_idxs[src_pairs]])
+        dst_pairs = self.dst_port_to_pairs[chosen_dst_idx]
+        self.pair_to_remaining_capacity[dst_pairs] = np.minimum(self.max_total_port_info - self.src_idx_total_infos[self.pair_src_idxs[dst_pairs]], self.max_total_port_info - self.dst_idx_total_infos[chosen_dst_idx])
 
     def _shuffle_packed_flows(self):
         shuffled_packed_flows = {}
@@ -233,9 +221,8 @@ class FlowPackerV2(FlowPacker):
 
             if self.check_dont_exceed_one_ep_load:
                 if not self._check_if_flow_pair_within_max_load(flow, chosen_pair):
-                    json_loads_pair = self.pair_to_json_loads[chosen_pair]
-                    chosen_src, chosen_dst = json_loads_pair[0], json_loads_pair[1]
-                    raise Exception(f'ERROR: Flow {flow} with size {self.packed_flows[flow]["size"]} has been allocated to chosen_pair {chosen_pair} which has src total info ({self.src_total_infos[chosen_src]}) and/or dst total info ({self.dst_total_infos[chosen_dst]}) + flow size > max_total_port_info ({self.max_total_port_info}) (pair_current_distance_from_target_info: {self.pair_current_distance_from_target_info[self.pair_to_idx[chosen_pair]]} | pair_to_remaining_capacity: {self.pair_to_remaining_capacity[self.pair_to_idx[chosen_pair]]})')
+                    chosen_src, chosen_dst = self.index_to_node[self.pair_src_idxs[chosen_pair]], self.index_to_node[self.pair_dst_idxs[chosen_pair]]
+                    raise Exception(f'ERROR: Flow {flow} with size {self.packed_flows[flow]["size"]} has been allocated to chosen_pair {[chosen_src, chosen_dst]} which has src total info ({self.src_total_infos[chosen_src]}) and/or dst total info ({self.dst_total_infos[chosen_dst]}) + flow size > max_total_port_info ({self.max_total_port_info}) (pair_current_distance_from_target_info: {self.pair_current_distance_from_target_info[chosen_pair]} | pair_to_remaining_capacity: {self.pair_to_remaining_capacity[chosen_pair]})')
 
             # pack flow into the chosen src-dst pair
             self._pack_flow_into_chosen_pair(flow, chosen_pair)
@@ -249,13 +236,7 @@ class FlowPackerV2(FlowPacker):
 
         # compute tracker metrics
         self.packing_time = time.time() - packing_start_t
-        if np.sum(self.pair_probs) - self.machine_eps <= 0.5:
-            target_pair_dist = self.pair_probs * 2 # sum to 1.0 (previously summed to 0.5 since allocated twice for src-dst and dst-src)
-        else:
-            target_pair_dist = self.pair_probs
-        achieved_pair_load = self.pair_current_total_info / self.duration
-        achieved_pair_dist = achieved_pair_load / np.sum(achieved_pair_load)
-        self.packing_jensen_shannon_distance = tools.compute_jensen_shannon_distance(target_pair_dist, achieved_pair_dist)
+        self.packing_jensen_shannon_distance = self.pair_jensen_shannon_tracker.distance()
 
         print(f'Packed {len(self.packed_flows)} flows in {self.packing_time:.3f} s | Node distribution Jensen Shannon distance from target achieved: {self.packing_jensen_shannon_distance}')
 
@@ -0,0 +1,367 @@
+from trafpy.generator.src.packers.flow_packer_v2 import FlowPackerV2
+from trafpy.generator.src import tools
+
+import numpy as np
+import heapq
+import multiprocessing
+import time
+import warnings
+
+
+
+
+class PairSegmentTree:
+    '''
+    Segment tree over src-dst pairs used to choose which pair to pack a flow into.
+
+    Each node stores the leaf (pair) in its subtree with the highest (key, tie)
+    value, so the root gives the highest priority pair in O(1) and changing a
+    pair's key costs O(log(num pairs)), rather than masking and scanning every
+    pair for every flow.
+
+    Pairs found to have too little remaining capacity for the current flow are
+    deactivated (removed from the tree) and held in a max-heap of their
+    remaining capacities, from which they are reactivated once flows become
+    small enough for them to take. Since flows are packed in descending order
+    of size and remaining capacities only decrease, each query only has to
+    (de)activate the pairs whose feasibility has changed.
+
+    Ties are broken by a random tie value per pair, which is redrawn each time
+    the pair's key is updated, so that equally distant pairs are chosen at
+    random.
+
+    Args:
+        keys (numpy array): Key (packing priority) of each pair.
+        capacities (numpy array): Remaining info capacity of each pair. N.B.
+            This array is not copied, so the tree will see any in-place
+            updates made to it.
+        rng (numpy.random.RandomState): Random state to draw tie values from.
+            If None, uses the global numpy random state.
+    '''
+    def __init__(self, keys, capacities, rng=None):
+        self.num_leaves = len(keys)
+        self.size = 1
+        while self.size < self.num_leaves:
+            self.size *= 2
+
+        self.rng = np.random if rng is None else rng
+        self.keys = np.asarray(keys, dtype=float).copy()
+        self.ties = self.rng.random_sample(self.num_leaves)
+        self.capacities = capacities
+        self.active = np.ones(self.num_leaves, dtype=bool)
+        self.inactive_heap = []
+
+        # node arrays (node 1 is root, children of node n are 2n and 2n+1, leaves start at self.size)
+        self.node_best = np.full(2*self.size, -1, dtype=int)
+        self.node_key = np.full(2*self.size, -np.inf)
+        self.node_tie = np.full(2*self.size, -np.inf)
+        self.node_best[self.size:self.size+self.num_leaves] = np.arange(self.num_leaves)
+        self.node_key[self.size:self.size+self.num_leaves] = self.keys
+        self.node_tie[self.size:self.size+self.num_leaves] = self.ties
+        level_start = self.size // 2
+        while level_start >= 1:
+            nodes = np.arange(level_start, 2*level_start)
+            left, right = 2 * nodes, 2 * nodes + 1
+            choose_left = (self.node_key[left] > self.node_key[right]) | ((self.node_key[left] == self.node_key[right]) & (self.node_tie[left] >= self.node_tie[right]))
+            children = np.where(choose_left, left, right)
+            self.node_best[nodes] = self.node_best[children]
+            self.node_key[nodes] = self.node_key[children]
+            self.node_tie[nodes] = self.node_tie[children]
+            level_start //= 2
+
+    def update(self, idx):
+        '''Updates the nodes of the tree after changing the key, tie and/or activity of pair idx.'''
+        node = idx + self.size
+        self.node_key[node] = self.keys[idx] if self.active[idx] else -np.inf
+        self.node_tie[node] = self.ties[idx]
+        node //= 2
+        while node >= 1:
+            left, right = 2 * node, 2 * node + 1
+            if self.node_key[left] > self.node_key[right] or (self.node_key[left] == self.node_key[right] and self.node_tie[left] >= self.node_tie[right]):
+                child = left
+            else:
+                child = right
+            self.node_best[node] = self.node_best[child]
+            self.node_key[node] = self.node_key[child]
+            self.node_tie[node] = self.node_tie[child]
+            node //= 2
+
+    def set_key(self, idx, key):
+        '''Sets key of pair idx and redraws its random tie value.'''
+        self.keys[idx] = key
+        self.ties[idx] = self.rng.random_sample()
+        self.update(idx)
+
+    def query(self, min_capacity):
+        '''Returns idx of the pair with the highest key whose capacity is >= min_capacity (or None if no such pair).'''
+        # reactivate any pairs which may now have enough capacity
+        while len(self.inactive_heap) > 0 and -self.inactive_heap[0][0] >= min_capacity:
+            _, idx = heapq.heappop(self.inactive_heap)
+            if self.capacities[idx] >= min_capacity:
+                self.active[idx] = True
+                self.update(idx)
+            else:
+                # capacity has decreased since was deactivated
+                heapq.heappush(self.inactive_heap, (-self.capacities[idx], idx))
+
+        # deactivate best pairs until find one with enough capacity
+        while self.node_key[1] != -np.inf:
+            idx = self.node_best[1]
+            if self.capacities[idx] >= min_capacity:
+                return idx
+            self.active[idx] = False
+            heapq.heappush(self.inactive_heap, (-self.capacities[idx], idx))
+            self.update(idx)
+        return None
+
+
+
+
+def pack_flows_into_pairs(flow_sizes,
+                          pair_src_idxs,
+                          pair_dst_idxs,
+                          pair_keys,
+                          src_remaining_capacity,
+                          dst_remaining_capacity,
+                          check_dont_exceed_one_ep_load=True,
+                          seed=None):
+    '''
+    Packs each flow (in the order given, which should be descending size) into
+    the src-dst pair with the highest key (adjusted distance from target info)
+    which has enough remaining capacity on its src and dst ports to take the
+    flow. Packing a flow into a pair reduces the pair's key and its src and dst
+    ports' remaining capacities by the flow's size.
+
+    Args:
+        flow_sizes (numpy array): Size of each flow to pack.
+        pair_src_idxs (numpy array): Src port index of each pair.
+        pair_dst_idxs (numpy array): Dst port index of each pair.
+        pair_keys (numpy array): Initial packing priority of each pair (pair
+            target total info + pair distance from target total info).
+        src_remaining_capacity (numpy array): Remaining info capacity of each
+            src port. Updated in place.
+        dst_remaining_capacity (numpy array): Remaining info capacity of each
+            dst port. Updated in place.
+        check_dont_exceed_one_ep_load (bool): If False, ignores port capacities.
+        seed (int): If not None, breaks ties with a random state seeded with
+            seed rather than with the global numpy random state (used by shards
+            so that sharded packing is reproducible, and the same whether shards
+            are packed in the calling process or in worker processes).
+
+    Returns:
+        numpy array: Index of the pair each flow was packed into (-1 if no pair
+        had enough remaining capacity for the flow).
+
+    '''
+    rng = None if seed is None else np.random.RandomState(seed)
+    pair_src_idxs, pair_dst_idxs = np.asarray(pair_src_idxs), np.asarray(pair_dst_idxs)
+    src_port_to_pair_idxs = [np.flatnonzero(pair_src_idxs == idx) for idx in range(len(src_remaining_capacity))]
+    dst_port_to_pair_idxs = [np.flatnonzero(pair_dst_idxs == idx) for idx in range(len(dst_remaining_capacity))]
+    pair_remaining_capacity = np.minimum(src_remaining_capacity[pair_src_idxs], dst_remaining_capacity[pair_dst_idxs])
+    pair_tree = PairSegmentTree(keys=pair_keys, capacities=pair_remaining_capacity, rng=rng)
+
+    chosen_pair_idxs = np.full(len(flow_sizes), -1, dtype=int)
+    for flow_idx, size in enumerate(flow_sizes):
+        # choose a src-dst pair to pack this flow into
+        if check_dont_exceed_one_ep_load:
+            pair_idx = pair_tree.query(size)
+        else:
+            pair_idx = pair_tree.query(-np.inf)
+        if pair_idx is None:
+            continue
+        chosen_pair_idxs[flow_idx] = pair_idx
+
+        # pack flow into the chosen src-dst pair
+        pair_tree.set_key(pair_idx, pair_tree.keys[pair_idx] - size)
+        src_idx, dst_idx = pair_src_idxs[pair_idx], pair_dst_idxs[pair_idx]
+        src_remaining_capacity[src_idx] -= size
+        dst_remaining_capacity[dst_idx] -= size
+
+        # update remaining capacity of any other pairs associated with this chosen pair's src and dst (N.B. pair_tree reads these capacities in place)
+        pair_idxs = np.concatenate([src_port_to_pair_idxs[src_idx], dst_port_to_pair_idxs[dst_idx]])
+        pair_remaining_capacity[pair_idxs] = np.minimum(src_remaining_capacity[pair_src_idxs[pair_idxs]], dst_remaining_capacity[pair_dst_idxs[pair_idxs]])
+
+    return chosen_pair_idxs
+
+
+def _pack_shard(kwargs):
+    return pack_flows_into_pairs(**kwargs)
+
+
+
+
+class FlowPackerV3(FlowPackerV2):
+    def __init__(self,
+                 generator,
+                 eps,
+                 node_dist,
+                 flow_ids,
+                 flow_sizes,
+                 flow_interarrival_times,
+                 network_load_config,
+                 auto_node_dist_correction=False,
+                 check_dont_exceed_one_ep_load=True,
+                 num_shards=1,
+                 num_processes=None,
+                 reconciliation_fraction=0.1,
+                 min_shard_flows_per_pair=50,
+                 print_data=False):
+        '''
+        Same packing as FlowPackerV2 (each flow, largest first, is packed into the
+        src-dst pair furthest from its target total info which can take the flow
+        without exceeding its src or dst end point port's maximum info), but keeps
+        the pairs in a PairSegmentTree and tracks remaining info per src and dst
+        port in arrays. Choosing and packing a pair therefore costs ~O(log(num pairs))
+        plus a vectorised update of the remaining capacities of the pairs sharing
+        the chosen pair's src or dst, rather than O(num pairs) Python work, making
+        packing of large networks (e.g. 128 end points, 100,000s of flows) much
+        faster.
+
+        If num_shards > 1, flows are dealt out by size (largest flow to shard 0,
+        second largest to shard 1, etc.) into num_shards shards, leaving the
+        smallest reconciliation_fraction of flows unsharded. Each shard is
+        packed in a separate process against its proportional share (its
+        fraction of the total flow info) of every pair's target total info and
+        every port's max info. The shards are then combined, and a serial
+        reconciliation pass packs the unsharded small flows (along with any
+        shard flows which did not fit in their shard's share) against the
+        combined state, fixing the residual error left by sharding. Compare
+        packing_jensen_shannon_distance with that of a serial packing to check
+        the packing accuracy of sharding. Shards with few flows per src-dst
+        pair pack their share of the pairs poorly (e.g. 3,000 flows over 16
+        end points packed in 4 shards are ~2.5x further from the target node
+        distribution than when packed serially), so fewer shards (or a serial
+        packing) are used, with a warning, if each shard would have fewer than
+        min_shard_flows_per_pair flows per pair.
+
+        Args:
+            num_shards (int): Number of shards to split flows into.
+            num_processes (int): Number of processes to pack shards across.
+                If None, uses min(num_shards, number of CPUs).
+            reconciliation_fraction (float): Fraction of flows (the smallest)
+                to leave out of the shards and pack in the reconciliation pass.
+            min_shard_flows_per_pair (int): Minimum average number of flows
+                per src-dst pair each shard must have to pack in shards.
+        '''
+        FlowPackerV2.__init__(
+                    self,
+                    generator=generator,
+                    eps=eps,
+                    node_dist=node_dist,
+                    flow_ids=flow_ids,
+                    flow_sizes=flow_sizes,
+                    flow_interarrival_times=flow_interarrival_times,
+                    network_load_config=network_load_config,
+                    auto_node_dist_correction=auto_node_dist_correction,
+                    check_dont_exceed_one_ep_load=check_dont_exceed_one_ep_load,
+                    print_data=print_data,
+                )
+        self.num_shards = num_shards
+        if num_processes is None:
+            num_processes = min(num_shards, multiprocessing.cpu_count())
+        self.num_processes = num_processes
+        self.reconciliation_fraction = reconciliation_fraction
+        self.min_shard_flows_per_pair = min_shard_flows_per_pair
+
+    def _pack_flow_idxs(self, flow_idxs, seed=None):
+        '''Packs flows (indices into self.flow_sizes) against the current packing state and returns their chosen pair indices.'''
+        src_remaining_capacity = self.max_total_port_info - self.src_idx_total_infos
+        dst_remaining_capacity = self.max_total_port_info - self.dst_idx_total_infos
+        return pack_flows_into_pairs(flow_sizes=self.flow_sizes[flow_idxs],
+                                     pair_src_idxs=self.pair_src_idxs,
+                                     pair_dst_idxs=self.pair_dst_idxs,
+                                     pair_keys=self.pair_current_distance_from_target_info + self.pair_target_total_info,
+                                     src_remaining_capacity=src_remaining_capacity,
+                                     dst_remaining_capacity=dst_remaining_capacity,
+                                     check_dont_exceed_one_ep_load=self.check_dont_exceed_one_ep_load,
+                                     seed=seed)
+
+    def _pack_shards(self, flow_idxs, num_shards):
+        '''Packs flows split into num_shards shards in parallel and returns their chosen pair indices.'''
+        shard_flow_idxs = [flow_idxs[shard::num_shards] for shard in range(num_shards)]
+        total_info = np.sum(self.flow_sizes)
+        shard_kwargs = []
+        for shard_idxs in shard_flow_idxs:
+            # shard packs against its proportional share of pair target info and port capacity
+            shard_frac = np.sum(self.flow_sizes[shard_idxs]) / total_info
+            shard_kwargs.append({'flow_sizes': self.flow_sizes[shard_idxs],
+                                 'pair_src_idxs': self.pair_src_idxs,
+                                 'pair_dst_idxs': self.pair_dst_idxs,
+                                 'pair_keys': (self.pair_current_distance_from_target_info + self.pair_target_total_info) * shard_frac,
+                                 'src_remaining_capacity': np.full(self.num_nodes, self.max_total_port_info * shard_frac),
+                                 'dst_remaining_capacity': np.full(self.num_nodes, self.max_total_port_info * shard_frac),
+                                 'check_dont_exceed_one_ep_load': self.check_dont_exceed_one_ep_load,
+                                 'seed': np.random.randint(2**31)})
+        num_processes = min(self.num_processes, num_shards)
+        if num_processes > 1:
+            with multiprocessing.Pool(num_processes) as pool:
+                shard_chosen_pair_idxs = pool.map(_pack_shard, shard_kwargs)
+        else:
+            shard_chosen_pair_idxs = [_pack_shard(kwargs) for kwargs in shard_kwargs]
+
+        chosen_pair_idxs = np.full(len(flow_idxs), -1, dtype=int)
+        for shard in range(num_shards):
+            chosen_pair_idxs[shard::num_shards] = shard_chosen_pair_idxs[shard]
+        return chosen_pair_idxs
+
+    def _pack_flows_into_chosen_pairs(self, flow_idxs, chosen_pair_idxs):
+        '''Updates packing state with flows (indices into self.flow_sizes) packed into chosen pairs (indices into self.pairs).'''
+        sizes = self.flow_sizes[flow_idxs]
+        pair_info = np.bincount(chosen_pair_idxs, weights=sizes, minlength=len(self.pairs))
+        self.pair_current_total_info += pair_info
+        self.pair_current_distance_from_target_info -= pair_info
+        src_info = np.bincount(self.pair_src_idxs, weights=pair_info, minlength=self.num_nodes)
+        dst_info = np.bincount(self.pair_dst_idxs, weights=pair_info, minlength=self.num_nodes)
+        self.src_idx_total_infos += src_info
+        self.dst_idx_total_infos += dst_info
+        for idx in range(self.num_nodes):
+            ep = self.index_to_node[idx]
+            self.src_total_infos[ep] += src_info[idx]
+            self.dst_total_infos[ep] += dst_info[idx]
+            self.ep_total_infos[ep] += src_info[idx] + dst_info[idx]
+        for flow_idx, pair_idx in zip(flow_idxs, chosen_pair_idxs):
+            flow = self.flow_ids[flow_idx]
+            self.packed_flows[flow]['src'], self.packed_flows[flow]['dst'] = self.index_to_node[self.pair_src_idxs[pair_idx]], self.index_to_node[self.pair_dst_idxs[pair_idx]]
+        self.pair_to_remaining_capacity = np.minimum(self.max_total_port_info - self.src_idx_total_infos[self.pair_src_idxs], self.max_total_port_info - self.dst_idx_total_infos[self.pair_dst_idxs])
+
+    def pack_the_flows(self):
+        '''
+        See FlowPackerV2.pack_the_flows().
+
+        '''
+        packing_start_t = time.time()
+
+        # N.B. flows were sorted into descending order of size by reset()
+        flow_idxs = np.arange(len(self.flow_sizes))
+        num_shards = self.num_shards
+        if num_shards > 1:
+            num_reconciliation_flows = int(self.reconciliation_fraction * len(flow_idxs))
+            shard_flow_idxs = flow_idxs[:len(flow_idxs)-num_reconciliation_flows]
+            # too few flows per pair in each shard would pack poorly, so use fewer shards
+            num_shards = int(min(num_shards, max(len(shard_flow_idxs) // (self.min_shard_flows_per_pair * len(self.pairs)), 1)))
+            if num_shards < self.num_shards:
+                warnings.warn(f'Only {len(shard_flow_idxs)} flows to shard across {len(self.pairs)} src-dst pairs, which is too few for {self.num_shards} shards to have min_shard_flows_per_pair={self.min_shard_flows_per_pair} flows per pair. Packing in {num_shards} shard(s) instead.')
+        if num_shards > 1:
+            chosen_pair_idxs = self._pack_shards(shard_flow_idxs, num_shards)
+            packed = chosen_pair_idxs != -1
+            self._pack_flows_into_chosen_pairs(shard_flow_idxs[packed], chosen_pair_idxs[packed])
+            if self.print_data:
+                print(f'Packed {np.sum(packed)} of {len(shard_flow_idxs)} sharded flows across {num_shards} shards in {time.time() - packing_start_t:.3f} s. Reconciling remaining flows...')
+            # reconcile by packing any remaining flows against combined shard packings (in descending order of size)
+            flow_idxs = np.sort(np.concatenate([shard_flow_idxs[~packed], flow_idxs[len(shard_flow_idxs):]]))
+        chosen_pair_idxs = self._pack_flow_idxs(flow_idxs)
+        if np.any(chosen_pair_idxs == -1):
+            flow_idx = flow_idxs[np.argmax(chosen_pair_idxs == -1)]
+            raise Exception(f'No src-dst pair has enough remaining info capacity to be allocated flow {self.flow_ids[flow_idx]} with size {self.flow_sizes[flow_idx]} without exceeding max_total_port_info ({self.max_total_port_info}).')
+        self._pack_flows_into_chosen_pairs(flow_idxs, chosen_pair_idxs)
+
+        # shuffle flow order to maintain randomness for arrival time in simulation (since sorted flows by size above)
+        shuffled_packed_flows = self._shuffle_packed_flows()
+
+        # compute tracker metrics
+        self.packing_time = time.time() - packing_start_t
+        self.packing_jensen_shannon_distance = self.pair_jensen_shannon_tracker.distance()
+
+        print(f'Packed {len(self.packed_flows)} flows in {self.packing_time:.3f} s | Node distribution Jensen Shannon distance from target achieved: {self.packing_jensen_shannon_distance}')
+
+        return shuffled_packed_flows
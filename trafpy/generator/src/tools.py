@@ -11,6 +11,7 @@ import networkx as nx
 from networkx.readwrite import json_graph
 import os
 import scipy
+import scipy.special
 
 
 
@@ -31,6 +32,66 @@ def compute_jensen_shannon_distance(p, q):
     return distance
 
 
+class JensenShannonDistanceTracker:
+    def __init__(self, target_probs, counts=None):
+        '''Tracks jensen shannon distance of sampled counts from a target dist.
+
+        Keeps histogram counts over the fixed support of target_probs so that
+        adding samples only touches the bins sampled, rather than rebuilding
+        the sampled distribution from scratch each time the distance is checked.
+
+        Args:
+            target_probs (list): Target probability of each bin in the support.
+            counts (numpy array): Optional existing (float or int) array of counts
+                per bin to track. N.B. This array is not copied, so any in-place
+                updates made to it elsewhere will be reflected in the distance.
+                If None, will init counts to zeros.
+
+        '''
+        self.target_probs = np.asarray(target_probs, dtype=float)
+        self.target_probs = self.target_probs / np.sum(self.target_probs)
+        if counts is None:
+            self.counts = np.zeros(len(self.target_probs))
+        else:
+            if len(counts) != len(self.target_probs):
+                raise Exception('counts must have same length as target_probs ({}), but has length {}.'.format(len(self.target_probs), len(counts)))
+            self.counts = counts
+
+        # target entropy term is fixed so only need to compute once
+        self.target_plogp = np.sum(scipy.special.xlogy(self.target_probs, self.target_probs))
+
+    def update(self, idxs, weights=None):
+        '''Adds samples (given as indices of their bins in the support) to the counts.
+
+        Args:
+            idxs (numpy array): Bin index of each sample.
+            weights (numpy array): Optional weight of each sample (e.g. flow size).
+                If None, each sample has weight 1.
+
+        '''
+        idxs = np.asarray(idxs)
+        if weights is None:
+            self.counts += np.bincount(idxs, minlength=len(self.counts))
+        else:
+            np.add.at(self.counts, idxs, weights)
+
+    def get_sampled_probs(self):
+        '''Returns the probability of each bin given the current counts.'''
+        return self.counts / np.sum(self.counts)
+
+    def distance(self):
+        '''Returns jensen shannon distance of current counts from target dist.
+
+        Equivalent to compute_jensen_shannon_distance(target_probs, get_sampled_probs())
+        but reuses the fixed target entropy term.
+
+        '''
+        q = self.get_sampled_probs()
+        m = (self.target_probs + q) / 2
+        divergence = ((self.target_plogp + np.sum(scipy.special.xlogy(q, q))) / 2) - np.sum(scipy.special.xlogy(m, m))
+
+        # clip any negative floating point error before sqrt
+        return np.sqrt(max(divergence, 0))
 
 
 
@@ -63,19 +124,21 @@ def gen_event_times(interarrival_times,
                     duration_times=None,
                     path_to_save=None):
     '''Use event interarrival times to generate event times.'''
+    interarrival_times = np.asarray(interarrival_times, dtype=float)
+    num_events = len(interarrival_times)
     if duration_times is None:
-        event_times = np.zeros((int(len(interarrival_times))))
+        event_times = np.zeros(num_events)
     else:
-        event_times = np.zeros((int(len(interarrival_times))*2))
+        event_times = np.zeros(num_events*2)
 
-    # points in time at which establishments occur
-    for i in np.arange(1, int(len(interarrival_times))):
-        event_times[i] = event_times[i-1] + interarrival_times[i-1]
+    # points in time at which establishments occur (sequential cumulative sum, so same as adding one by one)
+    if num_events > 1:
+        np.cumsum(interarrival_times[:-1], out=event_times[1:num_events])
 
     if duration_times is not None:
-        # points in time at which take downs occur
-        for i in np.arange(int(len(interarrival_times)), 2*int(len(interarrival_times))):
-            event_times[i] = event_times[i-int(len(interarrival_times))] + duration_times[i-(int(len(interarrival_times))+1)]
+        # points in time at which take downs occur (take down i uses duration_times[i-1])
+        duration_times = np.asarray(duration_times, dtype=float)
+        event_times[num_events:] = event_times[:num_events] + duration_times[np.arange(num_events)-1]
     else:
         # only consider arrival times, dont need take downs
         pass
@@ -86,6 +149,30 @@ def gen_event_times(interarrival_times,
     return event_times
 
 
+class EventTimesMixin:
+    '''
+    Event time methods shared by the demand generators (flowcentric.FlowGenerator
+    and jobcentric.JobGenerator), which must set self._event_times_cache = None
+    on init.
+
+    '''
+    def _gen_event_times(self, interarrival_times):
+        '''
+        Returns event times of interarrival_times. The most recently generated
+        event times are cached, so load adjustment, packing and demand data
+        compilation of the same interarrival_times array share one computation.
+        N.B. The cache is keyed on the interarrival_times object, so must be
+        cleared if interarrival_times is modified in place.
+        '''
+        if self._event_times_cache is None or self._event_times_cache[0] is not interarrival_times:
+            self._event_times_cache = (interarrival_times, gen_event_times(interarrival_times))
+        return self._event_times_cache[1]
+
+    def _get_first_last_flow_arrival_times(self, interarrival_times):
+        event_times = self._gen_event_times(interarrival_times)
+        return np.min(event_times), np.max(event_times)
+
+
 
 
 
@@ -368,6 +455,143 @@ def unpickle_data(path_to_load,
     return demand_data
 
 
+def save_demand_data_as_npy(path_to_save,
+                            demand_data,
+                            overwrite=False,
+                            print_times=True):
+    '''
+    Saves demand data as a binary .demand directory, which can be loaded memory
+    mapped with load_demand_data_from_npy().
+
+    Flow-centric demand data is stored as flowcentric.ColumnarDemandData columns,
+    with one raw .npy file per column and a header.json file holding the end
+    point names (any non-integer flow ids are stored in objects.pickle).
+    Job-centric demand data stores its numeric columns as .npy files and its
+    remaining columns (e.g. job graphs) in an uncompressed objects.pickle file.
+
+    '''
+    from trafpy.generator.src.flowcentric import ColumnarDemandData
+
+    start = time.time()
+    if path_to_save[-7:] != '.demand':
+        append_demand = True
+        filename = path_to_save + '.demand'
+    else:
+        append_demand = False
+        filename = path_to_save
+    if overwrite:
+        # overwrite prev saved file
+        pass
+    else:
+        # avoid overwriting
+        v = 2
+        while os.path.exists(str(filename)):
+            if append_demand:
+                filename = path_to_save+'_v{}'.format(v)+'.demand'
+            else:
+                filename = path_to_save[:-7]+'_v{}'.format(v)+'.demand'
+            v += 1
+    if not os.path.exists(filename):
+        os.makedirs(filename)
+
+    header = {'job_centric': 'job_id' in demand_data}
+    objects = {}
+    if header['job_centric']:
+        header['columns'] = []
+        for key, val in demand_data.items():
+            if isinstance(val, np.ndarray) and val.dtype == object:
+                array = None
+            else:
+                try:
+                    array = np.asarray(val)
+                except ValueError:
+                    # non-rectangular (e.g. per-job lists of dependencies)
+                    array = None
+            if array is not None and array.dtype.kind in 'biuf' and array.ndim == 1:
+                header['columns'].append(key)
+                np.save(filename+'/{}.npy'.format(key), array)
+            else:
+                objects[key] = val
+    else:
+        demand_data = ColumnarDemandData.from_demand_data(demand_data)
+        header['columns'] = ['flow_ids', 'sns', 'dns', 'flow_sizes', 'event_times', 'establish', 'index']
+        header['node_names'] = [str(node) for node in demand_data.node_names]
+        for key in header['columns']:
+            np.save(filename+'/{}.npy'.format(key), getattr(demand_data, key))
+        if demand_data.flow_id_names is not None:
+            # non-integer flow ids
+            objects['flow_id_names'] = demand_data.flow_id_names
+    with open(filename+'/objects.pickle', 'wb') as f:
+        pickle.dump(objects, f, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(filename+'/header.json', 'w') as f:
+        json.dump(header, f)
+
+    end = time.time()
+    if print_times:
+        print('Time to save data to {}: {} s'.format(filename, end-start))
+
+def load_demand_data_from_npy(path_to_load,
+                              mmap=True,
+                              time_range=None,
+                              print_times=True):
+    '''
+    Loads demand data saved with save_demand_data_as_npy().
+
+    Args:
+        path_to_load (str): Path to .demand directory.
+        mmap (bool): If True, columns are memory mapped rather than read into
+            memory, so only the parts of columns which are accessed are read
+            from disk.
+        time_range (tuple): (start_time, end_time) of flows to load. If not
+            None, only flows with start_time <= event_time < end_time are
+            returned (as a view of the memory mapped columns). Only supported
+            for flow-centric demand data.
+
+    Returns:
+        flowcentric.ColumnarDemandData or dict: Flow-centric demand data as
+        ColumnarDemandData, or job-centric demand data as dict.
+
+    '''
+    from trafpy.generator.src.flowcentric import ColumnarDemandData
+
+    start = time.time()
+    if path_to_load[-7:] != '.demand':
+        filename = path_to_load+'.demand'
+    else:
+        filename = path_to_load
+    with open(filename+'/header.json', 'r') as f:
+        header = json.load(f)
+    mmap_mode = 'r' if mmap else None
+    columns = {key: np.load(filename+'/{}.npy'.format(key), mmap_mode=mmap_mode) for key in header['columns']}
+
+    if header['job_centric']:
+        if time_range is not None:
+            raise Exception('time_range only supported for flow-centric demand data.')
+        with open(filename+'/objects.pickle', 'rb') as f:
+            demand_data = pickle.load(f)
+        demand_data.update(columns)
+    else:
+        with open(filename+'/objects.pickle', 'rb') as f:
+            objects = pickle.load(f)
+        demand_data = ColumnarDemandData(flow_ids=columns['flow_ids'],
+                                         sns=columns['sns'],
+                                         dns=columns['dns'],
+                                         flow_sizes=columns['flow_sizes'],
+                                         event_times=columns['event_times'],
+                                         node_names=header['node_names'],
+                                         establish=columns['establish'],
+                                         index=columns['index'],
+                                         flow_id_names=objects.get('flow_id_names', None))
+        if time_range is not None:
+            demand_data = demand_data.get_time_window(*time_range)
+
+    end = time.time()
+    if print_times:
+        print('Time to load data from {}: {} s'.format(filename,end-start))
+
+    return demand_data
+
+
 def calc_graph_diameter(graph):
     '''Calculate diameter of a single graph.'''
     diameter = nx.algorithms.distance_measures.extrema_bounding(to_undirected_graph(graph), compute='diameter')
@@ -3,3 +3,11 @@ from trafpy.manager.src.schedulers.schedulers import *
 from trafpy.manager.src.simulators.simulators import *
 from trafpy.manager.src.simulators.analysers import *
 from trafpy.manager.src.simulators.plotters import *
+
+
+def __getattr__(name):
+    # lazily imported (heavy dependencies) schedulers
+    if name == 'ParametricAgent':
+        from trafpy.manager.src.schedulers.schedulers import ParametricAgent
+        return ParametricAgent
+    raise AttributeError('module {} has no attribute {}'.format(__name__, name))
@@ -0,0 +1,241 @@
+import networkx as nx
+import numpy as np
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import pickle
+import time
+
+
+# path caches and link indices already computed in this process, keyed by topology key
+_path_caches = {}
+_link_to_indexes = {}
+
+
+def get_topology_key(network):
+    '''
+    Returns a key identifying the topology (node and link set) of a network.
+
+    The key is stored under network.graph['topology_key'] so that copies/snapshots
+    of the network can look up their path cache without re-hashing the topology.
+    The stored key is recomputed whenever the number of nodes or edges in the
+    network changes. If the topology is changed without changing its number of
+    nodes and edges (e.g. an edge is re-wired), call invalidate_topology_key()
+    after changing it.
+    '''
+    signature = (network.number_of_nodes(), network.number_of_edges())
+    if 'topology_key' not in network.graph or network.graph.get('topology_signature', None) != signature:
+        edges = sorted(sorted([str(edge[0]), str(edge[1])]) for edge in network.edges)
+        network.graph['topology_key'] = hashlib.sha256(json.dumps(edges).encode()).hexdigest()[:16]
+        network.graph['topology_signature'] = signature
+    return network.graph['topology_key']
+
+
+def invalidate_topology_key(network):
+    '''Forces the topology key of network to be recomputed next time it is needed.'''
+    network.graph.pop('topology_key', None)
+    network.graph.pop('topology_signature', None)
+
+
+def get_link_to_index(network):
+    '''
+    Maps each directed link (src-dst and dst-src of each edge) in network to an
+    integer link index. Indices follow network.edges order, with each edge's
+    src-dst link immediately followed by its dst-src link.
+
+    Link indices are assigned once per topology and shared by all networks
+    with the same topology key, so they can be used as interned link IDs.
+    '''
+    topology_key = get_topology_key(network)
+    if topology_key not in _link_to_indexes:
+        link_to_index = {}
+        for edge in network.edges:
+            for link in [(edge[0], edge[1]), (edge[1], edge[0])]:
+                link_to_index[link] = len(link_to_index)
+        _link_to_indexes[topology_key] = link_to_index
+    return _link_to_indexes[topology_key]
+
+
+def get_path_cache(network, num_k, cache_dir=None, num_processes=1):
+    '''
+    Returns the shared PathCache for network's topology holding at least num_k
+    paths per endpoint pair.
+
+    Caches are shared by everything in this process using the same topology
+    (e.g. DCN, RWA and schedulers), so k-shortest paths are computed once per
+    network. If cache_dir is given, caches are also loaded from and saved to
+    disk so that they can be reused across processes and simulations.
+
+    Args:
+        network (networkx graph): Network to get path cache for.
+        num_k (int): Number of shortest paths needed per endpoint pair.
+        cache_dir (str): Directory in which to persist path cache. If None,
+            cache is only kept in memory.
+        num_processes (int): Number of processes to compute paths across (see
+            PathCache). If None, uses all available CPUs.
+
+    Returns:
+        PathCache: Path cache of network.
+    '''
+    topology_key = get_topology_key(network)
+    if topology_key in _path_caches and _path_caches[topology_key].num_k >= num_k:
+        return _path_caches[topology_key]
+
+    path_cache = None
+    if cache_dir is not None:
+        cache_path = os.path.join(cache_dir, 'path_cache_{}.pickle'.format(topology_key))
+        if os.path.exists(cache_path):
+            path_cache = PathCache.load(cache_path)
+            if path_cache.num_k < num_k:
+                # cached too few paths per pair, recompute
+                path_cache = None
+    if path_cache is None:
+        path_cache = PathCache(network, num_k, num_processes=num_processes)
+        if cache_dir is not None:
+            if not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+            path_cache.save(cache_path)
+    _path_caches[topology_key] = path_cache
+
+    return path_cache
+
+
+def _init_worker(network, num_k):
+    global _worker_network, _worker_num_k
+    _worker_network, _worker_num_k = network, num_k
+
+def _compute_src_k_shortest_paths(src_dsts):
+    src, dsts = src_dsts
+    return {(src, dst): compute_k_shortest_paths(_worker_network, src, dst, _worker_num_k) for dst in dsts}
+
+def compute_k_shortest_paths(network, src, dst, num_k, weight=None):
+    '''Generic k shortest (fewest hops, or lowest weight if weight given) simple paths search (Yen's algorithm).'''
+    return [tuple(path) for path in itertools.islice(nx.shortest_simple_paths(network, src, dst, weight=weight), num_k)]
+
+
+class PathCache:
+    '''
+    All-pairs k-shortest path cache of a network topology.
+
+    Stores the k shortest paths between every ordered pair of endpoints both
+    as node label paths and as arrays of integer link indices (see
+    get_link_to_index()). Fat tree topologies use a closed form equal cost
+    multi-path (ECMP) enumeration of up-down paths rather than the generic
+    k-shortest paths search for other topologies.
+
+    Use get_path_cache() rather than instantiating directly so that caches
+    are shared.
+
+    Args:
+        network (networkx graph): Network to compute paths of.
+        num_k (int): Number of shortest paths to compute per endpoint pair.
+        num_processes (int): Number of processes to compute the generic k-shortest
+            paths search across source endpoints. If None, uses all available CPUs.
+            N.B. Networks with fewer than min_eps_for_multiprocessing endpoints
+            are always computed serially, since for small networks starting
+            a process pool takes longer than computing the paths.
+        min_eps_for_multiprocessing (int): Minimum number of endpoints for which
+            to compute paths across multiple processes.
+    '''
+    def __init__(self, network, num_k, num_processes=1, min_eps_for_multiprocessing=64):
+        self.topology_key = get_topology_key(network)
+        self.num_k = num_k
+        self.link_to_index = get_link_to_index(network)
+
+        start_t = time.time()
+        eps = network.graph['endpoints']
+        if network.graph.get('topology_type', None) == 'fat_tree':
+            self.paths = self._get_fat_tree_paths(network, num_k)
+        else:
+            if num_processes is None:
+                num_processes = multiprocessing.cpu_count()
+            src_dsts = [(src, [dst for dst in eps if dst != src]) for src in eps]
+            if num_processes > 1 and len(eps) >= min_eps_for_multiprocessing:
+                with multiprocessing.Pool(min(num_processes, len(eps)), initializer=_init_worker, initargs=(network, num_k)) as pool:
+                    results = pool.map(_compute_src_k_shortest_paths, src_dsts)
+            else:
+                _init_worker(network, num_k)
+                results = [_compute_src_k_shortest_paths(src_dst) for src_dst in src_dsts]
+            self.paths = {pair: paths for result in results for pair, paths in result.items()}
+        self.link_idxs = {pair: [self.get_path_link_idxs(path) for path in paths] for pair, paths in self.paths.items()}
+        print('Computed {} shortest paths of {} endpoint pairs in {} s.'.format(num_k, len(self.paths), time.time()-start_t))
+
+    def _get_fat_tree_paths(self, network, num_k):
+        '''
+        Closed form ECMP paths of a fat tree: all shortest paths go up from src
+        and dst to their lowest common ancestor switches and back down. Pairs
+        needing more than their number of ECMP paths fall back to the generic
+        k shortest paths search for the remaining (longer) paths.
+        '''
+        layer = {node: network.graph['node_labels'].index(node.rsplit('_', 1)[0]) for node in network.nodes}
+        top_layer = max(layer.values())
+
+        # up paths from each endpoint to each switch layer, grouped by the switch reached
+        up_paths = {}
+        for ep in network.graph['endpoints']:
+            ep_up_paths = [{ep: [(ep,)]}]
+            for _ in range(top_layer):
+                layer_up_paths = {}
+                for paths in ep_up_paths[-1].values():
+                    for path in paths:
+                        for node in network.neighbors(path[-1]):
+                            if layer[node] > layer[path[-1]]:
+                                layer_up_paths.setdefault(node, []).append(path+(node,))
+                if len(layer_up_paths) == 0:
+                    break
+                ep_up_paths.append(layer_up_paths)
+            up_paths[ep] = ep_up_paths
+
+        all_paths = {}
+        for src in network.graph['endpoints']:
+            for dst in network.graph['endpoints']:
+                if src == dst:
+                    continue
+                paths = []
+                for src_layer_paths, dst_layer_paths in zip(up_paths[src], up_paths[dst]):
+                    common = [node for node in src_layer_paths.keys() if node in dst_layer_paths]
+                    if len(common) > 0:
+                        paths = [src_path+dst_path[::-1][1:] for node in common for src_path in src_layer_paths[node] for dst_path in dst_layer_paths[node]]
+                        break
+                if len(paths) < num_k:
+                    # need longer non-ECMP paths too (or not an up-down routable pair)
+                    longer_paths = [path for path in compute_k_shortest_paths(network, src, dst, num_k) if path not in paths]
+                    paths += longer_paths[:num_k-len(paths)]
+                all_paths[(src, dst)] = paths[:num_k]
+
+        return all_paths
+
+    def get_path_link_idxs(self, path):
+        '''Returns array of indices of the directed links traversed by path.'''
+        return np.array([self.link_to_index[(path[i], path[i+1])] for i in range(len(path)-1)], dtype=int)
+
+    def get_path_to_link_idxs(self):
+        '''Returns dict mapping each cached path (tuple) to its link indices.'''
+        return {path: link_idxs for pair in self.paths.keys() for path, link_idxs in zip(self.paths[pair], self.link_idxs[pair])}
+
+    def k_shortest_paths(self, src, dst, num_k=None, network=None):
+        '''
+        Returns k shortest paths (list of lists) between src and dst, in order
+        of path cost. Pairs not yet in cache (e.g. non-endpoint nodes) are
+        computed on demand from network and added to the cache.
+        '''
+        if num_k is None:
+            num_k = self.num_k
+        if (src, dst) not in self.paths:
+            if network is None:
+                raise Exception('Pair {} not in path cache, must provide network to compute its paths.'.format((src, dst)))
+            paths = compute_k_shortest_paths(network, src, dst, self.num_k)
+            self.paths[(src, dst)] = paths
+            self.link_idxs[(src, dst)] = [self.get_path_link_idxs(path) for path in paths]
+        return [list(path) for path in self.paths[(src, dst)][:num_k]]
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
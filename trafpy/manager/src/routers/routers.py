@@ -1 +1,2 @@
 from trafpy.manager.src.routers.rwa import RWA
+from trafpy.manager.src.routers.path_cache import PathCache, get_path_cache
@@ -1,5 +1,6 @@
+from trafpy.manager.src.routers.path_cache import get_path_cache, compute_k_shortest_paths
+
 import networkx as nx
-import queue
 import numpy as np
 
 class RWA:
@@ -37,19 +38,24 @@ class RWA:
 
         return pathcost
 
-    def k_shortest_paths(self, graph, source, target, num_k=None, weight='weight'):
+    def k_shortest_paths(self, graph, source, target, num_k=None, weight=None):
         '''
-        Uses Yen's algorithm to compute the k-shortest paths between a source
-        and a target node. The shortest path is that with the lowest pathcost,
-        defined by external path_cost() function. Paths are returned in order
-        of path cost, with lowest past cost being first etc.
+        Returns the k-shortest paths between a source and a target node. Paths
+        are computed once per network topology for all endpoint pairs and
+        looked up from the shared path cache (see
+        trafpy.manager.src.routers.path_cache), which uses closed form ECMP
+        paths for fat trees and Yen's algorithm otherwise. Paths are returned
+        in order of path cost (number of hops), with lowest path cost being
+        first etc.
 
         Args:
         - source (label): label of source node
         - target (label): label of destination node
         - num_k (int, float): number of shortest paths to compute
-        - weight (dict key): dictionary key of value to be 'minimised' when
-        finding 'shortest' paths
+        - weight (dict key): dictionary key of edge value to be 'minimised' when
+        finding 'shortest' paths. If None, path cost is number of edges in path
+        and paths are looked up from the path cache. If given, paths are instead
+        computed for this pair on demand with Yen's algorithm (not cached)
 
         Returns:
         - A (list of lists): list of shortest paths between src and dst
@@ -57,72 +63,9 @@ class RWA:
         if num_k is None:
             num_k = self.num_k
 
-        # Shortest path from the source to the target
-        A = [nx.shortest_path(graph, source, target, weight=weight)]
-        A_costs = [self.path_cost(graph, A[0], weight)]
-
-        # Initialize the heap to store the potential kth shortest path
-        B = queue.PriorityQueue()
-
-        for k in range(1, num_k):
-            # spur node ranges first node to next to last node in shortest path
-            try:
-                for i in range(len(A[k-1])-1):
-                    # Spur node retrieved from the prev k-shortest path, k - 1
-                    spurNode = A[k-1][i]
-                    # seq of nodes from src to spur node of prev k-shrtest path
-                    rootPath = A[k-1][:i]
-
-                    # We store the removed edges
-                    removed_edges = []
-
-                    for path in A:
-                        if len(path) - 1 > i and rootPath == path[:i]:
-                            # Remove edges of prev shrtest path w/ same root
-                            edge = (path[i], path[i+1])
-                            if not graph.has_edge(*edge):
-                                continue
-                            removed_edges.append((edge, graph.get_edge_data(*edge)))
-                            graph.remove_edge(*edge)
-
-                    # Calculate the spur path from the spur node to the sink
-                    try:
-                        spurPath = nx.shortest_path(graph, spurNode, target, weight=weight)
-
-                        # Entire path is made up of the root path and spur path
-                        totalPath = rootPath + spurPath
-                        totalPathCost = self.path_cost(graph, totalPath, weight)
-                        # Add the potential k-shortest path to the heap
-                        B.put((totalPathCost, totalPath))
-
-                    except nx.NetworkXNoPath:
-                        pass
-
-                    #Add back the edges that were removed from the graph
-                    for removed_edge in removed_edges:
-                        graph.add_edge(
-                            *removed_edge[0],
-                            **removed_edge[1]
-                        )
-
-                # Sort the potential k-shortest paths by cost
-                # B is already sorted
-                # Add the lowest cost path becomes the k-shortest path.
-                while True:
-                    try:
-                        cost_, path_ = B.get(False)
-                        if path_ not in A:
-                            A.append(path_)
-                            A_costs.append(cost_)
-                            break
-                    except queue.Empty:
-                        break
-            except IndexError:
-                pass
-        
-        
-
-        return A 
+        if weight is not None:
+            return [list(path) for path in compute_k_shortest_paths(graph, source, target, num_k, weight=weight)]
+        return get_path_cache(graph, num_k).k_shortest_paths(source, target, num_k, network=graph)
 
 
     def ff_k_shortest_paths(self, graph, k_shortest_paths, flow_size):
@@ -270,13 +270,13 @@ class BASRPT_v2:
             for flow in chosen_flows:
                 edges = self.toolbox.get_path_edges(flow['path'])
                 for edge in edges:
-                    edge_to_chosen_flows[json.dumps(edge)].append(flow['flow_id'])
+                    edge_to_chosen_flows[self.toolbox.link_to_index[tuple(edge)]].append(flow['flow_id'])
             for edge in self.toolbox.network.edges:
                 for channel in self.toolbox.rwa.channel_names:
                     # src-dst
                     bw = self.toolbox.get_channel_bandwidth(edge, channel)
                     try:
-                        print('edge: {} | channel: {} | chosen flows: {} | bandwidth remaining: {}'.format(edge, channel, edge_to_chosen_flows[json.dumps(edge)], bw))
+                        print('edge: {} | channel: {} | chosen flows: {} | bandwidth remaining: {}'.format(edge, channel, edge_to_chosen_flows[self.toolbox.link_to_index[tuple(edge)]], bw))
                     except KeyError:
                         # no flows chosen on this edge
                         print('edge: {} | channel: {} | bandwidth remaining: {}'.format(edge, channel, bw))
@@ -285,7 +285,7 @@ class BASRPT_v2:
                     edge = edge[::-1]
                     bw = self.toolbox.get_channel_bandwidth(edge, channel)
                     try:
-                        print('edge: {} | channel: {} | chosen flows: {} | bandwidth remaining: {}'.format(edge, channel, edge_to_chosen_flows[json.dumps(edge)], bw))
+                        print('edge: {} | channel: {} | chosen flows: {} | bandwidth remaining: {}'.format(edge, channel, edge_to_chosen_flows[self.toolbox.link_to_index[tuple(edge)]], bw))
                     except KeyError:
                         # no flows chosen on this edge
                         print('edge: {} | channel: {} | bandwidth remaining: {}'.format(edge, channel, bw))
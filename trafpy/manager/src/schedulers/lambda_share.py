@@ -1,6 +1,7 @@
 from trafpy.manager.src.schedulers.schedulertoolbox import SchedulerToolbox_v2
 from trafpy.manager.src.schedulers.fair_share import FairShare 
 from trafpy.manager.src.schedulers.srpt import SRPT_v2
+from trafpy.generator.src.networks import snapshot_network_state, FlowQueue
 
 import copy
 
@@ -71,7 +72,7 @@ class LambdaShare:
         by lambda.
 
         '''
-        srpt_network, fair_share_network = copy.deepcopy(network), copy.deepcopy(network)
+        srpt_network, fair_share_network = snapshot_network_state(network), snapshot_network_state(network)
 
         # update channel capacities
         if update_channel_capacities:
@@ -130,12 +131,19 @@ class LambdaShare:
         # update srpt queued flows with chosen path and channel from fair share
         self.srpt.toolbox.update_network_state(srpt_network)
         for ep in self.fair_share.toolbox.network.graph['endpoints']:
-            ep_queues = copy.deepcopy(self.fair_share.toolbox.network.nodes[ep])
-            for _ep in ep_queues.keys():
+            for _ep, ep_queue in self.fair_share.toolbox.network.nodes[ep].items():
+                # copy fair share queue (and its flows) before updating their packets
+                if type(ep_queue['queued_flows']) is FlowQueue:
+                    queued_flows = ep_queue['queued_flows'].copy(copy_items=True)
+                    completion_times = ep_queue['completion_times'].copy()
+                else:
+                    queued_flows = [dict(flow) for flow in ep_queue['queued_flows']]
+                    completion_times = list(ep_queue['completion_times'])
                 # update packets in queued flows w/ fair share choice so srpt doesn't choose flows which would otherwise be completed by fair share portion of network
-                for idx in range(len(ep_queues[_ep]['queued_flows'])):
-                    ep_queues[_ep]['queued_flows'][idx]['packets'] -= ep_queues[_ep]['queued_flows'][idx]['packets_this_slot']
-                self.srpt.toolbox.network.nodes[ep][_ep] = ep_queues[_ep]
+                for flow in queued_flows:
+                    flow['packets'] -= flow['packets_this_slot']
+                self.srpt.toolbox.network.nodes[ep][_ep] = {'queued_flows': queued_flows,
+                                                            'completion_times': completion_times}
 
         # choose srpt flows, do not do any path or channel assignment (i.e. use same path and channel as allocated by fair share)
         srpt_chosen_flows = self.srpt.get_scheduler_action(observation=self.srpt.toolbox.network, reset_channel_capacities=False, path_channel_assignment_strategy=None)
@@ -2,7 +2,14 @@ from trafpy.manager.src.schedulers.srpt import SRPT, SRPT_v2
 from trafpy.manager.src.schedulers.basrpt import BASRPT, BASRPT_v2
 from trafpy.manager.src.schedulers.agent import Agent
 from trafpy.manager.src.schedulers.random_agent import RandomAgent
-from trafpy.manager.src.schedulers.parametric_agent import ParametricAgent
 from trafpy.manager.src.schedulers.first_fit import FirstFit
 from trafpy.manager.src.schedulers.fair_share import FairShare 
 from trafpy.manager.src.schedulers.lambda_share import LambdaShare
+
+
+def __getattr__(name):
+    # ParametricAgent needs tensorflow and ray rllib, so only import it when it is used
+    if name == 'ParametricAgent':
+        from trafpy.manager.src.schedulers.parametric_agent import ParametricAgent
+        return ParametricAgent
+    raise AttributeError('module {} has no attribute {}'.format(__name__, name))
@@ -1,4 +1,8 @@
+from trafpy.generator.src.networks import snapshot_network_state, FlowQueue
+from trafpy.manager.src.routers.path_cache import get_link_to_index
+
 import numpy as np
+import scipy.sparse
 import networkx as nx
 import copy
 import math
@@ -11,6 +15,92 @@ import json
 import random
 
 
+def allocate_link_packets(incidence, link_max_packets, flow_packets, flow_priority, resolution_strategy):
+    '''
+    Batched kernel allocating the packets each link can carry this time slot
+    to the flows requesting it, for all links at once.
+
+    For 'cost', 'random' and 'first_fit', each link's flows are scheduled
+    greedily in order of priority (lowest first), each taking as many of its
+    packets as the link has left. For 'fair_share', each link's capacity is
+    water-filled equally across its requesting flows in rounds until the link
+    is full or all of its flows have been allocated all of their packets.
+
+    Args:
+        incidence (scipy.sparse.csr_matrix): Link x flow incidence matrix
+            (non-zero where flow requests link).
+        link_max_packets (numpy array): Maximum number of packets each link can
+            carry this slot.
+        flow_packets (numpy array): Number of packets each flow has left.
+        flow_priority (numpy array): Scheduling priority of each flow (lowest
+            is scheduled first). For 'cost', ties within a link are ordered as
+            np.argsort() orders that link's costs taken in order of flow index,
+            which is how the per-edge loops ordered equal-cost flows before
+            this kernel (flow index order == order flows requested the link).
+            Otherwise ties are scheduled in order of flow index.
+        resolution_strategy (str): One of 'cost', 'fair_share', 'random' or
+            'first_fit'.
+
+    Returns:
+        tuple: (link_idxs, flow_idxs, packets) arrays giving the number of
+        packets allocated to each requesting flow on each link (in order of
+        link, then priority).
+    '''
+    incidence = incidence.tocoo()
+    link_idxs, flow_idxs = incidence.row.astype(int), incidence.col.astype(int)
+
+    # group requests by link, in order of priority within each link
+    order = np.lexsort((flow_idxs, flow_priority[flow_idxs], link_idxs))
+    link_idxs, flow_idxs = link_idxs[order], flow_idxs[order]
+    _, group_starts, num_requests = np.unique(link_idxs, return_index=True, return_counts=True)
+
+    if resolution_strategy == 'cost':
+        # re-order links with tied costs exactly as the per-edge np.argsort() did (only the few tied links are looped over)
+        priority = flow_priority[flow_idxs]
+        tied = (link_idxs[1:] == link_idxs[:-1]) & (priority[1:] == priority[:-1])
+        for group in np.unique(np.searchsorted(link_idxs[group_starts], link_idxs[1:][tied])):
+            start, end = group_starts[group], group_starts[group] + num_requests[group]
+            group_flow_idxs = np.sort(flow_idxs[start:end])
+            flow_idxs[start:end] = group_flow_idxs[np.argsort(flow_priority[group_flow_idxs])]
+
+    requested = flow_packets[flow_idxs].astype(np.int64)
+    max_packets = link_max_packets[link_idxs].astype(np.int64)
+
+    if resolution_strategy in ['cost', 'random', 'first_fit']:
+        # packets already taken by higher priority flows on same link
+        cum_requested = np.cumsum(requested)
+        taken = cum_requested - requested - np.repeat((cum_requested - requested)[group_starts], num_requests)
+        packets = np.clip(max_packets - taken, 0, requested)
+
+    elif resolution_strategy == 'fair_share':
+        packets = np.zeros(len(requested), dtype=np.int64)
+        left = requested.copy()
+        group_max_packets = max_packets[group_starts]
+        group_scheduled = np.zeros(len(group_starts), dtype=np.int64)
+        group_active = np.ones(len(group_starts), dtype=bool)
+        while group_active.any():
+            # new sub-slot of time <= time slot
+            remaining = left > 0
+            group_num_left = np.add.reduceat(remaining.astype(np.int64), group_starts)
+            group_smallest_left = np.minimum.reduceat(np.where(remaining, left, np.iinfo(np.int64).max), group_starts)
+            group_max_per_request = (group_max_packets - group_scheduled) // np.maximum(group_num_left, 1)
+            group_packets_per_request = np.where(group_active, np.minimum(group_smallest_left, group_max_per_request), 0)
+
+            # fair share by scheduling packets per request equally for each request for this sub-slot
+            packets_per_request = np.repeat(group_packets_per_request, num_requests) * remaining
+            packets += packets_per_request
+            left -= packets_per_request
+            group_scheduled += group_packets_per_request * group_num_left
+
+            group_num_left = np.add.reduceat((left > 0).astype(np.int64), group_starts)
+            group_active &= (group_scheduled < group_max_packets - num_requests) & (group_num_left > 0)
+
+    else:
+        raise Exception('resolution_strategy {} does not seem to be implemented.'.format(resolution_strategy))
+
+    return link_idxs, flow_idxs, packets
+
+
 class SchedulerToolbox:
     pass
 
@@ -34,6 +124,20 @@ class SchedulerToolbox_v2:
 
     def reset(self):
         self.network = copy.deepcopy(self.network)
+        self.update_link_ids()
+
+    def update_link_ids(self):
+        '''
+        Maps each directed link in network to its integer link ID (assigned
+        once per topology). Link IDs rather than json.dumps(edge) strings are
+        used to key links throughout the scheduling pipeline.
+        '''
+        self.link_to_index = get_link_to_index(self.network)
+        self.index_to_link = list(self.link_to_index.keys())
+
+    def get_path_link_ids(self, path):
+        '''Returns list of the link IDs of each edge in path.'''
+        return [self.link_to_index[(path[i], path[i+1])] for i in range(len(path)-1)]
 
     def update_network_state(self, 
                              observation, 
@@ -48,13 +152,19 @@ class SchedulerToolbox_v2:
         
         If False, will just update network with all flows (even those that cannot yet
         be scheduled). This is used for 'job- & network- aware' scheduling systems.
+
+        The observed network is treated as read-only. Rather than deep copying it,
+        the scheduler takes a copy-on-write snapshot of the network's link and
+        queue state (see trafpy.generator.src.networks.snapshot_network_state),
+        which it is then free to modify.
         '''
         if type(observation) is dict:
             # network contained within observation dictionary
-            self.network = copy.deepcopy(observation['network'])
+            self.network = snapshot_network_state(observation['network'])
         else:
             # assume observation has been given as network object
-            self.network = copy.deepcopy(observation)
+            self.network = snapshot_network_state(observation)
+        self.update_link_ids()
 
         if reset_channel_capacities:
             self.network = self.reset_channel_capacities_of_edges()
@@ -80,19 +190,28 @@ class SchedulerToolbox_v2:
         Takes a network and filters out any flow that is not ready to be scheduled
         yet i.e. has incomplete parent flow dependencies. Use this method to get
         network representation for 'job-agnostic' flow scheduling systems.
+
+        N.B. Filters the scheduler's own network snapshot in place, therefore
+        does not copy the network.
         '''
-        net = copy.deepcopy(self.network)
+        net = self.network
         eps = net.graph['endpoints']
         for ep in eps:
-            ep_queues = copy.deepcopy(net.nodes[ep]) # must make copy or will miss flows since length of list changes during iteration
+            ep_queues = net.nodes[ep]
             for ep_queue in ep_queues.values():
-                for flow_dict in ep_queue['queued_flows']:
-                    if flow_dict['can_schedule'] == 0:
-                        # can't schedule, filter out of network
-                        net = self.remove_flow_from_queue(flow_dict, net)
-                    else:
-                        # can schedule
-                        pass
+                if all(flow_dict['can_schedule'] != 0 for flow_dict in ep_queue['queued_flows']):
+                    # can schedule all flows in queue, nothing to filter
+                    continue
+                # can't schedule some flows, filter out of network
+                if type(ep_queue['queued_flows']) is FlowQueue:
+                    keys = [key for key, flow_dict in ep_queue['queued_flows'].items() if flow_dict['can_schedule'] == 0]
+                    for key in keys:
+                        ep_queue['queued_flows'].remove(key)
+                        ep_queue['completion_times'].remove(key)
+                else:
+                    keep_idxs = [idx for idx, flow_dict in enumerate(ep_queue['queued_flows']) if flow_dict['can_schedule'] != 0]
+                    ep_queue['queued_flows'] = [ep_queue['queued_flows'][idx] for idx in keep_idxs]
+                    ep_queue['completion_times'] = [ep_queue['completion_times'][idx] for idx in keep_idxs]
         
         # check no bad flows left in queue
         for ep in eps:
@@ -115,8 +234,12 @@ class SchedulerToolbox_v2:
         dn = flow_dict['dst']
         queued_flows = network.nodes[sn][dn]['queued_flows']
         idx = self.find_flow_idx(flow_dict, queued_flows)
-        del network.nodes[sn][dn]['queued_flows'][idx]
-        del network.nodes[sn][dn]['completion_times'][idx]
+        if type(queued_flows) is FlowQueue:
+            network.nodes[sn][dn]['queued_flows'].remove(idx)
+            network.nodes[sn][dn]['completion_times'].remove(idx)
+        else:
+            del network.nodes[sn][dn]['queued_flows'][idx]
+            del network.nodes[sn][dn]['completion_times'][idx]
 
         return network
 
@@ -131,10 +254,19 @@ class SchedulerToolbox_v2:
         - flow_id
         - job_id
 
+        If flows is a FlowQueue, will instead look up the flow in the queue's
+        index in O(1) time and return the flow's key in the queue.
+
         Args:
         - flow (dict): flow dictionary
         - flows (list of dicts) list of flows in which to find flow idx
         '''
+        if type(flows) is FlowQueue:
+            key = FlowQueue.get_key(flow)
+            if key not in flows:
+                raise Exception('Flow {} not found in queue'.format(key))
+            return key
+
         size = flow['size']
         src = flow['src']
         dst = flow['dst']
@@ -200,9 +332,9 @@ class SchedulerToolbox_v2:
 
         Returns:
             queued_flows (dict): Maps flow_id to corresponding flow dictionary.
-            requested_edges (dict): Maps links (edges) in network being requested
-                to corresponding flow ids requesting them.
-            edge_to_flow_ids (dict): Maps edge to the list of flow ids requesting
+            requested_edges (dict): Maps link IDs of links (edges) in network being
+                requested to corresponding flow ids requesting them.
+            edge_to_flow_ids (dict): Maps link ID to the list of flow ids requesting
                 it.
             flow_id_to_cost (dict): Maps flow_id to corresponding cost of flow.
 
@@ -213,16 +345,10 @@ class SchedulerToolbox_v2:
 
         if path_channel_assignment_strategy == 'fair_share_num_flows':
             channel_to_num_flows = {channel: 0 for channel in self.rwa.channel_names}
-            edge_to_num_flows = {}
-            for edge in self.network.edges:
-                edge_to_num_flows[json.dumps(edge)] = 0
-                edge_to_num_flows[json.dumps(edge[::-1])] = 0
+            edge_to_num_flows = [0 for _ in range(len(self.link_to_index))]
         elif path_channel_assignment_strategy == 'fair_share_num_packets':
             channel_to_num_packets = {channel: 0 for channel in self.rwa.channel_names}
-            edge_to_num_packets = {}
-            for edge in self.network.edges:
-                edge_to_num_packets[json.dumps(edge)] = 0
-                edge_to_num_packets[json.dumps(edge[::-1])] = 0
+            edge_to_num_packets = [0 for _ in range(len(self.link_to_index))]
 
 
         for ep in self.network.graph['endpoints']:
@@ -248,15 +374,15 @@ class SchedulerToolbox_v2:
                         paths_num_flows = {idx: 0 for idx in range(len(flow['k_shortest_paths']))}
                         idx = 0
                         for path in flow['k_shortest_paths']:
-                            for edge in self.get_path_edges(path):
-                                paths_num_flows[idx] += edge_to_num_flows[json.dumps(edge)]
+                            for link_id in self.get_path_link_ids(path):
+                                paths_num_flows[idx] += edge_to_num_flows[link_id]
                             idx += 1
                         # choose path with lowest total number of flows on each edge
                         idx = min(paths_num_flows, key=paths_num_flows.get)
                         flow['path'] = flow['k_shortest_paths'][idx]
                         # register each edge in path as having another flow assigned
-                        for edge in self.get_path_edges(flow['path']):
-                            edge_to_num_flows[json.dumps(edge)] += 1
+                        for link_id in self.get_path_link_ids(flow['path']):
+                            edge_to_num_flows[link_id] += 1
 
                         # channel
                         # choose channel with lowest total number of flows
@@ -271,15 +397,15 @@ class SchedulerToolbox_v2:
                         paths_num_packets = {idx: 0 for idx in range(len(flow['k_shortest_paths']))}
                         idx = 0
                         for path in flow['k_shortest_paths']:
-                            for edge in self.get_path_edges(path):
-                                paths_num_packets[idx] += edge_to_num_packets[json.dumps(edge)]
+                            for link_id in self.get_path_link_ids(path):
+                                paths_num_packets[idx] += edge_to_num_packets[link_id]
                             idx += 1
                         # choose path with lowest total number of flows on each edge
                         idx = min(paths_num_packets, key=paths_num_packets.get)
                         flow['path'] = flow['k_shortest_paths'][idx]
                         # register each edge in path as having another flow assigned
-                        for edge in self.get_path_edges(flow['path']):
-                            edge_to_num_packets[json.dumps(edge)] += flow['packets']
+                        for link_id in self.get_path_link_ids(flow['path']):
+                            edge_to_num_packets[link_id] += flow['packets']
 
                         # channel
                         # choose channel with lowest total number of flows
@@ -305,12 +431,11 @@ class SchedulerToolbox_v2:
                     queued_flows[flow[identifier]] = flow
 
                     # collect requested edges
-                    edges = self.get_path_edges(flow['path'])
-                    for e in edges:
-                        if json.dumps(e) in requested_edges.keys():
-                            requested_edges[json.dumps(e)].append(flow[identifier]) # sort to keep order consistent
+                    for link_id in self.get_path_link_ids(flow['path']):
+                        if link_id in requested_edges:
+                            requested_edges[link_id].append(flow[identifier]) # sort to keep order consistent
                         else:
-                            requested_edges[json.dumps(e)] = [flow[identifier]] # sort to keep order consistent
+                            requested_edges[link_id] = [flow[identifier]] # sort to keep order consistent
 
         edge_to_flow_ids = {edge: [flow_id for flow_id in requested_edges[edge]] for edge in requested_edges.keys()}
 
@@ -326,20 +451,22 @@ class SchedulerToolbox_v2:
         return flow_info
 
     def get_edge_to_bandwidth_dict(self, requested_edges, max_bw=True):
-        '''Goes through network and maps each edge to its maximum bandwidth.
+        '''Goes through network and maps each requested link ID to its maximum bandwidth.
 
         If max_bw, gets maximum possible bandwidth on each edge.
         If not max_bw, gets available bandwidth on each edge ASSUMES ONE CHANNEL.
         '''
         edge_to_bandwidth = {}
-        for edge in requested_edges.keys():
+        for link_id in requested_edges.keys():
+            link = self.index_to_link[link_id]
+            port = self.network[link[0]][link[1]]['{}_to_{}_port'.format(link[0], link[1])]
             if max_bw:
-                bandwidth = self.network[json.loads(edge)[0]][json.loads(edge)[1]]['{}_to_{}_port'.format(json.loads(edge)[0], json.loads(edge)[1])]['max_channel_capacity']
+                bandwidth = port['max_channel_capacity']
             else:
                 # assume only one channel
                 channel = self.rwa.channel_names[0]
-                bandwidth = self.network[json.loads(edge)[0]][json.loads(edge)[1]]['{}_to_{}_port'.format(json.loads(edge)[0], json.loads(edge)[1])]['channels'][channel]
-            edge_to_bandwidth[edge] = bandwidth
+                bandwidth = port['channels'][channel]
+            edge_to_bandwidth[link_id] = bandwidth
 
         return edge_to_bandwidth
 
@@ -349,7 +476,8 @@ class SchedulerToolbox_v2:
         '''
         Goes through each edge and allocates bandwidth available on that edge
         to requesting flows until either no bandwidth left to allocate or all
-        requesting flows would be completed this time slot.
+        requesting flows would be completed this time slot. All edges are
+        allocated at once by the allocate_link_packets() kernel.
 
         If flow_id_to_cost is not None, will allocate bandwidth to flows in order of
         cost (prioritising low cost flows first). If flow_id_to_cost is None,
@@ -367,129 +495,56 @@ class SchedulerToolbox_v2:
         if resolution_strategy not in valid_resolution_strategies:
             raise Exception('resolution_strategy {} must be one of {}'.format(resolution_strategy, valid_resolution_strategies))
 
-        edge_to_sorted_costs = {}
-        edge_to_sorted_flow_ids = {}
+        # index flows and requested edges
+        flow_ids = list(flow_info['queued_flows'].keys())
+        flow_id_to_idx = {flow_id: idx for idx, flow_id in enumerate(flow_ids)}
+        edges = list(flow_info['edge_to_flow_ids'].keys())
+        flow_packets = np.asarray([flow_info['queued_flows'][flow_id]['packets'] for flow_id in flow_ids], dtype=np.int64)
+
+        # build sparse link x flow incidence matrix
+        request_link_idxs, request_flow_idxs = [], []
+        for edge_idx, edge in enumerate(edges):
+            for flow_id in flow_info['edge_to_flow_ids'][edge]:
+                request_link_idxs.append(edge_idx)
+                request_flow_idxs.append(flow_id_to_idx[flow_id])
+        incidence = scipy.sparse.csr_matrix((np.ones(len(request_link_idxs)), (request_link_idxs, request_flow_idxs)), shape=(len(edges), len(flow_ids)))
+
+        # find max total packets can schedule this slot on each link
+        max_info_per_slot = np.asarray([flow_info['edge_to_bandwidth'][edge] for edge in edges], dtype=float) * self.slot_size # info transferred per slot == info transferred per unit time * number of time units (i.e. slot size)
+        link_max_packets = (max_info_per_slot / self.packet_size).astype(np.int64) # round down
+
+        # scheduling priority of each flow (lowest first)
         if resolution_strategy == 'cost':
-            # sort requesting flow ids on each edge by order of cost (lowest to highest) -> is scheduling priority
-            for edge in flow_info['edge_to_flow_ids'].keys():
-                flow_ids = np.asarray([flow_id for flow_id in flow_info['edge_to_flow_ids'][edge]])
-                costs = np.asarray([flow_info['flow_id_to_cost'][flow_id] for flow_id in flow_info['edge_to_flow_ids'][edge]])
-                sorted_cost_index = np.argsort(costs)
-                edge_to_sorted_costs[edge] = costs[sorted_cost_index]
-                edge_to_sorted_flow_ids[edge] = flow_ids[sorted_cost_index]
+            # n.b. keep dtype of costs so ties are ordered as np.argsort() of each edge's costs always has been
+            flow_priority = np.asarray([flow_info['flow_id_to_cost'][flow_id] for flow_id in flow_ids])
+        elif resolution_strategy == 'random' or resolution_strategy == 'first_fit':
+            # schedule flows requesting each edge in a random order
+            flow_priority = np.random.permutation(len(flow_ids)).astype(float)
+        else:
+            flow_priority = np.zeros(len(flow_ids))
+
+        link_idxs, flow_idxs, packets = allocate_link_packets(incidence, link_max_packets, flow_packets, flow_priority, resolution_strategy)
 
         # init packets to schedule on each edge for each requesting flow
         edge_to_flow_id_to_packets_to_schedule = {edge:
                                                     {flow_id: 0 for flow_id in flow_info['edge_to_flow_ids'][edge]}
-                                                  for edge in flow_info['edge_to_flow_ids'].keys()}
-
-        # go through each edge and allocate available bandwidth
-        for edge in flow_info['requested_edges'].keys():
-            init_num_requests = len(flow_info['requested_edges'][edge])
-            num_requests_left = len(flow_info['requested_edges'][edge])
-            packets_scheduled_this_slot = 0
-
-            # find max total packets can schedule this slot on this link
-            max_info_per_slot = flow_info['edge_to_bandwidth'][edge] * self.slot_size # info transferred per slot == info transferred per unit time * number of time units (i.e. slot size)
-            max_packets_per_slot = int(max_info_per_slot / self.packet_size) # round down
-
-            # init packets left for flows requesting this edge
-            flow_packets_left = {flow_id: flow_info['queued_flows'][flow_id]['packets'] for flow_id in flow_info['edge_to_flow_ids'][edge]}
-
+                                                  for edge in edges}
+        edge_to_sorted_costs = {}
+        edge_to_sorted_flow_ids = {}
+        if resolution_strategy == 'cost':
+            # requesting flow ids on each edge in order of cost (lowest to highest) -> is scheduling priority
+            for edge in edges:
+                edge_to_sorted_costs[edge] = []
+                edge_to_sorted_flow_ids[edge] = []
+        for link_idx, flow_idx, packets_to_schedule in zip(link_idxs.tolist(), flow_idxs.tolist(), packets.tolist()):
+            edge, flow_id = edges[link_idx], flow_ids[flow_idx]
+            edge_to_flow_id_to_packets_to_schedule[edge][flow_id] = packets_to_schedule
             if resolution_strategy == 'cost':
-                # iterate through flows requesting this edge in order of cost, prioritising lowest cost flows first
-                sorted_flow_ids = iter(edge_to_sorted_flow_ids[edge])
-
-            # choose flows to schedule for this edge in order of scheduling priority (cost)
-            # until either cannot schedule any more flows this time slot or until
-            # all flows requesting this edge will have been complete this time slot 
-            while True:
-                # new sub-slot of time <= time slot
-
-                # find max packets can schedule for rest of time slot
-                if resolution_strategy == 'fair_share':
-                    max_packets_per_request = int((max_packets_per_slot-packets_scheduled_this_slot) / num_requests_left) # round down
-                else:
-                    max_packets_rest_of_time_slot = int(max_packets_per_slot-packets_scheduled_this_slot)
-
-                
-                ####################### COST-BASED SCHEDULING ######################
-                if resolution_strategy == 'cost':
-                    # select next highest priority flow
-                    flow_id = next(sorted_flow_ids)
-                    flow = flow_info['queued_flows'][flow_id]
-
-                    # find number of packets to schedule for this highest priority flow
-                    packets_to_schedule = min(flow['packets'], max_packets_rest_of_time_slot)
-
-                    # update trackers to indicate this flow has been scheduled by corresponding number of packets
-                    edge_to_flow_id_to_packets_to_schedule[edge][flow_id] += packets_to_schedule
-                    flow_packets_left[flow_id] -= packets_to_schedule
-                    packets_scheduled_this_slot += packets_to_schedule
-                    if flow_packets_left[flow_id] == 0:
-                        num_requests_left -= 1
-
-                    if packets_scheduled_this_slot == max_packets_per_slot or num_requests_left == 0:
-                        # finished scheduling time slot for this edge, move to next edge
-                        break
-                    else:
-                        # move to next sub-slot of overall time slot for this edge
-                        pass
-
-
-                ############################# FAIR SHARE SCHEDULING ###########################
-                elif resolution_strategy == 'fair_share':
-                    # find smallest packets left of remaining requests on this edge
-                    non_zero_packets = [packet for packet in flow_packets_left.values() if packet != 0]
-                    smallest_packets_left = min(non_zero_packets)
-
-                    # find packets to schedule per request for this sub slot
-                    packets_per_request = min(smallest_packets_left, max_packets_per_request)
-
-                    # fair share by scheduling packets per request equally for each request for this sub-slot
-                    for flow_id in flow_packets_left.keys():
-                        if flow_packets_left[flow_id] != 0:
-                            edge_to_flow_id_to_packets_to_schedule[edge][flow_id] += packets_per_request
-                            flow_packets_left[flow_id] -= packets_per_request
-                            packets_scheduled_this_slot += packets_per_request
-                            if flow_packets_left[flow_id] == 0:
-                                # all packets of this flow have now been scheduled
-                                num_requests_left -= 1
-                    
-                    if packets_scheduled_this_slot >= max_packets_per_slot-init_num_requests or num_requests_left == 0:
-                        # finished fair sharing this slot for this edge
-                        break
-                    else:
-                        # move to next sub-slot for this edge
-                        pass
-
-                ############################# RANDOM & FIRST FIT SCHEDULING ###########################
-                elif resolution_strategy == 'random' or resolution_strategy == 'first_fit':
-                    # randomly select a flow to schedule
-                    flow_id = np.random.choice(list(flow_packets_left.keys()))
-                    flow = flow_info['queued_flows'][flow_id]
-                    
-                    # find number of packets to schedule for this flow
-                    packets_to_schedule = min(flow['packets'], max_packets_rest_of_time_slot)
-
-                    # update trackers to indicate this flow has been scheduled by corresponding number of packets
-                    edge_to_flow_id_to_packets_to_schedule[edge][flow_id] += packets_to_schedule
-                    flow_packets_left[flow_id] -= packets_to_schedule
-                    packets_scheduled_this_slot += packets_to_schedule
-                    if flow_packets_left[flow_id] == 0:
-                        num_requests_left -= 1
-
-                    if packets_scheduled_this_slot == max_packets_per_slot or num_requests_left == 0:
-                        # finished scheduling time slot for this edge, move to next edge
-                        break
-                    else:
-                        # move to next sub-slot of overall time slot for this edge
-                        pass
-
-                else:
-                    raise Exception('resolution_strategy {} does not seem to be implemented.'.format(resolution_strategy))
-
-
+                edge_to_sorted_costs[edge].append(flow_priority[flow_idx])
+                edge_to_sorted_flow_ids[edge].append(flow_id)
+        for edge in edge_to_sorted_flow_ids.keys():
+            edge_to_sorted_costs[edge] = np.asarray(edge_to_sorted_costs[edge])
+            edge_to_sorted_flow_ids[edge] = np.asarray(edge_to_sorted_flow_ids[edge])
 
         # find which flows were chosen on each edge, and collect how many packets were scheduled for each chosen flow
         flow_id_to_packets_to_schedule_per_edge = {flow_id: [] for flow_id in flow_info['queued_flows'].keys()}
@@ -649,7 +704,7 @@ class SchedulerToolbox_v2:
                                 return chosen_flows
                             else:
                                 # remove conflicting flow -> move to next while loop to try again to re-establish flow
-                                flow_ids = list(scheduling_info['edge_to_flow_id_to_packets_to_schedule'][json.dumps(edge)].keys())
+                                flow_ids = list(scheduling_info['edge_to_flow_id_to_packets_to_schedule'][self.link_to_index[tuple(edge)]].keys())
                                 for _id in flow_ids:
                                     if _id in chosen_flow_ids:
                                         # found flow to discard
@@ -676,8 +731,8 @@ class SchedulerToolbox_v2:
                         ######################### COST RESOLUTION #########################
                         elif resolution_strategy == 'cost':
                             # if flow has lower cost than one of the contentions, remove highest cost (least contentious) flow and try to set up connection again
-                            costs = cost_info['edge_to_sorted_costs'][json.dumps(edge)]
-                            flow_ids = cost_info['edge_to_sorted_flow_ids'][json.dumps(edge)]
+                            costs = cost_info['edge_to_sorted_costs'][self.link_to_index[tuple(edge)]]
+                            flow_ids = cost_info['edge_to_sorted_flow_ids'][self.link_to_index[tuple(edge)]]
                             if self.debug_mode:
                                 print('flow ids requesting this edge: {}'.format(flow_ids))
                                 print('costs: {}'.format(costs))
@@ -1,9 +1,10 @@
 from trafpy.generator.src import networks
 from trafpy.generator.src import tools
 from trafpy.generator.src.demand import Demand
+from trafpy.generator.src import builder
+from trafpy.manager.src.routers.path_cache import get_path_cache, get_link_to_index, compute_k_shortest_paths
 
 import gym
-import tensorflow as tf
 import json
 import numpy as np
 import copy
@@ -11,29 +12,181 @@ import pickle
 import bz2
 import networkx as nx
 import queue
+import bisect
 import sys
 import os
 import shutil
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
 import matplotlib.animation as animation
-import cv2
 import io
 import time
 import pandas as pd
 from tabulate import tabulate
-import pympler
-from pympler import tracker
 from sqlitedict import SqliteDict
 
-import ray
-import psutil
-num_cpus = psutil.cpu_count(logical=False)
-try:
-    ray.init(num_cpus=num_cpus)
-except RuntimeError:
-    # already initialised ray in script calling dcn sim, no need to init again
-    pass
+# N.B. heavy optional dependencies (tensorflow, cv2, pympler) are imported only
+# by the features which need them (gen_machine_readable_network, rendering,
+# profile_memory) so that importing the simulator stays fast
+
+
+class BufferedSqliteDict:
+    '''
+    Persistent, write-buffered connection to a SqliteDict database.
+
+    Rather than opening a new connection, writing one record, committing and
+    closing the connection for every write, keeps a single connection (in WAL
+    journal mode) open and buffers writes in memory, flushing them to the
+    database as a single transaction every flush_every records or whenever
+    flush() is called. Reads check the write buffer before the database and
+    therefore always see the most recent writes.
+
+    Args:
+        path (str): Path to database.
+        flush_every (int): Number of buffered records at which to automatically
+            flush writes to the database.
+    '''
+    def __init__(self, path, flush_every=1000):
+        self.path = path
+        self.flush_every = flush_every
+        self.database = SqliteDict(self.path, journal_mode='WAL', autocommit=False)
+        self.buffer = {}
+
+    def __setitem__(self, key, val):
+        self.buffer[key] = val
+        if len(self.buffer) >= self.flush_every:
+            self.flush()
+
+    def __getitem__(self, key):
+        if key in self.buffer:
+            return self.buffer[key]
+        else:
+            return self.database[key]
+
+    def __contains__(self, key):
+        return key in self.buffer or key in self.database
+
+    def __len__(self):
+        self.flush()
+        return len(self.database)
+
+    def keys(self):
+        self.flush()
+        return list(self.database.keys())
+
+    def values(self):
+        self.flush()
+        return self.database.values()
+
+    def items(self):
+        self.flush()
+        return self.database.items()
+
+    def flush(self):
+        '''Writes any buffered records to database in a single transaction.'''
+        if len(self.buffer) != 0:
+            self.database.update(self.buffer)
+            self.database.commit()
+            self.buffer = {}
+
+    def close(self):
+        self.flush()
+        self.database.close()
+
+
+class LinkState:
+    '''
+    Compact array-backed store of the channel capacities of each directed link
+    in a network.
+
+    Remaining and maximum channel capacities are held in arrays of shape
+    (num directed links x num channels), with rows indexed by link_to_index and
+    columns by channel_to_index. Paths are mapped to the indices of the links
+    they traverse once and then looked up in path_to_link_idxs, so per-hop
+    capacity updates and path bottleneck checks become array operations rather
+    than '{}_to_{}_port' string formatting and nested dict look ups.
+
+    Links whose capacities have changed since they were last written back
+    into the network are flagged as dirty, so write_to_network() only has to
+    update the port dicts of those links rather than of every link.
+
+    Args:
+        network (networkx graph): Network whose fibre links (edges with
+            '{}_to_{}_port' port dicts) to track.
+        channel_names (list): Channel labels of each link.
+    '''
+    def __init__(self, network, channel_names):
+        self.channel_names = channel_names
+        self.channel_to_index = {channel: idx for idx, channel in enumerate(channel_names)}
+
+        self.link_to_index = get_link_to_index(network) # same link indices as path cache
+        self.index_to_link = list(self.link_to_index.keys())
+        max_capacities = []
+        for link in self.index_to_link:
+            port = network[link[0]][link[1]]['{}_to_{}_port'.format(link[0], link[1])]
+            max_capacities.append([port['max_channel_capacity'] for _ in channel_names])
+        self.max_capacity = np.array(max_capacities, dtype=float).reshape(len(self.index_to_link), len(channel_names))
+        self.capacity = self.max_capacity.copy()
+
+        # all links dirty to begin with so that first write_to_network() syncs whole network
+        self.dirty = np.ones(len(self.index_to_link), dtype=bool)
+
+        self.path_to_link_idxs = {}
+
+    def get_path_link_idxs(self, path):
+        '''Returns array of indices of the directed links traversed by path.'''
+        path = tuple(path)
+        try:
+            return self.path_to_link_idxs[path]
+        except KeyError:
+            link_idxs = np.array([self.link_to_index[(path[i], path[i+1])] for i in range(len(path)-1)], dtype=int)
+            self.path_to_link_idxs[path] = link_idxs
+            return link_idxs
+
+    def get_capacity(self, link, channel):
+        '''Returns remaining capacity of channel on directed link.'''
+        return self.capacity[self.link_to_index[tuple(link)], self.channel_to_index[channel]]
+
+    def get_path_capacities(self, path, channel):
+        '''Returns remaining capacity of channel on each link in path.'''
+        return self.capacity[self.get_path_link_idxs(path), self.channel_to_index[channel]]
+
+    def get_path_bottleneck(self, path, channel):
+        '''Returns lowest remaining capacity of channel across links in path.'''
+        return self.get_path_capacities(path, channel).min()
+
+    def update_path_capacity(self, path, channel, capacity_delta, num_decimals=6):
+        '''Adds capacity_delta to remaining capacity of channel on every link in path.'''
+        link_idxs, channel_idx = self.get_path_link_idxs(path), self.channel_to_index[channel]
+        self.capacity[link_idxs, channel_idx] = np.round(self.capacity[link_idxs, channel_idx] + capacity_delta, num_decimals)
+        self.dirty[link_idxs] = True
+
+    def get_link_utilisations(self):
+        '''Returns fraction of total capacity in use on each directed link.'''
+        return 1 - (self.capacity.sum(axis=1) / self.max_capacity.sum(axis=1))
+
+    def reset(self, link_idxs=None):
+        '''Resets remaining capacities of links (all links if link_idxs is None) back to their maximum capacities.'''
+        if link_idxs is None:
+            # only links which are not already at max capacity need writing back
+            self.dirty |= np.any(self.capacity != self.max_capacity, axis=1)
+            np.copyto(self.capacity, self.max_capacity)
+        else:
+            self.capacity[link_idxs, :] = self.max_capacity[link_idxs, :]
+            self.dirty[link_idxs] = True
+
+    def write_to_network(self, network, all_links=False):
+        '''Writes remaining channel capacities of dirty links (or of all links if all_links) back into network's port dicts.'''
+        if all_links:
+            link_idxs = np.arange(len(self.index_to_link))
+        else:
+            link_idxs = np.flatnonzero(self.dirty)
+        for link_idx, capacities in zip(link_idxs.tolist(), self.capacity[link_idxs].tolist()):
+            link = self.index_to_link[link_idx]
+            channels = network[link[0]][link[1]]['{}_to_{}_port'.format(link[0], link[1])]['channels']
+            for channel, capacity in zip(self.channel_names, capacities):
+                channels[channel] = capacity
+        self.dirty[link_idxs] = False
 
 
 class DCN(gym.Env):
@@ -54,7 +207,11 @@ class DCN(gym.Env):
                  track_link_concurrent_demands_evolution=True,
                  profile_memory=False,
                  memory_profile_resolution=10,
-                 gen_machine_readable_network=False):
+                 gen_machine_readable_network=False,
+                 skip_idle_slots=False,
+                 env_database_flush_every=1000,
+                 path_cache_dir=None,
+                 slot_size=None):
         '''
         If time_multiplexing, will assume perfect/ideal time multiplexing where
         can schedule as many different flows per channel so long as sum of flow
@@ -62,15 +219,26 @@ class DCN(gym.Env):
         no time multiplexing of flows occurs and therefore can only schedule
         one flow per channel.
 
-        slots_dict can either be a slots_dict dictionary, or a str path to a
-        pre-defined slots_dict database.
+        slots_dict can either be a slots_dict dictionary, a str path to a
+        pre-defined slots_dict database, or a Demand object. If a Demand object
+        (in which case slot_size must be given) or a lazy slots dict (see
+        builder.construct_demand_slots_dict()), the demands arriving in each
+        time slot are computed from the demand's sorted event times when the
+        slot is reached, so no slots_dict is built or written to a database.
 
         To reduce memory usage, set tracking grid slot & queue length evolution
         to False
 
         If env_database_path is not None, will save dicts to database path specified.
         This can significantly reduce simulation RAM memory usage, thereby allowing
-        for much larger simulations.
+        for much larger simulations. Database connections are kept open for the
+        whole simulation and writes are buffered, being flushed to the databases
+        at the end of each step or every env_database_flush_every records.
+
+        The k shortest paths between all endpoint pairs are computed once per
+        network topology and shared with the scheduler and router. If
+        path_cache_dir is not None, the path cache is also saved to (and reused
+        from) this directory.
 
         If gen_machine_readable_network, will generate tensor representation
         of current network state at each step and return it in the obs
@@ -85,6 +253,15 @@ class DCN(gym.Env):
         every memory_profile_resolution % periods of the
         total simulation time as defined by max_time. E.g. if memory_profile_resolution=10,
         will profile memory usage every 10% of max_time.
+
+        If skip_idle_slots, whenever the network is idle (i.e. no flows which
+        can be scheduled are queued), the simulation will jump straight to the
+        time slot of the next event (new demand arrival, op completion, or
+        max_time) rather than stepping through each empty time slot in turn.
+        Summary metrics (flow & job arrival/completion times, reward etc.) are
+        the same as when stepping slot-by-slot, but per-step trackers (queue
+        length, grid slot, link utilisation & concurrent demands evolution)
+        will not record the skipped idle slots.
         '''
         self.sim_name = sim_name 
         print('\nInitialising simulation \'{}\'...'.format(self.sim_name))
@@ -97,6 +274,7 @@ class DCN(gym.Env):
             self.percent_sim_times_profiled = []
             print('Snapshotting memory...')
             start = time.time()
+            from pympler import tracker
             self.tracker = tracker.SummaryTracker()
             self.tracker.print_diff()
             end = time.time()
@@ -110,12 +288,23 @@ class DCN(gym.Env):
             # create dir
             os.mkdir(env_database_path)
         self.env_database_path = env_database_path
+        self.env_database_flush_every = env_database_flush_every
+        self.databases = {} # open database connections
 
 
 
+        # network needed to check slots_dict src-dst pairs are valid
+        self.network = Network
+
         # init slots dict
+        if isinstance(slots_dict, Demand):
+            if slot_size is None:
+                raise Exception('Must specify slot_size if slots_dict is given as a Demand object.')
+            slots_dict = slots_dict.get_slots_dict(slot_size=slot_size)
         self.slots_dict = slots_dict
-        if self.env_database_path is not None:
+        # lazy slots dicts only hold slot offsets, so are kept in memory even when using databases
+        self.slots_dict_in_database = self.env_database_path is not None and not isinstance(self.slots_dict, (builder.SlotsDict, builder.StreamingSlotsDict))
+        if self.slots_dict_in_database:
             # create slots dict database
             _slots_dict = self.env_database_path + '/slots_dict.sqlite'
             print('Establishing {} slots_dict tmp database...'.format(self.sim_name))
@@ -168,25 +357,22 @@ class DCN(gym.Env):
                 self.slots_dict = slots_dict
             else:
                 # slots_dict already read into memory
-                self.check_if_pairs_valid(self.slots_dict)
                 self.slot_size = self.slots_dict['slot_size']
                 self.job_centric = self.slots_dict['job_centric']
                 self.num_demands = self.slots_dict['num_demands']
-                self.num_flows = slots_dict['num_flows']
-            self.check_if_pairs_valid(self.slots_dict)
-            self.slot_size = self.slots_dict['slot_size']
+                self.num_flows = self.slots_dict['num_flows']
+                self.check_if_pairs_valid(self.slots_dict)
 
         if type(self.slot_size) is not float:
             raise Exception('slot_size must be float (e.g. 1.0), but is {}'.format(self.slot_size))
 
         # initialise DCN environment characteristics
-        self.network = Network
         self.scheduler = Scheduler
         self.num_k_paths = num_k_paths
         self.max_flows = max_flows # max number of flows per queue
         self.max_time = max_time
         if self.max_time == 'last_demand_arrival_time':
-            if self.env_database_path is not None:
+            if self.slots_dict_in_database:
                 with SqliteDict(self.slots_dict) as slots_dict:
                     self.max_time = slots_dict['time_last_demand_arrived']
                 slots_dict.close()
@@ -200,12 +386,17 @@ class DCN(gym.Env):
         self.track_link_utilisation_evolution = track_link_utilisation_evolution
         self.track_link_concurrent_demands_evolution = track_link_concurrent_demands_evolution
         self.gen_machine_readable_network = gen_machine_readable_network
+        self.skip_idle_slots = skip_idle_slots
+        if self.skip_idle_slots:
+            self.event_slots = self.get_slots_with_new_events()
 
         self.channel_names = self.network.graph['channel_names'] 
         self.num_channels = len(self.channel_names)
+        self.path_cache = get_path_cache(self.network, self.num_k_paths, cache_dir=path_cache_dir)
 
         # init representation generator
         if self.gen_machine_readable_network:
+            import tensorflow as tf
             with tf.device('/cpu'):
                 self.repgen = RepresentationGenerator(self)
 
@@ -238,6 +429,9 @@ class DCN(gym.Env):
         '''
         print('Resetting simulation \'{}\'...'.format(self.sim_name))
 
+        # close any database connections left open by previous simulation
+        self.close_databases()
+
         self.curr_step = 0
         self.curr_time = 0
 
@@ -319,6 +513,8 @@ class DCN(gym.Env):
 
 
         self.network = self.init_virtual_queues(self.network)
+        self.link_state = LinkState(self.network, self.channel_names)
+        self.link_state.path_to_link_idxs.update(self.path_cache.get_path_to_link_idxs())
         if self.track_queue_length_evolution:
             self.queue_evolution_dict = self.init_queue_evolution(self.network)
         if self.track_grid_slot_evolution:
@@ -358,6 +554,30 @@ class DCN(gym.Env):
         else:
             return None
 
+    def get_database(self, path):
+        '''Returns open (buffered) connection to database at path, opening one if needed.'''
+        if path not in self.databases:
+            self.databases[path] = BufferedSqliteDict(path, flush_every=self.env_database_flush_every)
+        return self.databases[path]
+
+    def flush_databases(self):
+        '''Writes any buffered records to their databases.'''
+        for database in self.databases.values():
+            database.flush()
+
+    def close_databases(self):
+        '''Flushes and closes all open database connections.'''
+        for database in self.databases.values():
+            database.close()
+        self.databases = {}
+
+    def __getstate__(self):
+        # database connections cannot be pickled, ensure all writes are on disk and drop connections
+        self.flush_databases()
+        state = self.__dict__.copy()
+        state['databases'] = {}
+        return state
+
     def check_if_pairs_valid(self, slots_dict):
         '''
         Since the network and the demand for a simulation are created separately,
@@ -368,7 +588,7 @@ class DCN(gym.Env):
         of the slots dict to try to catch this error before the simulation is
         ran.
         '''
-        key = list(slots_dict['slot_keys'])[0]
+        key = next(iter(slots_dict['slot_keys']))
         slot = slots_dict[key]
         for event in slot['new_event_dicts']:
             if self.job_centric:
@@ -401,8 +621,7 @@ class DCN(gym.Env):
         num_flows = len(queue['queued_flows'])
         
         queue_length_bytes = 0
-        for flow_idx in range(num_flows):
-            flow_dict = queue['queued_flows'][flow_idx]
+        for flow_dict in queue['queued_flows']:
             if flow_dict['packets'] is None:
                 # scheduler agent not yet chosen this flow therefore don't 
                 # know chosen packet sizes, so size == original flow size
@@ -433,12 +652,7 @@ class DCN(gym.Env):
 
     def get_channel_bandwidth(self, edge, channel):
         '''Gets current channel bandwidth left on a given edge in the network.'''
-        try:
-            # return self.network[edge[0]][edge[1]]['channels'][channel]
-            return self.network[edge[0]][edge[1]]['{}_to_{}_port'.format(edge[0], edge[1])]['channels'][channel]
-        except KeyError:
-            # return self.network[edge[1]][edge[0]]['channels'][channel]
-            return self.network[edge[1]][edge[0]]['{}_to_{}_port'.format(edge[0], edge[1])]['channels'][channel]
+        return self.link_state.get_capacity(edge, channel)
 
     def init_grid_slot_evolution(self, Graph):
         grid_slot_dict = {ep:
@@ -497,42 +711,33 @@ class DCN(gym.Env):
     def check_chosen_flows_valid(self, chosen_flows):
         self.time_check_valid_start = time.time()
 
-        # init channel link occupation dict
-        edge_channel_occupation = {json.dumps(edge): 
+        # init channel link occupation dict (keyed by undirected edge ID i.e. link ID // 2, since both directions of an edge have adjacent link IDs)
+        edge_channel_occupation = {edge_id: 
                                     {channel: 'unoccupied' for channel in self.channel_names}
-                                   for edge in self.network.edges}
+                                   for edge_id in range(len(self.link_state.link_to_index) // 2)}
 
         # update any channel links which are now occupied 
         for flow in chosen_flows:
             path, channel = flow['path'], flow['channel']
-            edges = self.get_path_edges(path)
-            for edge in edges:
-                try:
-                    if edge_channel_occupation[json.dumps(edge)][channel] != 'unoccupied':
-                        raise Exception('Scheduler chose flow {}, however at least one of the edge channels in this chosen path-channel is already occupied by flow {}. Resolve contentions before passing chosen flows to DCN simulation environment.'.format(flow, edge_channel_occupation[json.dumps(edge)][channel]))
-                    edge_channel_occupation[json.dumps(edge)][channel] = flow
-                except KeyError:
-                    if edge_channel_occupation[json.dumps(edge[::-1])][channel] != 'unoccupied':
-                        raise Exception('Scheduler chose flow {}, however at least one of the edge channels in this chosen path-channel is already occupied by flow {}. Resolve contentions before passing chosen flows to DCN simulation environment.'.format(flow, edge_channel_occupation[json.dumps(edge[::-1])][channel]))
-                    edge_channel_occupation[json.dumps(edge[::-1])][channel] = flow
+            for link_id in self.link_state.get_path_link_idxs(path):
+                edge_id = link_id // 2
+                if edge_channel_occupation[edge_id][channel] != 'unoccupied':
+                    raise Exception('Scheduler chose flow {}, however at least one of the edge channels in this chosen path-channel is already occupied by flow {}. Resolve contentions before passing chosen flows to DCN simulation environment.'.format(flow, edge_channel_occupation[edge_id][channel]))
+                edge_channel_occupation[edge_id][channel] = flow
 
         self.time_check_valid_end = time.time()
 
     def update_link_utilisation_evolution(self):
         if self.env_database_path is not None:
-            link_utilisation_dict = SqliteDict(self.link_utilisation_dict)
+            link_utilisation_dict = self.get_database(self.link_utilisation_dict)
         else:
             link_utilisation_dict = self.link_utilisation_dict
 
+        link_utils = self.link_state.get_link_utilisations()
         for link in link_utilisation_dict.keys():
             link = json.loads(link)
             # src-dst
-            available_link_bw = 0
-            max_link_bw = 0
-            for channel in self.channel_names:
-                available_link_bw += self.get_channel_bandwidth(link, channel)
-                max_link_bw += self.network[link[0]][link[1]]['{}_to_{}_port'.format(link[0], link[1])]['max_channel_capacity']
-            link_util = 1-(available_link_bw / max_link_bw)
+            link_util = link_utils[self.link_state.link_to_index[tuple(link)]]
             # get link dict
             link_dict = link_utilisation_dict[json.dumps(link)]
             # update dict
@@ -542,12 +747,7 @@ class DCN(gym.Env):
 
             # dst-src
             link = link[::-1]
-            available_link_bw = 0
-            max_link_bw = 0
-            for channel in self.channel_names:
-                available_link_bw += self.get_channel_bandwidth(link, channel)
-                max_link_bw += self.network[link[0]][link[1]]['{}_to_{}_port'.format(link[0], link[1])]['max_channel_capacity']
-            link_util = 1-(available_link_bw / max_link_bw)
+            link_util = link_utils[self.link_state.link_to_index[tuple(link)]]
             # get link dict
             link_dict = link_utilisation_dict[json.dumps(link)]
             # update dict
@@ -556,8 +756,7 @@ class DCN(gym.Env):
             link_utilisation_dict[json.dumps(link)] = link_dict
 
         if self.env_database_path is not None:
-            link_utilisation_dict.commit()
-            link_utilisation_dict.close()
+            pass # writes are flushed to database at end of each step
         else:
             self.link_utilisation_dict = link_utilisation_dict
 
@@ -565,7 +764,7 @@ class DCN(gym.Env):
     def update_link_concurrent_demands_evolution(self, link, num_concurrent_demands_to_add=1):
         '''Adds num_concurrent_demands_to_add to current number of concurrent demands on a given link.'''
         if self.env_database_path is not None:
-            link_concurrent_demands_dict = SqliteDict(self.link_concurrent_demands_dict)
+            link_concurrent_demands_dict = self.get_database(self.link_concurrent_demands_dict)
         else:
             link_concurrent_demands_dict = self.link_concurrent_demands_dict
 
@@ -581,8 +780,7 @@ class DCN(gym.Env):
         link_concurrent_demands_dict[json.dumps(link)] = link_dict
 
         if self.env_database_path is not None:
-            link_concurrent_demands_dict.commit()
-            link_concurrent_demands_dict.close()
+            pass # writes are flushed to database at end of each step
         else:
             self.link_concurrent_demands_dict = link_concurrent_demands_dict
 
@@ -647,8 +845,8 @@ class DCN(gym.Env):
         # initialise queues at each endpoint as node attributes
         attrs = {ep: 
                     {dst: 
-                          {'queued_flows': [],
-                           'completion_times': []}
+                          {'queued_flows': networks.FlowQueue(),
+                           'completion_times': networks.FlowQueue()}
                           for dst in [dst for dst in Graph.graph['endpoints'] if dst != ep]} 
                     for ep in Graph.graph['endpoints']}
 
@@ -691,8 +889,8 @@ class DCN(gym.Env):
         
         if add_flow:
             # enough space in queue, add flow
-            self.network.nodes[src][dst]['queued_flows'].append(flow_dict)
-            self.network.nodes[src][dst]['completion_times'].append(None)
+            self.network.nodes[src][dst]['queued_flows'].append(flow_dict, key=flow_dict[identifier])
+            self.network.nodes[src][dst]['completion_times'].append(None, key=flow_dict[identifier])
         else:
             # no space in queue, must drop flow
             if self.env_database_path is not None:
@@ -700,12 +898,10 @@ class DCN(gym.Env):
                     # dropped_id = flow_dict['job_id']+'_'+flow_dict['flow_id']
                 # else:
                     # dropped_id = flow_dict['flow_id']
-                with SqliteDict(self.dropped_flow_dicts) as dropped_flow_dicts:
-                    # dropped_flow_dicts[flow_dict['flow_id']] = flow_dict
-                    # dropped_flow_dicts[dropped_id] = flow_dict
-                    dropped_flow_dicts[flow_dict[identifier]] = flow_dict
-                    dropped_flow_dicts.commit()
-                    dropped_flow_dicts.close()
+                dropped_flow_dicts = self.get_database(self.dropped_flow_dicts)
+                # dropped_flow_dicts[flow_dict['flow_id']] = flow_dict
+                # dropped_flow_dicts[dropped_id] = flow_dict
+                dropped_flow_dicts[flow_dict[identifier]] = flow_dict
             else:
                 # self.dropped_flow_dicts[flow_dict['flow_id']] = flow_dict
                 # self.dropped_flow_dicts[dropped_id] = flow_dict
@@ -717,10 +913,8 @@ class DCN(gym.Env):
                         # drop job
                         # self.dropped_jobs.append(job_dict)
                         if self.env_database_path is not None:
-                            with SqliteDict(self.dropped_job_dicts) as dropped_job_dicts:
-                                dropped_job_dicts[job_dict['job_id']] = job_dict
-                                dropped_job_dicts.commit()
-                                dropped_job_dicts.close()
+                            dropped_job_dicts = self.get_database(self.dropped_job_dicts)
+                            dropped_job_dicts[job_dict['job_id']] = job_dict
                         else:
                             self.dropped_job_dicts[job_dict['job_id']] = job_dict
                         self.num_dropped_jobs += 1
@@ -740,10 +934,8 @@ class DCN(gym.Env):
         self.num_arrived_jobs += 1
         # self.arrived_job_dicts.append(job_dict)
         if self.env_database_path is not None:
-            with SqliteDict(self.arrived_job_dicts) as arrived_job_dicts:
-                arrived_job_dicts[job_dict['job_id']] = job_dict
-                arrived_job_dicts.commit()
-                arrived_job_dicts.close()
+            arrived_job_dicts = self.get_database(self.arrived_job_dicts)
+            arrived_job_dicts[job_dict['job_id']] = job_dict
         else:
             self.arrived_job_dicts[job_dict['job_id']] = job_dict
         self.network.graph['queued_jobs'].append(job_dict)
@@ -776,10 +968,8 @@ class DCN(gym.Env):
                         flows_to_complete.append(flow_dict)
                     # add control dependency to arrived control dependencies
                     if self.env_database_path is not None:
-                        with SqliteDict(self.control_deps) as control_deps:
-                            control_deps[flow_dict['unique_id']] = flow_dict
-                            control_deps.commit()
-                            control_deps.close()
+                        control_deps = self.get_database(self.control_deps)
+                        control_deps[flow_dict['unique_id']] = flow_dict
                     else:
                         self.control_deps[flow_dict['unique_id']] = flow_dict
                     self.num_arrived_control_deps += 1
@@ -859,7 +1049,7 @@ class DCN(gym.Env):
                         pass
 
         if self.env_database_path is not None:
-            control_deps = SqliteDict(self.control_deps)
+            control_deps = self.get_database(self.control_deps)
         else:
             control_deps = self.control_deps
 
@@ -908,8 +1098,7 @@ class DCN(gym.Env):
             control_deps[key] = val
 
         if self.env_database_path is not None:
-            control_deps.commit()
-            control_deps.close()
+            pass # writes are flushed to database at end of each step
         else:
             self.control_deps = control_deps
 
@@ -962,7 +1151,7 @@ class DCN(gym.Env):
         for ep in eps:
             ep_queues = self.network.nodes[ep]
             for ep_queue in ep_queues.values():
-                for f in ep_queue['queued_flows']:
+                for f in list(ep_queue['queued_flows']): # copy since removing flows from queue during iteration
                     if f['job_id'] == job_dict['job_id']:
                         self.remove_flow_from_queue(f)
                     else:
@@ -980,8 +1169,9 @@ class DCN(gym.Env):
             dn = flow_dict['dst']
             queued_flows = self.network.nodes[sn][dn]['queued_flows']
             idx = self.find_flow_idx(flow_dict, queued_flows)
-            del self.network.nodes[sn][dn]['queued_flows'][idx]
-            del self.network.nodes[sn][dn]['completion_times'][idx]
+            # O(1) removal using queue's flow index
+            self.network.nodes[sn][dn]['queued_flows'].remove(idx)
+            self.network.nodes[sn][dn]['completion_times'].remove(idx)
     
     def register_completed_flow(self, flow_dict, print_times=False):
         '''
@@ -1007,12 +1197,10 @@ class DCN(gym.Env):
         if flow_dict['size'] != 0 and flow_dict['src'] != flow_dict['dst']:
             # flow was an actual flow
             if self.env_database_path is not None:
-                with SqliteDict(self.completed_flow_dicts) as completed_flow_dicts:
-                    # completed_flow_dicts[flow_dict['flow_id']] = flow_dict
-                    # completed_flow_dicts[completion_id] = flow_dict
-                    completed_flow_dicts[flow_dict[identifier]] = flow_dict
-                    completed_flow_dicts.commit()
-                    completed_flow_dicts.close()
+                completed_flow_dicts = self.get_database(self.completed_flow_dicts)
+                # completed_flow_dicts[flow_dict['flow_id']] = flow_dict
+                # completed_flow_dicts[completion_id] = flow_dict
+                completed_flow_dicts[flow_dict[identifier]] = flow_dict
             else:
                 # self.completed_flow_dicts[flow_dict['flow_id']] = flow_dict
                 # self.completed_flow_dicts[completion_id] = flow_dict
@@ -1074,10 +1262,8 @@ class DCN(gym.Env):
                     # self.arrived_flows[arrival_id] = 'present'
                     self.arrived_flows[flow_dict[identifier]] = 'present'
                     if self.env_database_path is not None:
-                        with SqliteDict(self.arrived_flow_dicts) as arrived_flow_dicts:
-                            arrived_flow_dicts[flow_dict[identifier]] = flow_dict
-                            arrived_flow_dicts.commit()
-                            arrived_flow_dicts.close()
+                        arrived_flow_dicts = self.get_database(self.arrived_flow_dicts)
+                        arrived_flow_dicts[flow_dict[identifier]] = flow_dict
                     else:
                         # self.arrived_flow_dicts[arrival_id] = flow_dict
                         self.arrived_flow_dicts[flow_dict[identifier]] = flow_dict
@@ -1098,13 +1284,8 @@ class DCN(gym.Env):
         link in the path * the slot size)
         '''
         packet_size = flow_dict['packet_size']
-        path_links = self.get_path_edges(flow_dict['path'])
         channel = flow_dict['channel']
-        link_bws = []
-        for link in path_links:
-            # link_bws.append(self.network[link[0]][link[1]]['channels'][channel])
-            link_bws.append(self.network[link[0]][link[1]]['{}_to_{}_port'.format(link[0], link[1])]['channels'][channel])
-        capacity = min(link_bws) # channel capacity == info transferred per unit time
+        capacity = self.link_state.get_path_bottleneck(flow_dict['path'], channel) # channel capacity == info transferred per unit time
         info_per_slot = capacity  * self.slot_size # info transferred per slot == info transferred per unit time * number of time units (i.e. slot size)
         packets_per_slot = int(info_per_slot / packet_size) # round down 
 
@@ -1125,12 +1306,13 @@ class DCN(gym.Env):
         dn = flow_dict['dst']
         queued_flows = self.network.nodes[sn][dn]['queued_flows']
         idx = self.find_flow_idx(flow_dict, queued_flows)
-        queued_flows[idx]['packets'] -= flow_dict['packets_this_slot']
-        queued_flows[idx]['packets_this_slot'] = flow_dict['packets_this_slot']
-        if queued_flows[idx]['packets'] < 0:
-            queued_flows[idx]['packets'] = 0
+        queued_flow = queued_flows.get(idx)
+        queued_flow['packets'] -= flow_dict['packets_this_slot']
+        queued_flow['packets_this_slot'] = flow_dict['packets_this_slot']
+        if queued_flow['packets'] < 0:
+            queued_flow['packets'] = 0
         
-        updated_flow = copy.copy(queued_flows[idx])
+        updated_flow = copy.copy(queued_flow)
         if updated_flow['packets'] == 0:
             # all packets transported, flow completed
             self.register_completed_flow(updated_flow)
@@ -1155,20 +1337,25 @@ class DCN(gym.Env):
     def next_observation(self):
         '''
         Compiles simulator data and returns observation
+
+        N.B. observation['network'] is a read-only view of the simulator's
+        current network state rather than a copy of it. Schedulers which need to
+        modify the network (e.g. to set up connections or filter flows) should
+        take their own snapshot of it (see SchedulerToolbox_v2.update_network_state
+        and trafpy.generator.src.networks.snapshot_network_state).
         '''
         self.time_next_obs_start = time.time()
         try:
-            if self.env_database_path is not None:
+            if self.slots_dict_in_database:
                 # read from database
-                with SqliteDict(self.slots_dict) as slots_dict:
-                    observation = {'slot_dict': slots_dict[json.dumps(self.curr_step)],
-                                   'network': copy.deepcopy(self.network)}
-                    self.update_curr_time(observation['slot_dict'])
-                    slots_dict.close()
+                slots_dict = self.get_database(self.slots_dict)
+                observation = {'slot_dict': slots_dict[json.dumps(self.curr_step)],
+                               'network': self.network}
+                self.update_curr_time(observation['slot_dict'])
             else:
                 # stored in memory
                 observation = {'slot_dict': self.slots_dict[self.curr_step],
-                               'network': copy.deepcopy(self.network)}
+                               'network': self.network}
                 self.update_curr_time(observation['slot_dict'])
             # add any new events (flows or jobs) to queues
             observation = self.add_flows_to_queues(observation)
@@ -1177,17 +1364,16 @@ class DCN(gym.Env):
         except KeyError:
             # curr step either exceeded slots dict indices (no new flows/jobs arriving) or this step was not included in slots_dict since no demands arrived
             # index slot_dict with most recent valid curr step
-            if self.env_database_path is not None:
+            if self.slots_dict_in_database:
                 # read from database
-                with SqliteDict(self.slots_dict) as slots_dict:
-                    observation = {'slot_dict': slots_dict[json.dumps(self.most_recent_valid_curr_step)],
-                                   'network': copy.deepcopy(self.network)}
-                    self.update_curr_time(observation['slot_dict'])
-                    slots_dict.close()
+                slots_dict = self.get_database(self.slots_dict)
+                observation = {'slot_dict': slots_dict[json.dumps(self.most_recent_valid_curr_step)],
+                               'network': self.network}
+                self.update_curr_time(observation['slot_dict'])
             else:
                 # stored in memory
                 observation = {'slot_dict': self.slots_dict[self.most_recent_valid_curr_step],
-                               'network': copy.deepcopy(self.network)}
+                               'network': self.network}
                 self.update_curr_time(observation['slot_dict'])
         
         # update any dependencies of running ops
@@ -1195,6 +1381,7 @@ class DCN(gym.Env):
             observation = self.update_running_op_dependencies(observation)
 
         if self.gen_machine_readable_network:
+            import tensorflow as tf
             with tf.device('/cpu'):
                 # create machine readable version of current network state
                 _, observation['machine_readable_network'] = self.repgen.gen_machine_readable_network_observation(observation['network'], dtype=tf.float16)
@@ -1468,6 +1655,7 @@ class DCN(gym.Env):
         buf.seek(0)
         img_arr = np.frombuffer(buf.getvalue(), dtype=np.uint8)
         buf.close()
+        import cv2
         img = cv2.imdecode(img_arr,1)
         img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
 
@@ -1493,10 +1681,8 @@ class DCN(gym.Env):
         self.num_completed_jobs += 1
         # self.completed_jobs.append(job_dict)
         if self.env_database_path is not None:
-            with SqliteDict(self.completed_job_dicts) as completed_job_dicts:
-                completed_job_dicts[job_dict['job_id']] = job_dict
-                completed_job_dicts.commit()
-                completed_job_dicts.close()
+            completed_job_dicts = self.get_database(self.completed_job_dicts)
+            completed_job_dicts[job_dict['job_id']] = job_dict
         else:
             self.completed_job_dicts[job_dict['job_id']] = job_dict
         # jct = job_dict['time_completed']-job_dict['time_arrived']
@@ -1529,7 +1715,7 @@ class DCN(gym.Env):
 
         # check job ctrl deps
         if self.env_database_path is not None:
-            control_deps = SqliteDict(self.control_deps)
+            control_deps = self.get_database(self.control_deps)
         else:
             control_deps = self.control_deps
 
@@ -1539,9 +1725,6 @@ class DCN(gym.Env):
                 job_ctrl_deps_completed = False
                 break
 
-        if self.env_database_path is not None:
-            control_deps.close()
-
         if job_flows_completed == True and job_ctrl_deps_completed == True:
             # register completed job
             for job in self.network.graph['queued_jobs']:
@@ -1562,7 +1745,7 @@ class DCN(gym.Env):
         eps = self.network.graph['endpoints']
 
         if self.env_database_path is not None:
-            control_deps = SqliteDict(self.control_deps)
+            control_deps = self.get_database(self.control_deps)
         else:
             control_deps = self.control_deps
         _control_deps = {} # tmp dict so don't need to edit dict during loop (crashes database)
@@ -1643,8 +1826,7 @@ class DCN(gym.Env):
             control_deps[key] = val
 
         if self.env_database_path is not None:
-            control_deps.commit()
-            control_deps.close()
+            pass # writes are flushed to database at end of each step
         else:
             self.control_deps = control_deps
                     
@@ -1657,7 +1839,7 @@ class DCN(gym.Env):
             dn = flow['dst']
             queued_flows = self.network.nodes[sn][dn]['queued_flows']
             idx = self.find_flow_idx(flow, queued_flows)
-            dated_flow = self.network.nodes[sn][dn]['queued_flows'][idx]
+            dated_flow = queued_flows.get(idx)
             dated_flow['packets_this_slot'] = flow['packets_this_slot']
             if dated_flow['packets'] is None:
                 # udpate flow packets and k shortest paths
@@ -1670,14 +1852,17 @@ class DCN(gym.Env):
 
         self.time_update_flow_attrs_end = time.time()
 
-    def reset_channel_capacities_of_edges(self, edges):
-        '''Takes edges and resets their available capacities back to their maximum capacities.'''
-        for edge in edges:
-            # for channel in self.network[edge[0]][edge[1]]['channels']:
-            for channel in self.network[edge[0]][edge[1]]['{}_to_{}_port'.format(edge[0], edge[1])]['channels']:
+    def reset_channel_capacities_of_edges(self, edges=None):
+        '''
+        Takes edges and resets their available capacities back to their maximum capacities.
+        If edges is None, resets all edges in the network with a single array copy.
+        '''
+        if edges is None:
+            self.link_state.reset()
+        else:
+            for edge in edges:
                 # reset channel capacity of both ports
-                self.network[edge[0]][edge[1]]['{}_to_{}_port'.format(edge[0], edge[1])]['channels'][channel] = self.network[edge[0]][edge[1]]['{}_to_{}_port'.format(edge[0], edge[1])]['max_channel_capacity']
-                self.network[edge[1]][edge[0]]['{}_to_{}_port'.format(edge[1], edge[0])]['channels'][channel] = self.network[edge[0]][edge[1]]['{}_to_{}_port'.format(edge[0], edge[1])]['max_channel_capacity']
+                self.link_state.reset([self.link_state.link_to_index[link] for link in [(edge[0], edge[1]), (edge[1], edge[0])]])
         # update global graph property
         self.network.graph['curr_nw_capacity_used'] = 0
 
@@ -1686,7 +1871,7 @@ class DCN(gym.Env):
         self.time_take_action_start = time.time()
 
         # reset channel capacities of all links (start with no flows scheduled therefore all channel capacity is available before action is taken)
-        self.reset_channel_capacities_of_edges(self.network.edges)
+        self.reset_channel_capacities_of_edges()
 
         # unpack chosen action
         chosen_flows = action['chosen_flows']
@@ -1713,22 +1898,13 @@ class DCN(gym.Env):
             self.set_up_connection(chosen_flow)
         self.time_establish_flows_end = time.time()
 
-        # take down replaced flows
+        # N.B. no need to take down previously connected flows which were not re-chosen, since all channel capacities were reset before establishing chosen flows
         self.time_takedown_flows_start = time.time()
-        for prev_chosen_flow in self.connected_flows:
-            #flow_established, _ = self.check_flow_present(prev_chosen_flow, chosen_flows)
-            if self.connected_flows == 0:
-                # no flows chosen previously
-                pass
-            #elif flow_established:
-            elif self.check_flow_present(prev_chosen_flow, chosen_flows):
-                # prev chosen flow has been re-chosen, leave
-                pass
-            else:
-                # prev chosen flow not re-chosen, take down connection
-                self.take_down_connection(prev_chosen_flow)
         self.time_takedown_flows_end = time.time()
 
+        # write updated link capacities back into network so observation reflects them
+        self.link_state.write_to_network(self.network)
+
 
 
         # all chosen flows established and any removed flows taken down
@@ -1815,7 +1991,10 @@ class DCN(gym.Env):
 
     def display_env_memory_usage(self, obs):
         # slots_dict
-        slots_dict_size = sys.getsizeof(json.dumps(self.slots_dict))
+        if isinstance(self.slots_dict, (builder.SlotsDict, builder.StreamingSlotsDict)):
+            slots_dict_size = sys.getsizeof(pickle.dumps(self.slots_dict))
+        else:
+            slots_dict_size = sys.getsizeof(json.dumps(self.slots_dict))
 
         # network
         network_size = sys.getsizeof(pickle.dumps(self.network)) 
@@ -1888,9 +2067,19 @@ class DCN(gym.Env):
         self.curr_step += 1
         reward = self.calc_reward()
         done = self.check_if_done()
+        if self.skip_idle_slots and not done:
+            # idle slots would each have received the same reward
+            num_skipped_slots = self.skip_to_next_event()
+            reward *= (1 + num_skipped_slots)
         info = None
         obs = self.next_observation()
 
+        if self.env_database_path is not None:
+            if done:
+                self.close_databases()
+            else:
+                self.flush_databases()
+
         self.time_step_end = time.time()
 
 
@@ -2034,6 +2223,114 @@ class DCN(gym.Env):
                     self.check_if_any_flows_arrived()
                     return True
 
+    def get_slots_with_new_events(self):
+        '''Returns sorted list of slot indices (steps) in which new demands arrive.'''
+        if self.slots_dict_in_database:
+            slots_dict = self.get_database(self.slots_dict)
+            event_slots = [slot for slot in slots_dict['slot_keys'] if len(slots_dict[json.dumps(slot)]['new_event_dicts']) != 0]
+        elif isinstance(self.slots_dict, builder.SlotsDict):
+            # no need to generate event dicts to find slots with new events
+            event_slots = self.slots_dict.get_slots_with_new_events()
+        else:
+            event_slots = [slot for slot in self.slots_dict['slot_keys'] if len(self.slots_dict[slot]['new_event_dicts']) != 0]
+
+        return sorted(event_slots)
+
+    def check_if_network_idle(self):
+        '''
+        Checks if network is idle i.e. no flows which can be scheduled are
+        queued, therefore nothing can happen until the next event (demand arrival
+        or op completion).
+        '''
+        eps = self.network.graph['endpoints']
+        for ep in eps:
+            ep_queues = self.network.nodes[ep]
+            for ep_queue in ep_queues.values():
+                for flow_dict in ep_queue['queued_flows']:
+                    if flow_dict['can_schedule'] == 1:
+                        return False
+
+        return True
+
+    def get_op_completion_times(self):
+        '''Returns times at which any currently running ops will complete.'''
+        op_completion_times = []
+
+        # queued flows waiting on parent op
+        eps = self.network.graph['endpoints']
+        for ep in eps:
+            ep_queues = self.network.nodes[ep]
+            for ep_queue in ep_queues.values():
+                for flow_dict in ep_queue['queued_flows']:
+                    if flow_dict['time_parent_op_started'] is not None and flow_dict['can_schedule'] == 0:
+                        op_completion_times.append(flow_dict['time_parent_op_started'] + flow_dict['parent_op_run_time'])
+
+        # control dependencies waiting on parent op
+        if self.env_database_path is not None:
+            control_deps = self.get_database(self.control_deps)
+        else:
+            control_deps = self.control_deps
+        for dep in control_deps.values():
+            if dep['time_parent_op_started'] is not None and dep['time_completed'] is None:
+                op_completion_times.append(dep['time_parent_op_started'] + dep['parent_op_run_time'])
+
+        return op_completion_times
+
+    def get_next_event_step(self):
+        '''
+        Returns the step at which the next event (new demand arrival, op completion
+        or max_time reached) occurs. Returns None if no further events will occur.
+
+        N.B. The simulator time at step k is curr_time + (k - (curr_step-1)) * slot_size,
+        so time-based events are conservatively rounded down to the step at
+        or before which they occur.
+        '''
+        candidate_steps = []
+
+        # next demand arrival
+        idx = bisect.bisect_left(self.event_slots, self.curr_step)
+        if idx < len(self.event_slots):
+            candidate_steps.append(self.event_slots[idx])
+
+        # next time-based event
+        event_times = []
+        if self.job_centric:
+            event_times.extend(self.get_op_completion_times())
+        if self.max_time is not None:
+            event_times.append(self.max_time)
+        for event_time in event_times:
+            num_slots_to_event = int(np.floor((event_time - self.curr_time) / self.slot_size))
+            candidate_steps.append(self.curr_step - 1 + max(1, num_slots_to_event))
+
+        if len(candidate_steps) == 0:
+            return None
+        else:
+            return min(candidate_steps)
+
+    def skip_to_next_event(self):
+        '''
+        If network is idle, moves curr_step & curr_time forward to the step
+        of the next event so that next_observation() will observe the next 
+        event without stepping through each idle slot in between.
+
+        Returns:
+        - num_skipped_slots (int): number of idle slots skipped
+        '''
+        if not self.check_if_network_idle():
+            return 0
+
+        next_event_step = self.get_next_event_step()
+        if next_event_step is None or next_event_step <= self.curr_step:
+            return 0
+
+        num_skipped_slots = next_event_step - self.curr_step
+        self.curr_step = next_event_step
+        self.curr_time += num_skipped_slots * self.slot_size
+        num_decimals = str(self.slot_size)[::-1].find('.')
+        self.curr_time = round(self.curr_time, num_decimals)
+
+        return num_skipped_slots
+
 
     def get_path_edges(self, path):
         '''
@@ -2063,11 +2360,18 @@ class DCN(gym.Env):
         - flow_id
         - job_id
 
+        If flows is a FlowQueue, will instead look up the flow in the queue's
+        index in O(1) time and return the flow's key in the queue as its idx.
+
         Args:
         - flow (dict): flow dictionary
         - flows (list of dicts) list of flows in which to check if flow is
         present
         '''
+        if type(flows) is networks.FlowQueue:
+            key = networks.FlowQueue.get_key(flow)
+            return key in flows, key
+
         size = flow['size']
         src = flow['src']
         dst = flow['dst']
@@ -2097,10 +2401,19 @@ class DCN(gym.Env):
         - flow_id
         - job_id
 
+        If flows is a FlowQueue, will instead look up the flow in the queue's
+        index in O(1) time and return the flow's key in the queue as its idx.
+
         Args:
         - flow (dict): flow dictionary
         - flows (list of dicts) list of flows in which to find flow idx
         '''
+        if type(flows) is networks.FlowQueue:
+            key = networks.FlowQueue.get_key(flow)
+            if key not in flows:
+                raise Exception('Flow {} not found in queue'.format(key))
+            return key
+
         size = flow['size']
         src = flow['src']
         dst = flow['dst']
@@ -2117,7 +2430,7 @@ class DCN(gym.Env):
                 # flow not found, move to next f in flows
                 idx += 1
         
-        return sys.exit('Flow not found in list of flows')
+        raise Exception('Flow not found in list of flows')
     
     
     def check_if_channel_used(self, graph, edges, channel):
@@ -2173,24 +2486,21 @@ class DCN(gym.Env):
         capacity_used_this_slot = round(info_to_transfer_this_slot / self.slot_size, num_decimals) # info units of this flow transferred this time slot == capacity used on each channel in flow's path this time slot
 
 
-        edges = self.get_path_edges(path)
-        num_edges = len(edges)
-        for edge in range(num_edges):
-            node_pair = edges[edge]
-
-            # check that establishing this flow is valid given edge capacity constraints
-            if self.network[node_pair[0]][node_pair[1]]['{}_to_{}_port'.format(node_pair[0], node_pair[1])]['channels'][channel] - capacity_used_this_slot < 0:
-                raise Exception('Tried to set up flow {} on edge {} channel {}, but this results in a negative channel capacity on this edge i.e. this edge\'s channel is full, cannot have more flow packets scheduled! Scheduler should not be giving invalid chosen flow sets to the environment.'.format(flow, node_pair, channel)) 
+        # check that establishing this flow is valid given edge capacity constraints
+        path_capacities = self.link_state.get_path_capacities(path, channel)
+        if (path_capacities - capacity_used_this_slot < 0).any():
+            node_pair = self.get_path_edges(path)[int(np.argmin(path_capacities))]
+            raise Exception('Tried to set up flow {} on edge {} channel {}, but this results in a negative channel capacity on this edge i.e. this edge\'s channel is full, cannot have more flow packets scheduled! Scheduler should not be giving invalid chosen flow sets to the environment.'.format(flow, node_pair, channel)) 
 
-            # update edge capacity remaining after establish this flow
-            self.network[node_pair[0]][node_pair[1]]['{}_to_{}_port'.format(node_pair[0], node_pair[1])]['channels'][channel] -= capacity_used_this_slot
-            self.network[node_pair[0]][node_pair[1]]['{}_to_{}_port'.format(node_pair[0], node_pair[1])]['channels'][channel] = round(self.network[node_pair[0]][node_pair[1]]['{}_to_{}_port'.format(node_pair[0], node_pair[1])]['channels'][channel], num_decimals)
+        # update edge capacity remaining after establish this flow
+        self.link_state.update_path_capacity(path, channel, -capacity_used_this_slot, num_decimals=num_decimals)
 
-            if self.track_link_concurrent_demands_evolution:
+        if self.track_link_concurrent_demands_evolution:
+            for node_pair in self.get_path_edges(path):
                 self.update_link_concurrent_demands_evolution(node_pair, num_concurrent_demands_to_add=1)
 
-            # update global graph property
-            self.network.graph['curr_nw_capacity_used'] += capacity_used_this_slot
+        # update global graph property
+        self.network.graph['curr_nw_capacity_used'] += capacity_used_this_slot * len(path_capacities)
         self.network.graph['num_active_connections'] += 1
 
         # update packets left for this flow
@@ -2217,19 +2527,11 @@ class DCN(gym.Env):
         info_to_transfer_this_slot = packets_this_slot * packet_size
         capacity_used_this_slot = round(info_to_transfer_this_slot / self.slot_size, num_decimals) # info units of this flow transferred this time slot == capacity used on each channel in flow's path this time slot
 
-        edges = self.get_path_edges(path)
-        
-        num_edges = len(edges)
-        for edge in range(num_edges):
-            node_pair = edges[edge]
-            # update edge property
-            # self.network[node_pair[0]][node_pair[1]]['channels'][channel] += capacity_used_this_slot
-            # self.network[node_pair[0]][node_pair[1]]['channels'][channel] = round(self.network[node_pair[0]][node_pair[1]]['channels'][channel], num_decimals)
-            self.network[node_pair[0]][node_pair[1]]['{}_to_{}_port'.format(node_pair[0], node_pair[1])]['channels'][channel] += capacity_used_this_slot
-            self.network[node_pair[0]][node_pair[1]]['{}_to_{}_port'.format(node_pair[0], node_pair[1])]['channels'][channel] = round(self.network[node_pair[0]][node_pair[1]]['channels'][channel], num_decimals)
-
-            # update global graph property
-            self.network.graph['curr_nw_capacity_used'] -= capacity_used_this_slot
+        # update edge property
+        self.link_state.update_path_capacity(path, channel, capacity_used_this_slot, num_decimals=num_decimals)
+
+        # update global graph property
+        self.network.graph['curr_nw_capacity_used'] -= capacity_used_this_slot * len(self.link_state.get_path_link_idxs(path))
         self.network.graph['num_active_connections'] -= 1
 
 
@@ -2261,19 +2563,21 @@ class DCN(gym.Env):
 
         return pathcost
 
-    def k_shortest_paths(self, graph, source, target, num_k=None, weight='weight'):
+    def k_shortest_paths(self, graph, source, target, num_k=None, weight=None):
         '''
-        Uses Yen's algorithm to compute the k-shortest paths between a source
-        and a target node. The shortest path is that with the lowest pathcost,
-        defined by external path_cost() function. Paths are returned in order
-        of path cost, with lowest past cost being first etc.
+        Returns the k-shortest paths between a source and a target node from
+        the network's shared path cache (see trafpy.manager.src.routers.path_cache).
+        Paths are returned in order of path cost (number of hops), with lowest
+        path cost being first etc.
 
         Args:
         - source (label): label of source node
         - target (label): label of destination node
         - num_k (int, float): number of shortest paths to compute
-        - weight (dict key): dictionary key of value to be 'minimised' when
-        finding 'shortest' paths
+        - weight (dict key): dictionary key of edge value to be 'minimised' when
+        finding 'shortest' paths. If None, path cost is number of edges in path
+        and paths are looked up from the path cache. If given, paths are instead
+        computed for this pair on demand with Yen's algorithm (not cached)
 
         Returns:
         - A (list of lists): list of shortest paths between src and dst
@@ -2281,72 +2585,9 @@ class DCN(gym.Env):
         if num_k is None:
             num_k = self.num_k_paths
 
-        # Shortest path from the source to the target
-        A = [nx.shortest_path(graph, source, target, weight=weight)]
-        A_costs = [self.path_cost(graph, A[0], weight)]
-
-        # Initialize the heap to store the potential kth shortest path
-        B = queue.PriorityQueue()
-
-        for k in range(1, num_k):
-            # spur node ranges first node to next to last node in shortest path
-            try:
-                for i in range(len(A[k-1])-1):
-                    # Spur node retrieved from the prev k-shortest path, k - 1
-                    spurNode = A[k-1][i]
-                    # seq of nodes from src to spur node of prev k-shrtest path
-                    rootPath = A[k-1][:i]
-
-                    # We store the removed edges
-                    removed_edges = []
-
-                    for path in A:
-                        if len(path) - 1 > i and rootPath == path[:i]:
-                            # Remove edges of prev shrtest path w/ same root
-                            edge = (path[i], path[i+1])
-                            if not graph.has_edge(*edge):
-                                continue
-                            removed_edges.append((edge, graph.get_edge_data(*edge)))
-                            graph.remove_edge(*edge)
-
-                    # Calculate the spur path from the spur node to the sink
-                    try:
-                        spurPath = nx.shortest_path(graph, spurNode, target, weight=weight)
-
-                        # Entire path is made up of the root path and spur path
-                        totalPath = rootPath + spurPath
-                        totalPathCost = self.path_cost(graph, totalPath, weight)
-                        # Add the potential k-shortest path to the heap
-                        B.put((totalPathCost, totalPath))
-
-                    except nx.NetworkXNoPath:
-                        pass
-
-                    #Add back the edges that were removed from the graph
-                    for removed_edge in removed_edges:
-                        graph.add_edge(
-                            *removed_edge[0],
-                            **removed_edge[1]
-                        )
-
-                # Sort the potential k-shortest paths by cost
-                # B is already sorted
-                # Add the lowest cost path becomes the k-shortest path.
-                while True:
-                    try:
-                        cost_, path_ = B.get(False)
-                        if path_ not in A:
-                            A.append(path_)
-                            A_costs.append(cost_)
-                            break
-                    except queue.Empty:
-                        break
-            except IndexError:
-                pass
-        
-        
-
-        return A 
+        if weight is not None:
+            return [list(path) for path in compute_k_shortest_paths(graph, source, target, num_k, weight=weight)]
+        return get_path_cache(graph, num_k).k_shortest_paths(source, target, num_k, network=graph)
 
     def save_sim(self, 
                  path, 
@@ -2391,6 +2632,7 @@ class DCN(gym.Env):
 
 class RepresentationGenerator:
     def __init__(self, env):
+        import tensorflow as tf
         self.env = env
         
         # init network params
@@ -2408,12 +2650,14 @@ class RepresentationGenerator:
         self.action_embedding_size = tf.shape(init_rep)[1]
         
     def onehot_encode_endpoints(self):
+        import tensorflow as tf
         onehot_endpoints = tf.one_hot(indices=list(self.index_to_endpoint.keys()), depth=self.num_endpoints)
         endpoint_to_onehot = {endpoint: onehot for endpoint, onehot in zip(self.index_to_endpoint.values(), onehot_endpoints)}
         
         return onehot_endpoints, endpoint_to_onehot
     
     def onehot_encode_paths(self):
+        import tensorflow as tf
         num_k_paths = self.env.num_k_paths
         all_paths = []
         for src in self.endpoint_to_index.keys():
@@ -2433,7 +2677,10 @@ class RepresentationGenerator:
         
         return onehot_paths, path_to_onehot        
 
-    def conv_human_readable_flow_to_machine_readable_flow(self, flow, return_onehot_vectors=False, dtype=tf.float32):
+    def conv_human_readable_flow_to_machine_readable_flow(self, flow, return_onehot_vectors=False, dtype=None):
+        import tensorflow as tf
+        if dtype is None:
+            dtype = tf.float32
         machine_readable_flow = {}
 
         if return_onehot_vectors:
@@ -2467,12 +2714,17 @@ class RepresentationGenerator:
 
         return machine_readable_flow
     
-    def gen_machine_readable_network_observation(self, network_observation, return_onehot_vectors=False, dtype=tf.float32):
+    def gen_machine_readable_network_observation(self, network_observation, return_onehot_vectors=False, dtype=None):
         '''
         If return_onehot_vectors is False, rather than returning one hot encodings,
         will return discrete indices of variables. This is useful for gym.spaces.Discrete()
         observation spaces which automatically one-hot encode Discrete observation space variables.
+
+        dtype defaults to tf.float32.
         '''
+        import tensorflow as tf
+        if dtype is None:
+            dtype = tf.float32
         self.time_gen_machine_readable_start = time.time()
 
         num_placeholder_flows = self.num_endpoints * self.env.max_flows * (self.num_endpoints - 1)
@@ -2512,7 +2764,8 @@ class RepresentationGenerator:
                     for i in range(self.env.max_flows):
                         idx = next(action_iterator)
                         try:
-                            flow = q['queued_flows'][i]
+                            # copy, since network_observation may be the simulator's live network (see DCN.next_observation)
+                            flow = dict(q['queued_flows'][i])
                             paths = self.env.k_shortest_paths(self.env.network, flow['src'], flow['dst'])
                             for path in paths:
                                 # each path is a separate action
@@ -2538,7 +2791,10 @@ class RepresentationGenerator:
         return machine_readable_observation, action_dict
 
 
-    def _stack_list_of_tensors(self, list_of_tensors, dtype=tf.float32):
+    def _stack_list_of_tensors(self, list_of_tensors, dtype=None):
+        import tensorflow as tf
+        if dtype is None:
+            dtype = tf.float32
         stacked_tensor = []
         for tensor in list_of_tensors:
             try:
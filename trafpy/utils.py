@@ -1,7 +1,6 @@
 import pathlib
 import glob
 
-import torch
 import os
 import subprocess
 import pandas as pd